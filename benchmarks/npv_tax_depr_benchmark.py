@@ -0,0 +1,48 @@
+"""
+Benchmark of the NPV of depreciation deductions on the full asset data.
+
+Compares ccc.calcfunctions.npv_tax_depr(), which uses a compiled
+kernel when numba is installed, with the pure NumPy implementation
+used when it is not.
+
+With the ccc package installed, run from the top-level directory with:
+    python benchmarks/npv_tax_depr_benchmark.py
+"""
+
+import timeit
+import numpy as np
+from ccc.parameters import Specification, DepreciationParams
+from ccc.data import Assets
+import ccc.calcfunctions as cf
+
+NUM_RUNS = 20
+
+p = Specification()
+dp = DepreciationParams()
+df = cf.update_depr_methods(Assets().df, p, dp)
+r = p.r["c"]["mix"]
+pi = p.inflation_rate
+land_expensing = p.land_expensing
+# compile (or load from cache) before timing
+z_numba = cf.npv_tax_depr(df, r, pi, land_expensing).to_numpy()
+kernel = cf._npv_tax_depr_kernel
+
+
+def run():
+    cf.npv_tax_depr(df, r, pi, land_expensing)
+
+
+cf._npv_tax_depr_kernel = lambda: None
+time_numpy = timeit.timeit(run, number=NUM_RUNS) / NUM_RUNS
+z_numpy = cf.npv_tax_depr(df, r, pi, land_expensing).to_numpy()
+cf._npv_tax_depr_kernel = kernel
+print("Asset rows: ", len(df.index))
+print("NumPy:      {:.1f} ms".format(time_numpy * 1000))
+if kernel() is not None:
+    time_numba = timeit.timeit(run, number=NUM_RUNS) / NUM_RUNS
+    print("numba:      {:.1f} ms".format(time_numba * 1000))
+    for col in ["method", "asset_name"]:
+        df[col] = df[col].astype("category")
+    time_cat = timeit.timeit(run, number=NUM_RUNS) / NUM_RUNS
+    print("numba, categorical columns: {:.1f} ms".format(time_cat * 1000))
+    print("Same results: ", np.array_equal(z_numba, z_numpy, equal_nan=True))
@@ -0,0 +1,75 @@
+"""
+Benchmark of creating Specifications for many scenarios.
+
+Compares creating each scenario's Specification with Specification(),
+which copies the parsed and validated default parameters after the
+first call, with copy.deepcopy() and with Specification.clone() of a
+Specification that has already been created.  Then compares the cost
+per revision of applying many revisions with update_specification()
+and with Specification.bulk_update_specification(), with and without
+validation.
+
+With the ccc package installed, run from the top-level directory with:
+    python benchmarks/specification_benchmark.py
+"""
+
+import copy
+import timeit
+from ccc.parameters import Specification
+
+NUM_RUNS = 200
+REVISION = {"CIT_rate": 0.25}
+NUM_REVISIONS = 1000
+REVISIONS = [
+    {
+        "CIT_rate": [{"year": 2025 + i % 10, "value": 0.2 + i / 10000}],
+        "BonusDeprec_3yr": 1.0 - i / 10000,
+    }
+    for i in range(NUM_REVISIONS)
+]
+
+p = Specification()
+
+
+def run_init():
+    Specification().update_specification(REVISION)
+
+
+def run_deepcopy():
+    copy.deepcopy(p).update_specification(REVISION)
+
+
+def run_clone():
+    p.clone().update_specification(REVISION)
+
+
+def run_revision():
+    p.update_specification(REVISION)
+
+
+for label, run in [
+    ("Specification():", run_init),
+    ("copy.deepcopy():", run_deepcopy),
+    ("clone():", run_clone),
+    ("revision only:", run_revision),
+]:
+    time = timeit.timeit(run, number=NUM_RUNS) / NUM_RUNS
+    print("{:17} {:.2f} ms per scenario".format(label, time * 1000))
+
+p_bulk = p.clone()
+for label, run in [
+    (
+        "update_specification():",
+        lambda: [p_bulk.update_specification(rev) for rev in REVISIONS],
+    ),
+    (
+        "bulk, validated:",
+        lambda: p_bulk.bulk_update_specification(REVISIONS),
+    ),
+    (
+        "bulk, trusted:",
+        lambda: p_bulk.bulk_update_specification(REVISIONS, validate=False),
+    ),
+]:
+    time = timeit.timeit(run, number=1) / NUM_REVISIONS
+    print("{:24} {:.3f} ms per revision".format(label, time * 1000))
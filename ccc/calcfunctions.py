@@ -1,6 +1,20 @@
+import functools
 import numpy as np
 import pandas as pd
-from ccc.constants import TAX_METHODS
+from ccc.constants import (
+    TAX_METHODS,
+    DEPR_METHOD_CODES,
+    LAND_CODE,
+    INVENTORIES_CODE,
+)
+
+# codes of the depreciation methods in DEPR_METHOD_CODES, which numba
+# compiles into _npv_tax_depr_loop() as constants
+_DBSL_CODE = DEPR_METHOD_CODES["DB 200%"]
+_SL_CODE = DEPR_METHOD_CODES["SL"]
+_ECON_CODE = DEPR_METHOD_CODES["Economic"]
+_INCOME_FORECAST_CODE = DEPR_METHOD_CODES["Income Forecast"]
+_EXPENSING_CODE = DEPR_METHOD_CODES["Expensing"]
 
 
 def update_depr_methods(df, p, dp):
@@ -20,11 +34,9 @@ def update_depr_methods(df, p, dp):
 
     """
     # update tax_deprec_rates based on user defined parameters
-    # create dataframe with depreciation policy parameters for all
-    # known years
-    deprec_df = dp.expanded_df()
-    # keep just the current year in the CCC parameters object
-    deprec_df = deprec_df[deprec_df.year == p.year]
+    # get dataframe with depreciation policy parameters for just the
+    # current year in the CCC parameters object
+    deprec_df = dp.year_df(p.year)
     # merge depreciation policy parameters to asset dataframe
     df.drop(columns=deprec_df.keys(), inplace=True, errors="ignore")
     df = df.merge(
@@ -173,7 +185,7 @@ def income_forecast(Y, delta, bonus, r):
     return z
 
 
-def npv_tax_depr(df, r, pi, land_expensing):
+def npv_tax_depr(df, r, pi, land_expensing, code=None):
     """
     Depending on the method of depreciation, makes calls to either
     the straight line or declining balance calculations.
@@ -183,35 +195,237 @@ def npv_tax_depr(df, r, pi, land_expensing):
         r (scalar): discount rate
         pi (scalar): inflation rate
         land_expensing (scalar): rate of expensing on land
+        code (array_like): integer codes of the depreciation method of
+            each asset from depr_method_codes(), which are found from
+            the method and asset_name columns of `df` if `None`
 
     Returns:
         z (Pandas series): NPV of depreciation deductions for all asset
                 types and tax treatments
 
     """
-    idx = (df["method"] == "DB 200%") | (df["method"] == "DB 150%")
-    df.loc[idx, "z"] = dbsl(
-        df.loc[idx, "Y"], df.loc[idx, "b"], df.loc[idx, "bonus"], r
+    if code is None:
+        code = depr_method_codes(df["method"], df["asset_name"])
+    code = np.asarray(code)
+    Y = df["Y"].to_numpy(dtype=float)
+    b = df["b"].to_numpy(dtype=float)
+    bonus = df["bonus"].to_numpy(dtype=float)
+    delta = df["delta"].to_numpy(dtype=float)
+    kernel = _npv_tax_depr_kernel()
+    if kernel is not None and all(
+        np.size(x) == 1 for x in (r, pi, land_expensing)
+    ):
+        z = kernel(
+            code,
+            Y,
+            b,
+            bonus,
+            delta,
+            float(np.squeeze(r)),
+            float(np.squeeze(pi)),
+            float(np.squeeze(land_expensing)),
+        )
+    else:
+        z = npv_tax_depr_codes(code, Y, b, bonus, delta, r, pi, land_expensing)
+    df["z"] = z
+    z = df["z"]
+
+    return z
+
+
+def npv_tax_depr_array(
+    method, asset_name, Y, b, bonus, delta, r, pi, land_expensing
+):
+    """
+    Array version of npv_tax_depr().  All arguments are NumPy arrays
+    that are broadcast against each other, so that, e.g., asset rows
+    along the last axis can be evaluated for many sets of parameters
+    (one per row of `r`) at once.
+
+    Args:
+        method (array_like): method of tax depreciation
+        asset_name (array_like): name of asset
+        Y (array_like): asset life in years
+        b (array_like): scale of declining balance
+        bonus (array_like): rate of bonus depreciation
+        delta (array_like): rate of economic depreciation
+        r (array_like): discount rate
+        pi (array_like): inflation rate
+        land_expensing (array_like): rate of expensing on land
+
+    Returns:
+        z (array_like): NPV of depreciation deductions for all asset
+            types and tax treatments
+
+    """
+    method, asset_name = np.broadcast_arrays(
+        np.asarray(method, dtype=object), np.asarray(asset_name, dtype=object)
     )
-    idx = df["method"] == "SL"
-    df.loc[idx, "z"] = sl(df.loc[idx, "Y"], df.loc[idx, "bonus"], r)
-    idx = df["method"] == "Economic"
-    df.loc[idx, "z"] = econ(df.loc[idx, "delta"], df.loc[idx, "bonus"], r, pi)
-    idx = df["method"] == "Income Forecast"
-    df.loc[idx, "z"] = income_forecast(
-        df.loc[idx, "Y"], df.loc[idx, "delta"], df.loc[idx, "bonus"], r
+    code = depr_method_codes(method.ravel(), asset_name.ravel())
+
+    return npv_tax_depr_codes(
+        code.reshape(method.shape), Y, b, bonus, delta, r, pi, land_expensing
     )
-    idx = df["method"] == "Expensing"
-    df.loc[idx, "z"] = 1.0
-    idx = df["asset_name"] == "Land"
-    df.loc[idx, "z"] = np.squeeze(land_expensing)
-    idx = df["asset_name"] == "Inventories"
-    df.loc[idx, "z"] = 0.0  # not sure why I have to do this with changes
-    z = df["z"]
+
+
+def npv_tax_depr_codes(code, Y, b, bonus, delta, r, pi, land_expensing):
+    """
+    Version of npv_tax_depr_array() that takes the integer codes of
+    the depreciation methods from depr_method_codes() in place of the
+    methods and asset names, so that they are only looked up once for
+    many sets of parameters.
+
+    Args:
+        code (array_like): integer code of the method of tax
+            depreciation
+        Y (array_like): asset life in years
+        b (array_like): scale of declining balance
+        bonus (array_like): rate of bonus depreciation
+        delta (array_like): rate of economic depreciation
+        r (array_like): discount rate
+        pi (array_like): inflation rate
+        land_expensing (array_like): rate of expensing on land
+
+    Returns:
+        z (array_like): NPV of depreciation deductions for all asset
+            types and tax treatments
+
+    """
+    shape = np.broadcast_shapes(
+        np.shape(code),
+        np.shape(Y),
+        np.shape(bonus),
+        np.shape(r),
+        np.shape(pi),
+        np.shape(land_expensing),
+    )
+    z = np.full(shape, np.nan)
+    # each formula is evaluated for all rows and only kept where the
+    # method applies, so ignore warnings from the other rows
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        # DB 200% and DB 150% share a code
+        z = np.where(code == _DBSL_CODE, dbsl(Y, b, bonus, r), z)
+        z = np.where(code == _SL_CODE, sl(Y, bonus, r), z)
+        z = np.where(code == _ECON_CODE, econ(delta, bonus, r, pi), z)
+        z = np.where(
+            code == _INCOME_FORECAST_CODE,
+            income_forecast(Y, delta, bonus, r),
+            z,
+        )
+    z = np.where(code == _EXPENSING_CODE, 1.0, z)
+    z = np.where(code == LAND_CODE, land_expensing, z)
+    z = np.where(code == INVENTORIES_CODE, 0.0, z)
 
     return z
 
 
+def depr_method_codes(method, asset_name=None, asset_code=None):
+    """
+    Maps depreciation methods and asset names to the integer codes in
+    DEPR_METHOD_CODES, LAND_CODE and INVENTORIES_CODE.  This is fastest
+    if `method` and `asset_name` are categorical.
+
+    Args:
+        method (array_like): method of tax depreciation
+        asset_name (array_like): name of asset
+        asset_code (array_like): codes of the asset names from
+            asset_codes(), used in place of `asset_name`
+
+    Returns:
+        code (Numpy array): integer code for each asset, 0 if the
+            method is not known
+
+    """
+    code = _lookup_codes(method, DEPR_METHOD_CODES)
+    if asset_code is None:
+        asset_code = asset_codes(asset_name)
+    code = np.where(asset_code > 0, asset_code, code)
+
+    return code
+
+
+def asset_codes(asset_name):
+    """
+    Maps asset names to LAND_CODE for land, INVENTORIES_CODE for
+    inventories and 0 for all other assets, whose treatment depends on
+    their method of depreciation.
+
+    Args:
+        asset_name (array_like): name of asset
+
+    Returns:
+        asset_code (Numpy array): integer code for each asset
+
+    """
+    return _lookup_codes(
+        asset_name, {"Land": LAND_CODE, "Inventories": INVENTORIES_CODE}
+    )
+
+
+def _lookup_codes(values, mapping):
+    """
+    Look up the integer code in mapping for each value, 0 if missing,
+    looking up each category just once if values are categorical.
+    """
+    values = pd.Series(values, copy=False)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        table = np.array(
+            [mapping.get(c, 0) for c in values.cat.categories] + [0],
+            dtype=np.int64,
+        )
+        # missing values have a category code of -1
+        return table[values.cat.codes.to_numpy()]
+    return values.map(mapping).fillna(0).to_numpy(dtype=np.int64, copy=True)
+
+
+def _npv_tax_depr_loop(code, Y, b, bonus, delta, r, pi, land_expensing):
+    """
+    Computes the NPV of depreciation deductions for each asset in one
+    loop, choosing the formula by the method code.  This is compiled
+    with numba when it is available.
+    """
+    z = np.empty(code.shape[0])
+    for i in range(code.shape[0]):
+        if code[i] == _DBSL_CODE:  # DB 200% and DB 150%
+            z[i] = _dbsl(Y[i], b[i], bonus[i], r)
+        elif code[i] == _SL_CODE:
+            z[i] = _sl(Y[i], bonus[i], r)
+        elif code[i] == _ECON_CODE:
+            z[i] = _econ(delta[i], bonus[i], r, pi)
+        elif code[i] == _INCOME_FORECAST_CODE:
+            z[i] = _income_forecast(Y[i], delta[i], bonus[i], r)
+        elif code[i] == _EXPENSING_CODE:
+            z[i] = 1.0
+        elif code[i] == LAND_CODE:
+            z[i] = land_expensing
+        elif code[i] == INVENTORIES_CODE:
+            z[i] = 0.0
+        else:
+            z[i] = np.nan
+    return z
+
+
+@functools.lru_cache(maxsize=None)
+def _npv_tax_depr_kernel():
+    """
+    Returns _npv_tax_depr_loop() compiled with numba, or None if numba
+    is not available.  numba is slow to import, so it is only imported,
+    and the kernel compiled, on the first call rather than when ccc is
+    imported.
+    """
+    try:
+        import numba
+    except ImportError:  # pragma: no cover
+        return None
+    global _dbsl, _sl, _econ, _income_forecast
+    _dbsl = numba.njit(cache=True)(dbsl)
+    _sl = numba.njit(cache=True)(sl)
+    _econ = numba.njit(cache=True)(econ)
+    _income_forecast = numba.njit(cache=True)(income_forecast)
+
+    return numba.njit(cache=True)(_npv_tax_depr_loop)
+
+
 def eq_coc(
     delta,
     z,
@@ -283,7 +497,9 @@ def eq_coc(
                 re_credit["By asset"][ac] for ac in asset_code_idx
             ]
         # take the larger of the two R&E credit rates
-        inv_tax_credit += np.maximum(re_credit_rate_asset, re_credit_rate_ind)
+        inv_tax_credit = inv_tax_credit + np.maximum(
+            re_credit_rate_asset, re_credit_rate_ind
+        )
     rho = (
         ((r - pi + delta) / (1 - u))
         * (1 - inv_tax_credit * nu - u_d * z * (1 - psi * inv_tax_credit))
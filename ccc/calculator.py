@@ -9,11 +9,17 @@ Cost-of-Capital-Calculator Calculator class.
 # pylint: disable=invalid-name,no-value-for-parameter,too-many-lines
 
 import copy
+import pickle
+import hashlib
+import threading
 import pandas as pd
 import numpy as np
 from ccc.calcfunctions import (
     update_depr_methods,
     npv_tax_depr,
+    npv_tax_depr_codes,
+    depr_method_codes,
+    asset_codes,
     eq_coc,
     eq_coc_inventory,
     eq_ucc,
@@ -22,41 +28,31 @@ from ccc.calcfunctions import (
     eq_tax_wedge,
     eq_eatr,
 )
-from ccc.parameters import Specification, DepreciationParams
+from ccc.parameters import (
+    Specification,
+    DepreciationParams,
+    revision_grid,
+)
 from ccc.data import Assets
-from ccc.utils import wavg, diff_two_tables, save_return_table
+from ccc.utils import (
+    uncategorize,
+    group_sums,
+    wavg_rollup,
+    diff_two_tables,
+    save_return_table,
+    StreamingStats,
+)
 from ccc.constants import (
     VAR_DICT,
     MAJOR_IND_ORDERED,
     OUTPUT_VAR_LIST,
     OUTPUT_DATA_FORMATS,
+    AGG_VAR_LIST,
+    CALC_STAGE_PARAMS,
+    INVENTORIES_CODE,
+    LAND_CODE,
 )
 
-# import pdb
-# importing Bokeh libraries
-from bokeh.plotting import figure
-from bokeh.transform import dodge
-from bokeh.models import (
-    ColumnDataSource,
-    CustomJS,
-    LabelSet,
-    Title,
-    CustomJSTickFormatter,
-    BoxAnnotation,
-    HoverTool,
-    NumeralTickFormatter,
-    Span,
-    TabPanel,
-    Tabs,
-)
-from bokeh.models.widgets import RadioButtonGroup
-from bokeh.models.tickers import FixedTicker
-from bokeh.layouts import gridplot, column
-
-# import styles and callback
-from ccc.styles import PLOT_FORMATS, TITLE_FORMATS, RED, BLUE
-from ccc.controls_callback_script import CONTROLS_CALLBACK_SCRIPT
-
 
 class Calculator:
     """
@@ -70,8 +66,9 @@ class Calculator:
             descripting depreciation rules for each asset, this argument
             must be specified and object is copied for internal use
         assets (CCC Assets class object): contains asset data, this
-            argument must be specified and object is copied for
-            internal use
+            argument must be specified and its data are shared with
+            the Calculator rather than copied and are never modified,
+            see Notes
         verbose (bool): specifies whether or not to write to stdout
             data-loaded and data-extrapolated progress reports; default
             value is `True`.
@@ -84,8 +81,20 @@ class Calculator:
 
     Notes:
         All calculations are done on the internal copies of the
-        Specifications and Assets objects passed to each of the two
-        Calculator constructors.
+        Specifications and DepreciationParams objects passed to each of
+        the two Calculator constructors.  The asset data of the Assets
+        object are shared rather than copied: the Calculator keeps a
+        shallow copy of the DataFrame, and pandas copy-on-write, which
+        is always in effect from pandas 3.0 on, copies a column only
+        when either side modifies it, so neither sees the other's
+        changes.  With older versions of pandas that do not have
+        copy-on-write turned on, the asset data are copied instead.
+
+        Calculator objects are thread-safe: the same or different
+        Calculators can be used from several threads at once, e.g.,
+        from a `concurrent.futures.ThreadPoolExecutor`.  Results are
+        computed once under a lock held by each Calculator, and the
+        DataFrames computed are never modified afterwards.
 
     Example:
         The most efficient way to specify current-law and reform Calculator
@@ -103,7 +112,7 @@ class Calculator:
     def __init__(self, p=None, dp=None, assets=None, verbose=True):
         # pylint: disable=too-many-arguments,too-many-branches
         if isinstance(p, Specification):
-            self.__p = copy.deepcopy(p)
+            self.__p = p.clone()
         else:
             raise ValueError("must specify p as a Specification object")
         if isinstance(dp, DepreciationParams):
@@ -111,10 +120,28 @@ class Calculator:
         else:
             raise ValueError("must specify p as an DepreciationParams object")
         if isinstance(assets, Assets):
-            self.__assets = copy.deepcopy(assets)
+            self.__assets = self.__share_assets(assets)
         else:
             raise ValueError("must specify assets as a Assets object")
+        self.__data_columns = list(assets.df.columns)
         self.__stored_assets = None
+        # entity rows and asset codes of the asset data, see
+        # __entity_data()
+        self.__entity_codes = None
+        # results cached by (method, include_land, include_inventories)
+        self.__results = {}
+        # results of the stages of calc_base(), see __stage()
+        self.__stages = {}
+        self.__lock = threading.RLock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_Calculator__lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__lock = threading.RLock()
 
     def calc_other(self, df):
         """
@@ -129,34 +156,41 @@ class Calculator:
                 columns (ucc, metr, mettr, tax_wedge, eatr)
 
         """
-        dfs = {
-            "c": df[df["tax_treat"] == "corporate"].copy(),
-            "pt": df[df["tax_treat"] == "non-corporate"].copy(),
-        }
-        # separate into corp and non-corp dataframe here
-        for t in self.__p.entity_list:
-            for f in self.__p.financing_list:
-                dfs[t]["ucc_" + str(f)] = eq_ucc(
-                    dfs[t]["rho_" + str(f)], dfs[t]["delta"]
+        p = self.__params()
+        df, rows, _ = self.__entity_rows(df)
+        cols = {}
+
+        def set_col(name, t, values):
+            col = cols.setdefault(name, np.full(len(df.index), np.nan))
+            col[rows[t]] = values
+
+        # separate into corp and non-corp rows here
+        for t in p.entity_list:
+            dft = df.iloc[rows[t]]
+            for f in p.financing_list:
+                rho = dft["rho_" + str(f)]
+                set_col("ucc_" + str(f), t, eq_ucc(rho, dft["delta"]))
+                metr = eq_metr(rho, p.get("r_prime", t, f), p.inflation_rate)
+                set_col("metr_" + str(f), t, metr)
+                set_col("mettr_" + str(f), t, eq_mettr(rho, p.get("s", t, f)))
+                set_col(
+                    "tax_wedge_" + str(f),
+                    t,
+                    eq_tax_wedge(rho, p.get("s", t, f)),
                 )
-                dfs[t]["metr_" + str(f)] = eq_metr(
-                    dfs[t]["rho_" + str(f)],
-                    self.__p.r_prime[t][f],
-                    self.__p.inflation_rate,
+                set_col(
+                    "eatr_" + str(f),
+                    t,
+                    eq_eatr(rho, metr, p.profit_rate, p.get("u", t)),
                 )
-                dfs[t]["mettr_" + str(f)] = eq_mettr(
-                    dfs[t]["rho_" + str(f)], self.__p.s[t][f]
-                )
-                dfs[t]["tax_wedge_" + str(f)] = eq_tax_wedge(
-                    dfs[t]["rho_" + str(f)], self.__p.s[t][f]
-                )
-                dfs[t]["eatr_" + str(f)] = eq_eatr(
-                    dfs[t]["rho_" + str(f)],
-                    dfs[t]["metr_" + str(f)],
-                    self.__p.profit_rate,
-                    self.__p.u[t],
-                )
-        df = pd.concat(dfs, ignore_index=True)
+        columns = list(df.columns) + [c for c in cols if c not in df]
+        df = pd.concat(
+            [
+                df.drop(columns=list(cols), errors="ignore"),
+                pd.DataFrame(cols),
+            ],
+            axis=1,
+        )[columns]
 
         return df
 
@@ -170,61 +204,1027 @@ class Calculator:
 
         """
         # conducts static analysis of Calculator object for current_year
-        self.__assets.df = update_depr_methods(
-            self.__assets.df, self.__p, self.__dp
+        with self.__lock:
+            self.__assets.df = self.__cached_result(
+                "calc_base", True, True, self.__calc_base
+            )
+
+    def __calc_base(self, include_inventories, include_land):
+        """
+        Private method.  Computes the asset data with z and rho set by
+        calc_base(), which includes all assets.
+
+        """
+        # pylint: disable=unused-argument
+        # the asset data columns are shared with the Assets object
+        # passed in, only the columns computed here are new
+        p = self.__params()
+        df, rows, asset_code = self.__entity_data()
+        is_inventory = asset_code == INVENTORIES_CODE
+        depr_key, deprec_df = self.__stage(
+            ("depr",),
+            [],
+            lambda: update_depr_methods(
+                df[["bea_asset_code"]], p, self.__dp
+            ).drop(columns="bea_asset_code"),
+        )
+        code_key, code = self.__stage(
+            ("code",),
+            [depr_key],
+            lambda: depr_method_codes(
+                deprec_df["method"], asset_code=asset_code
+            ),
         )
-        dfs = {
-            "c": self.__assets.df[
-                self.__assets.df["tax_treat"] == "corporate"
-            ].copy(),
-            "pt": self.__assets.df[
-                self.__assets.df["tax_treat"] == "non-corporate"
-            ].copy(),
-        }
-        # separate into corp and non-corp dataframe here
-        for t in self.__p.entity_list:
-            for f in self.__p.financing_list:
-                dfs[t]["z_" + str(f)] = npv_tax_depr(
-                    dfs[t],
-                    self.__p.r[t][f],
-                    self.__p.inflation_rate,
-                    self.__p.land_expensing,
+        keys = [depr_key]
+        cols = {}
+
+        def set_col(name, t, values):
+            col = cols.setdefault(name, np.full(len(df.index), np.nan))
+            col[rows[t]] = values
+
+        # separate into corp and non-corp rows here
+        for t in p.entity_list:
+            dft = pd.concat(
+                [df.iloc[rows[t]], deprec_df.iloc[rows[t]]], axis=1
+            )
+            for f in p.financing_list:
+                z_key, z = self.__stage(
+                    ("z", t, f),
+                    [depr_key, code_key],
+                    lambda: npv_tax_depr(
+                        dft,
+                        p.get("r", t, f),
+                        p.inflation_rate,
+                        p.land_expensing,
+                        code[rows[t]],
+                    ),
                 )
-                dfs[t]["rho_" + str(f)] = eq_coc(
-                    dfs[t]["delta"],
-                    dfs[t]["z_" + str(f)],
-                    self.__p.property_tax,
-                    self.__p.u[t],
-                    self.__p.u_d[t],
-                    self.__p.inv_tax_credit,
-                    self.__p.psi,
-                    self.__p.nu,
-                    self.__p.inflation_rate,
-                    self.__p.r[t][f],
-                    self.__p.re_credit,
-                    dfs[t]["bea_asset_code"],
-                    dfs[t]["bea_ind_code"],
+                rho_key, rho = self.__stage(
+                    ("rho", t, f),
+                    [z_key],
+                    lambda: self.__calc_rho(
+                        dft, z, t, f, is_inventory[rows[t]]
+                    ),
                 )
-                if not self.__p.inventory_expensing:
-                    idx = dfs[t]["asset_name"] == "Inventories"
-                    dfs[t].loc[idx, "rho_" + str(f)] = np.squeeze(
-                        eq_coc_inventory(
-                            self.__p.u[t],
-                            self.__p.phi,
-                            self.__p.Y_v,
-                            self.__p.inflation_rate,
-                            self.__p.r[t][f],
-                        )
-                    )
-        self.__assets.df = pd.concat(dfs, ignore_index=True, sort=True)
+                keys += [z_key, rho_key]
+                set_col("z", t, z)
+                set_col("z_" + str(f), t, z)
+                set_col("rho_" + str(f), t, rho)
+
+        def base_df():
+            base = pd.concat([df, deprec_df, pd.DataFrame(cols)], axis=1)
+            return base[sorted(base.columns)]
+
+        return self.__stage(("base",), keys, base_df)[1]
+
+    def __calc_rho(self, df, z, t, f, is_inventory):
+        """
+        Private method.  Computes the cost of capital for entity type t
+        and financing type f, where `is_inventory` is `True` for the
+        rows of inventories.
+
+        """
+        p = self.__params()
+        rho = eq_coc(
+            df["delta"],
+            z,
+            p.property_tax,
+            p.get("u", t),
+            p.get("u_d", t),
+            p.inv_tax_credit,
+            p.psi,
+            p.nu,
+            p.inflation_rate,
+            p.get("r", t, f),
+            p.re_credit,
+            df["bea_asset_code"],
+            df["bea_ind_code"],
+        )
+        if not p.inventory_expensing:
+            rho = np.where(
+                is_inventory,
+                eq_coc_inventory(
+                    p.get("u", t),
+                    p.phi,
+                    p.Y_v,
+                    p.inflation_rate,
+                    p.get("r", t, f),
+                ),
+                rho,
+            )
+
+        return rho
 
     def calc_all(self):
         """
         Calculates all CCC variables for some CCC Assets object.
 
         """
-        self.calc_base()
-        self.__assets.df = self.calc_other(self.__assets.df)
+        with self.__lock:
+            self.__assets.df = self.calc_other(self.__base_df())
+
+    def calc_batch(self, revisions):
+        """
+        Calculates all CCC variables for many revisions to the
+        Specification of this Calculator at once.  Each revision is
+        applied to a copy of the Calculator's Specification, and z,
+        rho and the variables from calc_other() are evaluated as arrays
+        with one row per revision, so the asset data are merged and
+        grouped only once for the whole batch.
+
+        Because these variables depend only on the asset type and tax
+        treatment, rows of the asset data that only differ by industry
+        are evaluated once.
+
+        Args:
+            revisions (list or dict): list of revision dictionaries,
+                suitable for use with the update_specification method,
+                or a dictionary with `PARAM: LIST-OF-VALUES` pairs, in
+                which case all combinations of the values are evaluated
+                (see `revision_grid`)
+
+        Returns:
+            df (Pandas DataFrame): one row for each revision and each
+                asset type and tax treatment, with the position of the
+                revision in the `scenario` column, the sum of `assets`
+                over industries, and columns for all output variables
+
+        """
+        if isinstance(revisions, dict):
+            revisions = revision_grid(revisions)
+        specs = []
+        for revision in revisions:
+            p = self.__p.clone()
+            p.update_specification(revision)
+            specs.append(p)
+
+        return self.__calc_specs(specs, "scenario", np.arange(len(specs)))
+
+    def calc_by_year(self, years):
+        """
+        Calculates all CCC variables for each year in `years`, using
+        the parameter values and depreciation rules in effect in that
+        year.  As in calc_batch(), all years are evaluated together as
+        arrays with one row per year.
+
+        Args:
+            years (list): calendar years to evaluate
+
+        Returns:
+            df (Pandas DataFrame): one row for each year and each asset
+                type and tax treatment, with the `year` column first,
+                the sum of `assets` over industries, and columns for all
+                output variables
+
+        """
+        specs = []
+        for year in years:
+            p = self.__p.clone()
+            p.set_state(year=year)
+            p.year = year
+            p.compute_default_params()
+            specs.append(p)
+
+        return self.__calc_specs(specs, "year", list(years))
+
+    def __calc_specs(self, specs, label, values):
+        """
+        Private method.  Evaluates all CCC variables for each of a list
+        of Specifications and stacks the results.
+
+        Args:
+            specs (list): CCC Specification objects
+            label (string): name of the column identifying the
+                Specification
+            values (array_like): value of `label` for each Specification
+
+        Returns:
+            df (Pandas DataFrame): one row for each Specification and
+                each asset type and tax treatment
+
+        """
+        specs = [p.compile() for p in specs]
+        rows_df = self.__batch_rows()
+        rules, codes = self.__depr_rules(specs, rows_df)
+        results = self.__calc_arrays(specs, rows_df, rules, codes)
+        num_rows = len(rows_df.index)
+        df = rows_df.iloc[np.tile(np.arange(num_rows), len(specs))]
+        df = df.reset_index(drop=True)
+        df.insert(0, label, np.repeat(values, num_rows))
+        for name, array in list(rules.items()) + list(results.items()):
+            df[name] = array.ravel()
+
+        return df
+
+    def __batch_rows(self, data_rows=False):
+        """
+        Private method.  Finds the distinct asset types and tax
+        treatments in the asset data, with their total assets.
+
+        Args:
+            data_rows (bool): whether to also return the asset data and
+                the row of `rows_df` for each of its rows
+
+        Returns:
+            rows_df (Pandas DataFrame): one row per asset type and tax
+                treatment, with corporate rows first
+            df (Pandas DataFrame): corporate and non-corporate asset
+                data, if `data_rows`
+            row (Numpy array): row of `rows_df` for each row of `df`,
+                if `data_rows`
+
+        """
+        df = self.__assets.df
+        df = df[df["tax_treat"].isin(["corporate", "non-corporate"])]
+        keys = [
+            "tax_treat",
+            "major_asset_group",
+            "minor_asset_group",
+            "bea_asset_code",
+            "asset_name",
+            "delta",
+        ]
+        grouped = df.groupby(keys, sort=True, dropna=False, observed=True)
+        rows_df = uncategorize(grouped["assets"].sum().reset_index())
+        if data_rows:
+            return rows_df, df, grouped.ngroup().to_numpy()
+
+        return rows_df
+
+    def __depr_rules(self, specs, df, by_year=None):
+        """
+        Private method.  Finds the tax depreciation rules for each row
+        of `df` under each Specification in `specs`.  The rules are
+        merged once for each distinct year.
+
+        Args:
+            specs (list): CCC CompiledSpecification objects
+            df (Pandas DataFrame): assets by type and tax treatment
+            by_year (dict): rules already merged, by year, which is
+                updated with the years merged
+
+        Returns:
+            rules (dict): arrays of life, method, system, b, Y and bonus
+                with one row per Specification and one column per row
+                of `df`
+            codes (Numpy array): codes of the depreciation methods
+                from depr_method_codes(), in the same shape
+
+        """
+        names = ["life", "method", "system", "b", "Y"]
+        if by_year is None:
+            by_year = {}
+        asset_code = None
+        for p in specs:
+            if p.year not in by_year:
+                year_df = update_depr_methods(
+                    df[["bea_asset_code"]].copy(), p, self.__dp
+                )
+                if asset_code is None:
+                    asset_code = asset_codes(df["asset_name"])
+                arrays = [year_df[name].to_numpy() for name in names]
+                arrays.append(
+                    depr_method_codes(year_df["method"], asset_code=asset_code)
+                )
+                by_year[p.year] = arrays
+        rules = {}
+        for i, name in enumerate(names):
+            rules[name] = np.array(
+                [by_year[p.year][i] for p in specs],
+                dtype=object if name in ["method", "system"] else float,
+            ).reshape(len(specs), len(df.index))
+        codes = np.array(
+            [by_year[p.year][len(names)] for p in specs], dtype=np.int64
+        ).reshape(len(specs), len(df.index))
+        # bonus depreciation rates are looked up by asset life
+        lives, life_idx = np.unique(rules["life"], return_inverse=True)
+        bonus = np.array(
+            [
+                [p.bonus_deprec.get(life, life) for life in lives]
+                for p in specs
+            ],
+            dtype=float,
+        ).reshape(len(specs), len(lives))
+        rules["bonus"] = np.take_along_axis(
+            bonus, life_idx.reshape(rules["life"].shape), axis=1
+        )
+
+        return rules, codes
+
+    def __calc_arrays(self, specs, df, rules, codes):
+        """
+        Private method.  Evaluates z, rho and the variables from
+        calc_other() for every Specification in `specs` and every row
+        of `df`.
+
+        Args:
+            specs (list): CCC CompiledSpecification objects
+            df (Pandas DataFrame): assets by type and tax treatment
+            rules (dict): depreciation rules from __depr_rules()
+            codes (Numpy array): depreciation method codes from
+                __depr_rules()
+
+        Returns:
+            results (dict): arrays with one row per Specification and
+                one column per row of `df`, keyed by variable name
+
+        """
+        is_c = (df["tax_treat"] == "corporate").to_numpy()
+        delta = df["delta"].to_numpy(dtype=float)
+        Y = rules["Y"]
+        b = rules["b"]
+        bonus = rules["bonus"]
+
+        def by_spec(get):
+            return self.__by_spec(specs, get)
+
+        def by_entity(get):
+            return self.__by_entity(specs, is_c, get)
+
+        pi = by_spec(lambda p: p.inflation_rate)
+        u = by_entity(lambda p, t: p.get("u", t))
+        u_d = by_entity(lambda p, t: p.get("u_d", t))
+        expense_inventory = by_spec(lambda p: p.inventory_expensing)
+        inventory_idx = (codes == INVENTORIES_CODE) & (expense_inventory == 0)
+        results = {}
+        # pandas ignores floating point errors in calc_base() and
+        # calc_other(), so do the same here
+        with np.errstate(all="ignore"):
+            for f in specs[0].financing_list:
+                r = by_entity(lambda p, t: p.get("r", t, f))
+                z = npv_tax_depr_codes(
+                    codes,
+                    Y,
+                    b,
+                    bonus,
+                    delta,
+                    r,
+                    pi,
+                    by_spec(lambda p: p.land_expensing),
+                )
+                rho = eq_coc(
+                    delta,
+                    z,
+                    by_spec(lambda p: p.property_tax),
+                    u,
+                    u_d,
+                    by_spec(lambda p: p.inv_tax_credit),
+                    by_spec(lambda p: p.psi),
+                    by_spec(lambda p: p.nu),
+                    pi,
+                    r,
+                )
+                rho = np.where(
+                    inventory_idx,
+                    eq_coc_inventory(
+                        u,
+                        by_spec(lambda p: p.phi),
+                        by_spec(lambda p: p.Y_v),
+                        pi,
+                        r,
+                    ),
+                    rho,
+                )
+                results["z_" + str(f)] = z
+                results["rho_" + str(f)] = rho
+                results.update(
+                    self.__calc_other_arrays(specs, is_c, delta, rho, f)
+                )
+
+        return results
+
+    def __calc_other_arrays(self, specs, is_c, delta, rho, f):
+        """
+        Private method.  Array version of calc_other() for every
+        Specification in `specs`, for financing type f.
+
+        Args:
+            specs (list): CCC CompiledSpecification objects
+            is_c (Numpy array): whether each column is corporate
+            delta (Numpy array): rate of economic depreciation for each
+                column
+            rho (Numpy array): cost of capital with one row per
+                Specification
+            f (string): financing type
+
+        Returns:
+            results (dict): arrays of ucc, metr, mettr, tax_wedge and
+                eatr, keyed by variable name
+
+        """
+        pi = self.__by_spec(specs, lambda p: p.inflation_rate)
+        u = self.__by_entity(specs, is_c, lambda p, t: p.get("u", t))
+        r_prime = self.__by_entity(
+            specs, is_c, lambda p, t: p.get("r_prime", t, f)
+        )
+        s = self.__by_entity(specs, is_c, lambda p, t: p.get("s", t, f))
+        with np.errstate(all="ignore"):
+            metr = eq_metr(rho, r_prime, pi)
+            results = {
+                "ucc_" + str(f): eq_ucc(rho, delta),
+                "metr_" + str(f): metr,
+                "mettr_" + str(f): eq_mettr(rho, s),
+                "tax_wedge_" + str(f): eq_tax_wedge(rho, s),
+                "eatr_"
+                + str(f): eq_eatr(
+                    rho,
+                    metr,
+                    self.__by_spec(specs, lambda p: p.profit_rate),
+                    u,
+                ),
+            }
+
+        return results
+
+    @staticmethod
+    def __by_spec(specs, get):
+        """
+        Private method.  Column vector of a scalar parameter across
+        Specifications.  A Specification may hold an array of values of
+        the parameter, e.g., one for each draw in calc_monte_carlo(),
+        which then fills as many rows.
+
+        """
+        return np.concatenate([np.ravel(get(p)).astype(float) for p in specs])[
+            :, np.newaxis
+        ]
+
+    @staticmethod
+    def __by_entity(specs, is_c, get):
+        """
+        Private method.  Parameter that differs between corporate and
+        non-corporate entities, with one row per Specification and one
+        column per element of `is_c`.
+
+        """
+        return np.where(
+            is_c,
+            Calculator.__by_spec(specs, lambda p: get(p, "c")),
+            Calculator.__by_spec(specs, lambda p: get(p, "pt")),
+        )
+
+    def calc_sensitivity(
+        self,
+        params,
+        aggregate=False,
+        include_land=True,
+        include_inventories=True,
+        step=1e-6,
+    ):
+        """
+        Calculates the derivatives of all output variables with respect
+        to one or more parameters of the Specification.  Derivatives are
+        central differences, with the steps for all parameters evaluated
+        together as arrays, as in calc_batch().  Steps are one-sided at
+        the bounds of a parameter's range.
+
+        Args:
+            params (list): names of scalar parameters, e.g., 'CIT_rate'
+            aggregate (bool): whether to return the derivatives of the
+                asset-weighted overall values for corporate,
+                non-corporate and all entities, as in summary_table(),
+                rather than those for each asset type and tax treatment
+            include_inventories (bool): whether to include inventories
+                in the overall values.  Defaults to `True`.
+            include_land (bool): whether to include land in the overall
+                values.  Defaults to `True`.
+            step (scalar): size of the step relative to the magnitude of
+                the parameter, or to one if it is smaller than one
+
+        Returns:
+            df (Pandas DataFrame): one row for each parameter, named in
+                the `param` column, and each asset type and tax
+                treatment, or each value of `tax_treat` if `aggregate`,
+                with the derivatives of all output variables
+
+        """
+        if isinstance(params, str):
+            params = [params]
+        revisions = []
+        steps = []
+        for name in params:
+            lo, hi = self.__sensitivity_points(name, step)
+            revisions += [{name: lo}, {name: hi}]
+            steps.append(hi - lo)
+        specs = []
+        for revision in revisions:
+            p = self.__p.clone()
+            p.bulk_update_specification([revision])
+            specs.append(p.compile())
+        rows_df = self.__batch_rows()
+        rules, codes = self.__depr_rules(specs, rows_df)
+        results = self.__calc_arrays(specs, rows_df, rules, codes)
+        if aggregate:
+            rows_df, results = self.__aggregate_arrays(
+                specs,
+                rows_df,
+                dict(results, Y=rules["Y"]),
+                include_land,
+                include_inventories,
+            )
+        steps = np.array(steps)[:, np.newaxis]
+        num_rows = len(rows_df.index)
+        df = rows_df.iloc[np.tile(np.arange(num_rows), len(params))]
+        df = df.reset_index(drop=True)
+        df.insert(0, "param", np.repeat(params, num_rows))
+        for name, array in results.items():
+            df[name] = ((array[1::2] - array[::2]) / steps).ravel()
+
+        return df
+
+    def __sensitivity_points(self, name, step):
+        """
+        Private method.  Finds the two values of a parameter at which
+        to evaluate a central difference, within its range.
+
+        """
+        value, min_value, max_value = self.__scalar_param(name)
+        h = step * max(1.0, abs(value))
+        lo, hi = value - h, value + h
+        if min_value is not None:
+            lo = max(lo, min_value)
+        if max_value is not None:
+            hi = min(hi, max_value)
+        if not lo < hi:
+            raise ValueError("{} cannot be varied".format(name))
+
+        return lo, hi
+
+    def __scalar_param(self, name):
+        """
+        Private method.  Returns the value of a scalar numeric parameter
+        of the Specification with the minimum and maximum of its range,
+        which are `None` if not given as numbers.
+
+        """
+        if name not in self.__p._data or self.__p._data[name].get(
+            "type"
+        ) not in ["float", "int"]:
+            raise ValueError("{} is not a numeric parameter".format(name))
+        value = np.squeeze(getattr(self.__p, name))
+        if np.size(value) != 1:
+            raise ValueError("{} is not a scalar parameter".format(name))
+        bounds = self.__p._data[name].get("validators", {}).get("range", {})
+        min_value, max_value = bounds.get("min"), bounds.get("max")
+        if not isinstance(min_value, (int, float)):
+            min_value = None
+        if not isinstance(max_value, (int, float)):
+            max_value = None
+
+        return float(value), min_value, max_value
+
+    def solve_for(
+        self,
+        param,
+        target_metric,
+        target_value,
+        aggregation="all",
+        bounds=None,
+        include_land=True,
+        include_inventories=True,
+        tol=1e-10,
+        max_iter=100,
+    ):
+        """
+        Finds the value of a parameter of the Specification at which an
+        asset-weighted overall output variable, as in summary_table(),
+        equals a target value.  For example, the CIT rate that makes the
+        overall corporate METTR equal to 20 percent is found with::
+
+            >>> calc.solve_for('CIT_rate', 'mettr_mix', 0.2,
+                               aggregation='corporate')
+
+        The asset data are aggregated and the depreciation rules merged
+        once, and each candidate value is evaluated as arrays with one
+        column per asset type and tax treatment, as in calc_batch().
+        The root is found with the Illinois variant of the regula falsi
+        method, so the output variable should be monotonic in the
+        parameter between the bounds.
+
+        Args:
+            param (string): name of a scalar parameter, e.g., 'CIT_rate'
+            target_metric (string): output variable and financing, e.g.,
+                'mettr_mix' or 'metr_e'
+            target_value (scalar): value of `target_metric` to solve for
+            aggregation (string): overall values for 'corporate',
+                'non-corporate' or 'all' entities
+            bounds (tuple): lower and upper bounds on the value of the
+                parameter.  Defaults to the range of the parameter.
+            include_inventories (bool): whether to include inventories
+                in the overall values.  Defaults to `True`.
+            include_land (bool): whether to include land in the overall
+                values.  Defaults to `True`.
+            tol (scalar): the value is found to within `tol`
+            max_iter (int): maximum number of values evaluated
+
+        Returns:
+            value (scalar): value of the parameter
+
+        Raises:
+            ValueError: if the target value is not between the values
+                of `target_metric` at the bounds, or these are not
+                finite.
+            RuntimeError: if the value is not found in `max_iter`
+                evaluations.
+
+        """
+        aggregations = ["corporate", "non-corporate", "all"]
+        if aggregation not in aggregations:
+            raise ValueError(
+                "aggregation must be one of {}".format(aggregations)
+            )
+        value, min_value, max_value = self.__scalar_param(param)
+        if bounds is None:
+            bounds = (min_value, max_value)
+        if bounds[0] is None or bounds[1] is None:
+            raise ValueError("must specify bounds for {}".format(param))
+        p = self.__p.clone()
+        rows_df = self.__batch_rows()
+        by_year = {}
+        col = aggregations.index(aggregation)
+
+        def evaluate(x):
+            p.bulk_update_specification([{param: x}])
+            c = p.compile()
+            rules, codes = self.__depr_rules([c], rows_df, by_year)
+            results = self.__calc_arrays([c], rows_df, rules, codes)
+            results = self.__aggregate_arrays(
+                [c],
+                rows_df,
+                dict(results, Y=rules["Y"]),
+                include_land,
+                include_inventories,
+            )[1]
+            if target_metric not in results:
+                raise ValueError(
+                    "{} is not an output variable".format(target_metric)
+                )
+            return results[target_metric][0, col] - target_value
+
+        a, b = float(bounds[0]), float(bounds[1])
+        fa, fb = evaluate(a), evaluate(b)
+        for x, fx in [(a, fa), (b, fb)]:
+            if not np.isfinite(fx):
+                raise ValueError(
+                    "{} is not finite for {} = {}".format(
+                        target_metric, param, x
+                    )
+                )
+        if fa == 0:
+            return a
+        if fb == 0:
+            return b
+        if np.sign(fa) == np.sign(fb):
+            raise ValueError(
+                "{} = {} is not attained for {} between {} and {}".format(
+                    target_metric, target_value, param, a, b
+                )
+            )
+        side = 0
+        for _ in range(max_iter):
+            x = (a * fb - b * fa) / (fb - fa)
+            if not min(a, b) < x < max(a, b):
+                x = (a + b) / 2
+            fx = evaluate(x)
+            if fx == 0 or abs(b - a) <= tol:
+                return x
+            if np.sign(fx) == np.sign(fb):
+                b, fb = x, fx
+                if side == -1:
+                    fa /= 2
+                side = -1
+            else:
+                a, fa = x, fx
+                if side == 1:
+                    fb /= 2
+                side = 1
+            if abs(b - a) <= tol:
+                return (a + b) / 2
+        raise RuntimeError(
+            "{} not found in {} evaluations".format(param, max_iter)
+        )
+
+    def __aggregate_arrays(
+        self, specs, df, results, include_land, include_inventories
+    ):
+        """
+        Private method.  Asset-weighted overall values of the results of
+        __calc_arrays() for corporate, non-corporate and all entities,
+        computed as in summary_table().
+
+        Args:
+            specs (list): CCC CompiledSpecification objects
+            df (Pandas DataFrame): assets by type and tax treatment
+            results (dict): arrays with one row per Specification and
+                one column per row of `df`
+            include_land (bool): whether to include land
+            include_inventories (bool): whether to include inventories
+
+        Returns:
+            tuple: (agg_df, agg_results) with the values of `tax_treat`
+                and the arrays of overall values for each
+
+        """
+        mask = self.__include_mask(df, include_land, include_inventories)
+        df = df[mask]
+        num_specs = len(specs)
+        long_df = df[["tax_treat", "delta", "assets"]].iloc[
+            np.tile(np.arange(len(df.index)), num_specs)
+        ]
+        long_df = long_df.reset_index(drop=True)
+        long_df["spec"] = np.repeat(np.arange(num_specs), len(df.index))
+        for name in AGG_VAR_LIST:
+            if name in results:
+                long_df[name] = results[name][:, mask].ravel()
+        with np.errstate(all="ignore"):
+            treat_df, all_df = wavg_rollup(
+                group_sums(
+                    long_df, ["spec", "tax_treat"], AGG_VAR_LIST, "assets"
+                ),
+                [["spec", "tax_treat"], ["spec"]],
+                AGG_VAR_LIST,
+                "assets",
+            )
+        tax_treats = ["corporate", "non-corporate"]
+        if list(treat_df["tax_treat"]) != tax_treats * num_specs:
+            raise ValueError("assets must include both tax treatments")
+        agg_df = pd.DataFrame({"tax_treat": tax_treats + ["all"]})
+        # overall values use the corporate parameters, see summary_table()
+        is_c = np.array([True, False, True])
+
+        def agg(name):
+            return np.hstack(
+                [
+                    treat_df[name].to_numpy().reshape(num_specs, 2),
+                    all_df[name].to_numpy().reshape(num_specs, 1),
+                ]
+            )
+
+        delta = agg("delta")
+        agg_results = {}
+        for f in specs[0].financing_list:
+            rho = agg("rho_" + str(f))
+            agg_results["z_" + str(f)] = agg("z_" + str(f))
+            agg_results["rho_" + str(f)] = rho
+            agg_results.update(
+                self.__calc_other_arrays(specs, is_c, delta, rho, f)
+            )
+
+        return agg_df, agg_results
+
+    def calc_monte_carlo(
+        self,
+        distributions,
+        num_draws,
+        by=None,
+        variables=None,
+        quantiles=(0.05, 0.5, 0.95),
+        include_land=True,
+        include_inventories=True,
+        chunk_size=1000,
+        num_bins=1000,
+        seed=None,
+    ):
+        """
+        Propagates uncertainty about economic assumptions, such as the
+        inflation rate, the nominal interest rate, debt shares or the
+        shares of assets held in each type of account, to the output
+        variables by Monte Carlo simulation.  The parameters in
+        `distributions` are drawn `num_draws` times and the draws are
+        evaluated `chunk_size` at a time, with the Specification holding
+        arrays of values, so that the discount rates and after-tax
+        returns to savers are derived for all draws in a chunk at once
+        and the output variables are evaluated as arrays with one row
+        per draw, as in calc_batch().  Only summary statistics are kept
+        from each chunk, see utils.StreamingStats, so memory use does
+        not grow with `num_draws`.
+
+        Each parameter is drawn independently, from one of:
+
+        * a tuple of the name and arguments of a method of
+          `numpy.random.Generator`, e.g., ``('normal', 0.024, 0.005)``
+        * a function of a `numpy.random.Generator` and the number of
+          draws that returns that many values
+        * an array of `num_draws` values
+
+        Drawn values are not checked against the ranges of the
+        parameters.
+
+        Args:
+            distributions (dict): distribution of each scalar parameter
+                drawn, keyed by parameter name
+            num_draws (int): number of draws
+            by (list): names of asset data variables to aggregate the
+                output variables by as asset-weighted averages, e.g.,
+                ['major_industry', 'tax_treat'].  Groups of both tax
+                treatments use the corporate parameters, as in
+                summary_table().  Defaults to `None`, for each asset
+                type and tax treatment.
+            variables (list): output variables to summarize, e.g.,
+                ['metr_mix', 'mettr_mix'].  Defaults to all.
+            quantiles (list): quantiles to compute, between 0 and 1
+            include_inventories (bool): whether to include inventories.
+                Defaults to `True`.
+            include_land (bool): whether to include land.  Defaults to
+                `True`.
+            chunk_size (int): number of draws evaluated at once
+            num_bins (int): even number of histogram bins used to
+                compute the quantiles of each output variable
+            seed (int): seed for the random number generator
+
+        Returns:
+            df (Pandas DataFrame): one row for each group, or asset type
+                and tax treatment, and output variable, named in the
+                `variable` column, with the number of finite values and
+                their mean, standard deviation, minimum, maximum and
+                quantiles, e.g., `p5` for the 0.05 quantile
+
+        """
+        rng = np.random.default_rng(seed)
+        draws = {}
+        for name, dist in distributions.items():
+            self.__scalar_param(name)
+            if name.startswith("BonusDeprec"):
+                raise ValueError(
+                    "{} cannot be drawn, depreciation rules are fixed".format(
+                        name
+                    )
+                )
+            draws[name] = self.__draw(name, dist, num_draws, rng)
+        p = self.__p.clone()
+        rows_df, data_df, row = self.__batch_rows(data_rows=True)
+        rules, codes = self.__depr_rules([p.compile()], rows_df)
+        delta = rows_df["delta"].to_numpy(dtype=float)[np.newaxis, :]
+        if by is None:
+            mask = self.__include_mask(
+                rows_df, include_land, include_inventories
+            )
+            groups_df = rows_df[mask].reset_index(drop=True)
+        else:
+            mask = self.__include_mask(
+                data_df, include_land, include_inventories
+            )
+            groups_df, weights, counts = self.__group_weights(
+                data_df[mask], row[mask], len(rows_df.index), list(by)
+            )
+            if "tax_treat" in by:
+                is_c = (groups_df["tax_treat"] == "corporate").to_numpy()
+            else:
+                is_c = np.ones(len(groups_df.index), dtype=bool)
+        num_groups = len(groups_df.index)
+        stats = None
+        for start in range(0, num_draws, chunk_size):
+            for name, values in draws.items():
+                setattr(p, name, values[start : start + chunk_size])
+            p.compute_default_params()
+            c = p.compile()
+            n = min(chunk_size, num_draws - start)
+            results = self.__calc_arrays([c], rows_df, rules, codes)
+            if by is None:
+                results = {
+                    name: array[:, mask] for name, array in results.items()
+                }
+            else:
+                results = self.__aggregate_draws(
+                    c, results, weights, counts, is_c, delta
+                )
+            if variables is None:
+                variables = list(results)
+            for name in variables:
+                if name not in results:
+                    raise ValueError(
+                        "{} is not an output variable".format(name)
+                    )
+            values = np.stack(
+                [
+                    np.broadcast_to(results[name], (n, num_groups))
+                    for name in variables
+                ],
+                axis=2,
+            )
+            if stats is None:
+                stats = StreamingStats(num_groups * len(variables), num_bins)
+            stats.update(values.reshape(n, -1))
+        df = groups_df.iloc[np.repeat(np.arange(num_groups), len(variables))]
+        df = df.reset_index(drop=True)
+        df["variable"] = np.tile(variables, num_groups)
+        df["count"] = stats.count.astype(int)
+        df["mean"] = stats.mean
+        df["std"] = stats.std()
+        df["min"] = stats.min
+        df["max"] = stats.max
+        for q in quantiles:
+            df["p{:g}".format(100 * q)] = stats.quantile(q)
+
+        return df
+
+    @staticmethod
+    def __draw(name, dist, num_draws, rng):
+        """
+        Private method.  Draws `num_draws` values of parameter `name`
+        from `dist`, see calc_monte_carlo().
+
+        """
+        if callable(dist):
+            values = dist(rng, num_draws)
+        elif isinstance(dist, tuple):
+            values = getattr(rng, dist[0])(*dist[1:], size=num_draws)
+        else:
+            values = dist
+        values = np.asarray(values, dtype=float)
+        if values.shape != (num_draws,):
+            raise ValueError(
+                "distribution of {} must give {} values".format(
+                    name, num_draws
+                )
+            )
+
+        return values
+
+    @staticmethod
+    def __group_weights(df, row, num_rows, by):
+        """
+        Private method.  Finds the groups of the asset data `df` in
+        `df.groupby(by)` and the total assets and number of rows of
+        each group for each asset type and tax treatment.
+
+        Args:
+            df (Pandas DataFrame): asset data
+            row (Numpy array): asset type and tax treatment of each row
+                of `df`, from __batch_rows()
+            num_rows (int): number of asset types and tax treatments
+            by (list): names of variables to group by
+
+        Returns:
+            tuple: (groups_df, weights, counts) with the group keys and
+                total assets, and arrays of the total assets and of the
+                number of rows with one row per group and one column per
+                asset type and tax treatment
+
+        """
+        if len(by) > 0:
+            grouped = df.groupby(by, sort=True, dropna=False, observed=True)
+            groups_df = uncategorize(grouped["assets"].sum().reset_index())
+            group = grouped.ngroup().to_numpy()
+        else:
+            groups_df = pd.DataFrame({"assets": [df["assets"].sum()]})
+            group = np.zeros(len(df.index), dtype=int)
+        cell = group * num_rows + row
+        size = len(groups_df.index) * num_rows
+        weights = np.bincount(
+            cell,
+            weights=np.nan_to_num(df["assets"].to_numpy(dtype=float)),
+            minlength=size,
+        ).reshape(-1, num_rows)
+        counts = np.bincount(cell, minlength=size).reshape(-1, num_rows)
+
+        return groups_df, weights, counts
+
+    def __aggregate_draws(self, p, results, weights, counts, is_c, delta):
+        """
+        Private method.  Asset-weighted averages of z, rho and delta by
+        group for each draw, as in wavg(), with the variables from
+        calc_other() computed from these.
+
+        Args:
+            p (CCC CompiledSpecification object): with arrays of drawn
+                values
+            results (dict): arrays with one row per draw and one column
+                per asset type and tax treatment, from __calc_arrays()
+            weights (Numpy array): total assets of each group, by asset
+                type and tax treatment
+            counts (Numpy array): number of rows of the asset data of
+                each group, by asset type and tax treatment
+            is_c (Numpy array): whether each group is corporate
+            delta (Numpy array): rate of economic depreciation of each
+                asset type and tax treatment
+
+        Returns:
+            agg_results (dict): arrays with one row per draw and one
+                column per group
+
+        """
+        w_sum = weights.sum(axis=1)
+
+        def agg(x):
+            notna = ~np.isnan(x)
+            x = np.where(notna, x, 0.0)
+            with np.errstate(all="ignore"):
+                avg = (x @ weights.T) / w_sum
+                mean = (x @ counts.T) / (notna @ counts.T)
+            return np.where(w_sum == 0, mean, avg)
+
+        agg_delta = agg(delta)
+        agg_results = {}
+        for f in p.financing_list:
+            rho = agg(results["rho_" + str(f)])
+            agg_results["z_" + str(f)] = agg(results["z_" + str(f)])
+            agg_results["rho_" + str(f)] = rho
+            agg_results.update(
+                self.__calc_other_arrays([p], is_c, agg_delta, rho, f)
+            )
+
+        return agg_results
 
     def calc_by_asset(self, include_inventories=True, include_land=True):
         """
@@ -242,66 +1242,44 @@ class Calculator:
                 groupings with columns for all output variables
 
         """
-        self.calc_base()
-        asset_df = pd.DataFrame(
-            self.__assets.df.groupby(
-                [
-                    "major_asset_group",
-                    "minor_asset_group",
-                    "bea_asset_code",
-                    "asset_name",
-                    "tax_treat",
-                ]
-            ).apply(self.__f, include_groups=False)
-        ).reset_index()
-        asset_df = self.calc_other(asset_df)
-        # Find values across minor asset groups
-        minor_asset_df = pd.DataFrame(
-            self.__assets.df.groupby(
-                ["minor_asset_group", "major_asset_group", "tax_treat"]
-            ).apply(self.__f, include_groups=False)
-        ).reset_index()
-        minor_asset_df["asset_name"] = minor_asset_df["minor_asset_group"]
-        minor_asset_df = self.calc_other(minor_asset_df)
-        # Find values across major asset_groups
-        major_asset_df = pd.DataFrame(
-            self.__assets.df.groupby(["major_asset_group", "tax_treat"]).apply(
-                self.__f, include_groups=False
-            )
-        ).reset_index()
-        major_asset_df["minor_asset_group"] = major_asset_df[
-            "major_asset_group"
+        df = self.__cached_result(
+            "calc_by_asset",
+            include_land,
+            include_inventories,
+            self.__calc_by_asset,
+        )
+
+        return df.copy()
+
+    def __calc_by_asset(self, include_inventories, include_land):
+        """
+        Private method.  Computes the results returned by
+        calc_by_asset().
+
+        """
+        asset_keys = [
+            "major_asset_group",
+            "minor_asset_group",
+            "bea_asset_code",
+            "asset_name",
+            "tax_treat",
         ]
-        major_asset_df["asset_name"] = major_asset_df["major_asset_group"]
-        major_asset_df = self.calc_other(major_asset_df)
+        sums_df = self.__base_sums(asset_keys)
+        asset_df, minor_asset_df, major_asset_df = self.__rollup(
+            sums_df,
+            asset_keys,
+            ["minor_asset_group", "major_asset_group", "tax_treat"],
+            ["major_asset_group", "tax_treat"],
+        )
         # Drop land and inventories if conditions met
-        df1 = self.__assets.df
         if not include_land:
-            df1.drop(df1[df1.asset_name == "Land"].index, inplace=True)
+            sums_df = sums_df[sums_df.asset_name != "Land"]
         if not include_inventories:
-            df1.drop(df1[df1.asset_name == "Inventories"].index, inplace=True)
-        overall_df = pd.DataFrame(
-            df1.groupby(["tax_treat"]).apply(self.__f, include_groups=False)
-        ).reset_index()
-        overall_df["major_asset_group"] = "Overall"
-        overall_df["minor_asset_group"] = "Overall"
-        overall_df["asset_name"] = "Overall"
-        overall_df = self.calc_other(overall_df)
-        df = pd.concat(
+            sums_df = sums_df[sums_df.asset_name != "Inventories"]
+        overall_df = self.__rollup(sums_df, ["tax_treat"])
+        df = self.__grouping_sets(
             [asset_df, minor_asset_df, major_asset_df, overall_df],
-            ignore_index=True,
-            sort=True,
-        ).reset_index()
-        # Drop duplicate rows in case, e.g., only one asset in major
-        # or minor asset group
-        df.drop_duplicates(
-            subset=[
-                "asset_name",
-                "minor_asset_group",
-                "major_asset_group",
-                "tax_treat",
-            ],
-            inplace=True,
+            ["asset_name", "minor_asset_group", "major_asset_group"],
         )
 
         return df
@@ -322,41 +1300,35 @@ class Calculator:
                 industry groupings with columns for all output variables
 
         """
-        self.calc_base()
-        df1 = self.__assets.df
-        if not include_land:
-            df1.drop(df1[df1.asset_name == "Land"].index, inplace=True)
-        if not include_inventories:
-            df1.drop(df1[df1.asset_name == "Inventories"].index, inplace=True)
-        ind_df = pd.DataFrame(
-            df1.groupby(
-                ["major_industry", "bea_ind_code", "Industry", "tax_treat"]
-            ).apply(self.__f, include_groups=False)
-        ).reset_index()
-        ind_df = self.calc_other(ind_df)
-        major_ind_df = pd.DataFrame(
-            df1.groupby(["major_industry", "tax_treat"]).apply(
-                self.__f, include_groups=False
-            )
-        ).reset_index()
-        major_ind_df["Industry"] = major_ind_df["major_industry"]
-        major_ind_df = self.calc_other(major_ind_df)
-        # Can put some if statements here if want to exclude land/inventory/etc
-        overall_df = pd.DataFrame(
-            df1.groupby(["tax_treat"]).apply(self.__f, include_groups=False)
-        ).reset_index()
-        overall_df["major_industry"] = "Overall"
-        overall_df["Industry"] = "Overall"
-        overall_df = self.calc_other(overall_df)
-        df = pd.concat(
+        df = self.__cached_result(
+            "calc_by_industry",
+            include_land,
+            include_inventories,
+            self.__calc_by_industry,
+        )
+
+        return df.copy()
+
+    def __calc_by_industry(self, include_inventories, include_land):
+        """
+        Private method.  Computes the results returned by
+        calc_by_industry().
+
+        """
+        ind_keys = ["major_industry", "bea_ind_code", "Industry", "tax_treat"]
+        ind_df, major_ind_df, overall_df = self.__rollup(
+            self.__base_sums(
+                ind_keys,
+                include_land=include_land,
+                include_inventories=include_inventories,
+            ),
+            ind_keys,
+            ["major_industry", "tax_treat"],
+            ["tax_treat"],
+        )
+        df = self.__grouping_sets(
             [ind_df, major_ind_df, overall_df],
-            ignore_index=True,
-            sort=True,
-        ).reset_index()
-        # Drop duplicate rows in case, e.g., only one industry in major
-        # industry group
-        df.drop_duplicates(
-            subset=["Industry", "major_industry", "tax_treat"], inplace=True
+            ["Industry", "major_industry"],
         )
 
         return df
@@ -397,31 +1369,20 @@ class Calculator:
         """
         assert output_variable in OUTPUT_VAR_LIST
         assert output_type in OUTPUT_DATA_FORMATS
-        self.calc_base()
-        calc.calc_base()
-        base_df = self.__assets.df
-        reform_df = calc.__assets.df
-        dfs = [base_df, reform_df]
         dfs_out = []
-        for df in dfs:
-            if not include_land:
-                df.drop(df[df.asset_name == "Land"].index, inplace=True)
-            if not include_inventories:
-                df.drop(df[df.asset_name == "Inventories"].index, inplace=True)
+        for c in [self, calc]:
             # Compute overall separately by tax treatment
-            treat_df = pd.DataFrame(
-                df.groupby(["tax_treat"]).apply(self.__f, include_groups=False)
-            ).reset_index()
+            treat_df, all_df = self.__rollup(
+                c.__base_sums(
+                    ["tax_treat"],
+                    include_land=include_land,
+                    include_inventories=include_inventories,
+                ),
+                ["tax_treat"],
+                [],
+            )
             treat_df = self.calc_other(treat_df)
             # Compute overall values, across corp and non-corp
-            # just making up a column with same value in all rows so can
-            # continute to use groupby
-            df["include"] = 1
-            all_df = pd.DataFrame.from_dict(
-                df.groupby(["include"])
-                .apply(self.__f, include_groups=False)
-                .to_dict()
-            )
             # set tax_treat to corporate b/c only corp and non-corp
             # recognized in calc_other()
             all_df["tax_treat"] = "corporate"
@@ -556,13 +1517,12 @@ class Calculator:
 
         """
         assert output_type in OUTPUT_DATA_FORMATS
-        df = self.__assets.df.copy()
-        if not include_land:
-            df.drop(df[df.asset_name == "Land"].index, inplace=True)
-        if not include_inventories:
-            df.drop(df[df.asset_name == "Inventories"].index, inplace=True)
+        df = self.__assets.df
+        df = df[self.__include_mask(df, include_land, include_inventories)]
         df1 = pd.DataFrame(
-            df.groupby(["tax_treat", "major_industry"])["assets"].sum()
+            df.groupby(["tax_treat", "major_industry"], observed=True)[
+                "assets"
+            ].sum()
         ).reset_index()
         df2 = df1.pivot(
             index="major_industry", columns="tax_treat", values="assets"
@@ -638,40 +1598,25 @@ class Calculator:
         assert financing in self.__p.financing_list
         assert output_variable in OUTPUT_VAR_LIST
         assert output_type in OUTPUT_DATA_FORMATS
-        self.calc_base()
-        calc.calc_base()
-        base_df = self.__assets.df
-        reform_df = calc.__assets.df
-        dfs = [base_df, reform_df]
         dfs_out = []
-        for df in dfs:
-            if not include_land:
-                df.drop(df[df.asset_name == "Land"].index, inplace=True)
-            if not include_inventories:
-                df.drop(df[df.asset_name == "Inventories"].index, inplace=True)
+        for c in [self, calc]:
             # Make dataframe with just results for major asset categories
-            major_asset_df = pd.DataFrame(
-                df.groupby(["major_asset_group", "tax_treat"]).apply(
-                    self.__f, include_groups=False
-                )
-            ).reset_index()
+            major_asset_df, treat_df, all_df = self.__rollup(
+                c.__base_sums(
+                    ["major_asset_group", "tax_treat"],
+                    include_land=include_land,
+                    include_inventories=include_inventories,
+                ),
+                ["major_asset_group", "tax_treat"],
+                ["tax_treat"],
+                [],
+            )
             major_asset_df["asset_name"] = major_asset_df["major_asset_group"]
             major_asset_df = self.calc_other(major_asset_df)
             # Compute overall separately by tax treatment
-            treat_df = pd.DataFrame(
-                df.groupby(["tax_treat"]).apply(self.__f, include_groups=False)
-            ).reset_index()
             treat_df = self.calc_other(treat_df)
             treat_df["major_asset_group"] = "Overall"
             # Compute overall values, across corp and non-corp
-            # just making up a column with same value in all rows so can
-            # continute to use groupby
-            df["include"] = 1
-            all_df = pd.DataFrame.from_dict(
-                df.groupby(["include"])
-                .apply(self.__f, include_groups=False)
-                .to_dict()
-            )
             # set tax_treat to corporate b/c only corp and non-corp
             # recognized in calc_other()
             all_df["tax_treat"] = "corporate"
@@ -840,40 +1785,25 @@ class Calculator:
         assert financing in self.__p.financing_list
         assert output_variable in OUTPUT_VAR_LIST
         assert output_type in OUTPUT_DATA_FORMATS
-        self.calc_base()
-        calc.calc_base()
-        base_df = self.__assets.df
-        reform_df = calc.__assets.df
-        dfs = [base_df, reform_df]
         dfs_out = []
-        for df in dfs:
-            if not include_land:
-                df.drop(df[df.asset_name == "Land"].index, inplace=True)
-            if not include_inventories:
-                df.drop(df[df.asset_name == "Inventories"].index, inplace=True)
+        for c in [self, calc]:
             # Make dataframe with just results for major industry
-            major_ind_df = pd.DataFrame(
-                df.groupby(["major_industry", "tax_treat"]).apply(
-                    self.__f, include_groups=False
-                )
-            ).reset_index()
+            major_ind_df, treat_df, all_df = self.__rollup(
+                c.__base_sums(
+                    ["major_industry", "tax_treat"],
+                    include_land=include_land,
+                    include_inventories=include_inventories,
+                ),
+                ["major_industry", "tax_treat"],
+                ["tax_treat"],
+                [],
+            )
             major_ind_df["Industry"] = major_ind_df["major_industry"]
             major_ind_df = self.calc_other(major_ind_df)
             # Compute overall separately by tax treatment
-            treat_df = pd.DataFrame(
-                df.groupby(["tax_treat"]).apply(self.__f, include_groups=False)
-            ).reset_index()
             treat_df = self.calc_other(treat_df)
             treat_df["major_industry"] = "Overall"
             # Compute overall values, across corp and non-corp
-            # just making up a column with same value in all rows so can
-            # continute to use groupby
-            df["include"] = 1
-            all_df = pd.DataFrame.from_dict(
-                df.groupby(["include"])
-                .apply(self.__f, include_groups=False)
-                .to_dict()
-            )
             # set tax_treat to corporate b/c only corp and non-corp
             # recognized in calc_other()
             all_df["tax_treat"] = "corporate"
@@ -1025,146 +1955,32 @@ class Calculator:
                 Defaults to `True`.
             corporate (bool): whether to use data for corporate entities.
                 If `False`, then uses data for pass-through entities.
-                Defaults to `True`.
-            include_inventories (bool): whether to include inventories
-                in calculations.  Defaults to `True`.
-            include_land (bool): whether to include land in
-                calculations.  Defaults to `True`.
-            include_title (bool): whether to include a title on the plot
-
-        Returns:
-            p (Bokeh plot object): bar plot
-
-        """
-        assert financing in self.__p.financing_list
-        assert output_variable in OUTPUT_VAR_LIST
-        if group_by_asset:
-            base_df = self.calc_by_asset(
-                include_land=include_land,
-                include_inventories=include_inventories,
-            )
-            reform_df = calc.calc_by_asset(
-                include_land=include_land,
-                include_inventories=include_inventories,
-            )
-            base_df.drop(
-                base_df[base_df.asset_name != base_df.major_asset_group].index,
-                inplace=True,
-            )
-            reform_df.drop(
-                reform_df[
-                    reform_df.asset_name != reform_df.major_asset_group
-                ].index,
-                inplace=True,
-            )
-            plot_label = "major_asset_group"
-            plot_title = VAR_DICT[output_variable] + " by Asset Category"
-        else:
-            base_df = self.calc_by_industry(
-                include_land=include_land,
-                include_inventories=include_inventories,
-            )
-            reform_df = calc.calc_by_industry(
-                include_land=include_land,
-                include_inventories=include_inventories,
-            )
-            base_df.drop(
-                base_df[base_df.Industry != base_df.major_industry].index,
-                inplace=True,
-            )
-            reform_df.drop(
-                reform_df[
-                    reform_df.Industry != reform_df.major_industry
-                ].index,
-                inplace=True,
-            )
-            plot_label = "major_industry"
-            plot_title = VAR_DICT[output_variable] + " by Industry"
-        # Append dfs together so base policies in one
-        base_df["policy"] = "Baseline"
-        reform_df["policy"] = "Reform"
-        df = pd.concat([base_df, reform_df])
-        # Drop corporate or non-corporate per arguments
-        if corporate:
-            df.drop(df[df.tax_treat == "non-corporate"].index, inplace=True)
-            plot_title = plot_title + " for Corporate Investments"
-        else:
-            df.drop(df[df.tax_treat == "corporate"].index, inplace=True)
-            plot_title = plot_title + " for Pass-Through Investments"
-        # Get mean overall for baseline and reform
-        mean_base = df[
-            (df[plot_label] == "Overall") & (df.policy == "Baseline")
-        ][output_variable + "_" + financing].values[0]
-        mean_reform = df[
-            (df[plot_label] == "Overall") & (df.policy == "Reform")
-        ][output_variable + "_" + financing].values[0]
-        # Drop overall means from df
-        df.drop(df[df[plot_label] == "Overall"].index, inplace=True)
-        # Drop extra vars and make wide format
-        df1 = df[[plot_label, output_variable + "_mix", "policy"]]
-        df2 = df1.pivot(
-            index=plot_label,
-            columns="policy",
-            values=output_variable + "_" + financing,
-        )
-        df2.reset_index(inplace=True)
-        # Create grouped barplot
-        source = ColumnDataSource(data=df2)
-
-        if not include_title:
-            plot_title = None
-        p = figure(
-            x_range=df2[plot_label],
-            height=350,
-            title=plot_title,
-            toolbar_location=None,
-            tools="",
-        )
-        p.vbar(
-            x=dodge(plot_label, 0.0, range=p.x_range),
-            top="Baseline",
-            width=0.2,
-            source=source,
-            color=BLUE,
-            legend_label="Baseline",
-        )
-        p.vbar(
-            x=dodge(plot_label, 0.25, range=p.x_range),
-            top="Reform",
-            width=0.2,
-            source=source,
-            color=RED,
-            legend_label="Reform",
-        )
-        p.x_range.range_padding = 0.1
-        p.xgrid.grid_line_color = None
-        p.legend.location = "top_left"
-        p.legend.orientation = "horizontal"
-        if not group_by_asset:
-            p.xaxis.major_label_orientation = 45
-            p.height = 800
-            p.width = 800
-
-        # Add lines for overall mean for baseline and reform
-        bline = Span(
-            location=mean_base,
-            dimension="width",
-            line_color=BLUE,
-            line_alpha=0.2,
-            line_width=2,
-            line_dash="dashed",
-        )
-        rline = Span(
-            location=mean_reform,
-            dimension="width",
-            line_color=RED,
-            line_alpha=0.2,
-            line_width=2,
-            line_dash="dashed",
-        )
-        p.renderers.extend([bline, rline])
+                Defaults to `True`.
+            include_inventories (bool): whether to include inventories
+                in calculations.  Defaults to `True`.
+            include_land (bool): whether to include land in
+                calculations.  Defaults to `True`.
+            include_title (bool): whether to include a title on the plot
+
+        Returns:
+            p (Bokeh plot object): bar plot
 
-        return p
+        """
+        # imported here so that importing the calculator does not
+        # import Bokeh
+        from ccc import plots
+
+        return plots.grouped_bar(
+            self,
+            calc,
+            output_variable=output_variable,
+            financing=financing,
+            group_by_asset=group_by_asset,
+            corporate=corporate,
+            include_land=include_land,
+            include_inventories=include_inventories,
+            include_title=include_title,
+        )
 
     def range_plot(
         self,
@@ -1197,258 +2013,17 @@ class Calculator:
             p (Bokeh plot object): bar plot
 
         """
-        assert output_variable in OUTPUT_VAR_LIST
-        base_df = self.calc_by_asset(
-            include_land=include_land, include_inventories=include_inventories
-        )
-        reform_df = calc.calc_by_asset(
-            include_land=include_land, include_inventories=include_inventories
-        )
-        base_df.drop(
-            base_df[
-                (base_df.asset_name != base_df.major_asset_group)
-                & (base_df.asset_name != "Overall")
-                & (base_df.asset_name != "Land")
-                & (base_df.asset_name != "Inventories")
-            ].index,
-            inplace=True,
-        )
-        reform_df.drop(
-            reform_df[
-                (reform_df.asset_name != reform_df.major_asset_group)
-                & (reform_df.asset_name != "Overall")
-                & (reform_df.asset_name != "Land")
-                & (reform_df.asset_name != "Inventories")
-            ].index,
-            inplace=True,
-        )
-        # Append dfs together so base policies in one
-        base_df["policy"] = "Baseline"
-        reform_df["policy"] = "Reform"
-        # Drop corporate or non-corporate per arguments
-        if corporate:
-            base_df.drop(
-                base_df[base_df.tax_treat == "non-corporate"].index,
-                inplace=True,
-            )
-            reform_df.drop(
-                reform_df[reform_df.tax_treat == "non-corporate"].index,
-                inplace=True,
-            )
-            plot_subtitle = "Corporate Investments"
-        else:
-            base_df.drop(
-                base_df[base_df.tax_treat == "corporate"].index, inplace=True
-            )
-            reform_df.drop(
-                reform_df[reform_df.tax_treat == "corporate"].index,
-                inplace=True,
-            )
-            plot_subtitle = "Pass-Through Investments"
-        dfs = [base_df, reform_df]
-        policy_list = ["baseline", "reform"]
-        # Create dictionary for source data
-        source_dict = {
-            "baseline": {
-                "mins": [],
-                "maxes": [],
-                "means": [],
-                "min_asset": [],
-                "max_asset": [],
-                "mean_asset": [],
-                "types": [
-                    "Typically Financed",
-                    "Debt Financed",
-                    "Equity Financed",
-                ],
-                "positions": [-0.1, 0.9, 1.9],
-            },
-            "reform": {
-                "mins": [],
-                "maxes": [],
-                "means": [],
-                "min_asset": [],
-                "max_asset": [],
-                "mean_asset": [],
-                "types": [
-                    "Typically Financed",
-                    "Debt Financed",
-                    "Equity Financed",
-                ],
-                "positions": [0.1, 1.1, 2.1],
-            },
-        }
-        for i, df in enumerate(dfs):
-            for fin in ("_mix", "_d", "_e"):
-                max_index = df[output_variable + fin].idxmax()
-                min_index = df[output_variable + fin].idxmin()
-                maxval = df.loc[max_index][output_variable + fin]
-                minval = df.loc[min_index][output_variable + fin]
-                minasset = df.loc[min_index]["asset_name"]
-                maxasset = df.loc[max_index]["asset_name"]
-                meanval = df[df.asset_name == "Overall"][
-                    output_variable + fin
-                ].values[0]
-                meanasset = "Overall"
-
-                # put values in dictionary
-                source_dict[policy_list[i]]["mins"].append(minval)
-                source_dict[policy_list[i]]["maxes"].append(maxval)
-                source_dict[policy_list[i]]["means"].append(meanval)
-                source_dict[policy_list[i]]["min_asset"].append(minasset)
-                source_dict[policy_list[i]]["max_asset"].append(maxasset)
-                source_dict[policy_list[i]]["mean_asset"].append(meanasset)
-
-        base_source = ColumnDataSource(data=source_dict["baseline"])
-        reform_source = ColumnDataSource(data=source_dict["reform"])
-
-        # Create figure on which to plot
-        p = figure(
-            width=500,
-            height=500,
-            x_range=(-0.5, 2.5),
-            toolbar_location=None,
-            tools="",
-        )
-
-        # Format graph title and features
-        # Add title
-        if include_title:
-            p.add_layout(
-                Title(text=plot_subtitle, text_font_style="italic"), "above"
-            )
-            p.add_layout(
-                Title(text=VAR_DICT[output_variable], text_font_size="16pt"),
-                "above",
-            )
-        # p.title.text = plot_title
-        # p.title.align = 'center'
-        # p.title.text_font_size = '16pt'
-        p.title.text_font = "Helvetica"
-        p.xgrid.grid_line_color = None
-        p.ygrid.grid_line_color = None
-
-        # Format axis labels
-        p.xaxis.axis_label = "Method of Financing"
-        p.xaxis[0].ticker = FixedTicker(ticks=[0, 1, 2])
-        # Done as a custom function instead of a categorical axis because
-        # categorical axes do not work well with other features
-        p.xaxis.formatter = CustomJSTickFormatter(code="""
-        var types = ["Typically Financed", "Debt Financed", "Equity Financed"]
-        return types[tick]
-        """)
-        p.yaxis.axis_label = VAR_DICT[output_variable]
-        p.yaxis[0].formatter = NumeralTickFormatter(format="0%")
-
-        # Line separating positive and negative values
-        zline = Span(
-            location=0,
-            dimension="width",
-            line_alpha=0.2,
-            line_width=2,
-            line_dash="dashed",
-        )
-        p.renderers.extend([zline])
-
-        # Color different regions
-        standard_region = BoxAnnotation(
-            right=0.5, fill_alpha=0.2, fill_color="white"
-        )
-        debt_region = BoxAnnotation(
-            left=0.5, right=1.5, fill_alpha=0.1, fill_color="white"
-        )
-        equity_region = BoxAnnotation(
-            left=1.5, fill_alpha=0.2, fill_color="white"
-        )
-
-        p.add_layout(standard_region)
-        p.add_layout(debt_region)
-        p.add_layout(equity_region)
-
-        # Draw baseline ranges onto graph
-        p.segment(
-            "positions",
-            "mins",
-            "positions",
-            "maxes",
-            color=BLUE,
-            line_width=2,
-            source=base_source,
-        )
-        # Add circles for means
-        p.scatter(
-            "positions",
-            "means",
-            size=12,
-            color=BLUE,
-            source=base_source,
-            legend_label="Baseline",
-        )
-        # Add circles for maxes and mins
-        p.scatter(
-            "positions",
-            "mins",
-            size=12,
-            color=BLUE,
-            source=base_source,
-            legend_label="Baseline",
-        )
-        p.scatter(
-            "positions",
-            "maxes",
-            size=12,
-            color=BLUE,
-            source=base_source,
-            legend_label="Baseline",
-        )
+        from ccc import plots
 
-        # Draw reformed ranges onto graph
-        p.segment(
-            "positions",
-            "mins",
-            "positions",
-            "maxes",
-            color=RED,
-            line_width=2,
-            source=reform_source,
-        )
-        # Add circles for means
-        p.scatter(
-            "positions",
-            "means",
-            size=12,
-            color=RED,
-            source=reform_source,
-            legend_label="Reform",
-        )
-        # Add circles for maxes and mins
-        p.scatter(
-            "positions",
-            "mins",
-            size=12,
-            color=RED,
-            source=reform_source,
-            legend_label="Reform",
+        return plots.range_plot(
+            self,
+            calc,
+            output_variable=output_variable,
+            corporate=corporate,
+            include_land=include_land,
+            include_inventories=include_inventories,
+            include_title=include_title,
         )
-        p.scatter(
-            "positions",
-            "maxes",
-            size=12,
-            color=RED,
-            source=reform_source,
-            legend_label="Reform",
-        )
-
-        # Set legend location
-        p.legend.location = "bottom_right"
-
-        # Display rate and asset type when hovering over a glyph
-        # hover = HoverTool(
-        #         tooltips=[(output_variable, "@mins"),
-        #                     ("Asset",  "@min_asset")])
-        # p.add_tools(hover)
-
-        return p
 
     def bubble_widget(
         self,
@@ -1485,416 +2060,16 @@ class Calculator:
             layout (Bokeh Layout object): widget
 
         """
-        assert output_variable in OUTPUT_VAR_LIST
-        base_df = self.calc_by_asset()
-        reform_df = calc.calc_by_asset()
-        change_df = diff_two_tables(reform_df, base_df)
-
-        list_df = [base_df, change_df, reform_df]
-        list_string = ["base", "change", "reform"]
-
-        data_sources = {}
-        for i, df_i in enumerate(list_df):
-            for t in ["c", "pt"]:
-                if t == "c":
-                    df = df_i.drop(df_i[df_i.tax_treat != "corporate"].index)
-                else:
-                    df = df_i.drop(
-                        df_i[df_i.tax_treat != "non-corporate"].index
-                    )
-                # Remove data from Intellectual Property, Land, and
-                # Inventories Categories
-                if not include_land:
-                    df.drop(df[df.asset_name == "Land"].index, inplace=True)
-                if not include_inventories:
-                    df.drop(
-                        df[df.asset_name == "Inventories"].index, inplace=True
-                    )
-                if not include_IP:
-                    df.drop(
-                        df[
-                            df.major_asset_group == "Intellectual Property"
-                        ].index,
-                        inplace=True,
-                    )
-                # define the size DataFrame, if change, use base sizes
-                if list_string[i] != "change":
-                    SIZES = list(range(20, 80, 15))
-                    size = pd.qcut(
-                        df["assets"].values, len(SIZES), labels=SIZES
-                    )
-                    df["size"] = size
-                else:
-                    df["size"] = size
-                # Form the two categories: Equipment and Structures
-                equipment_df = df.drop(
-                    df[df.major_asset_group.str.contains("Structures")].index
-                ).copy()
-                equipment_df.drop(
-                    equipment_df[
-                        equipment_df.major_asset_group.str.contains(
-                            "Buildings"
-                        )
-                    ].index,
-                    inplace=True,
-                )
-                # Drop overall category and overall equipment
-                equipment_df.drop(
-                    equipment_df[equipment_df.asset_name == "Overall"].index,
-                    inplace=True,
-                )
-                equipment_df.drop(
-                    equipment_df[equipment_df.asset_name == "Equipment"].index,
-                    inplace=True,
-                )
-                structure_df = df.drop(
-                    df[
-                        ~df.major_asset_group.str.contains(
-                            "Structures|Buildings"
-                        )
-                    ].index
-                ).copy()
-                # Drop value for all structures
-                structure_df.drop(
-                    structure_df[
-                        structure_df.asset_name == "Structures"
-                    ].index,
-                    inplace=True,
-                )
-
-                # Output variables available in plot
-                format_fields = [
-                    "metr_mix",
-                    "metr_d",
-                    "metr_e",
-                    "mettr_mix",
-                    "mettr_d",
-                    "mettr_e",
-                    "rho_mix",
-                    "rho_d",
-                    "rho_e",
-                    "z_mix",
-                    "z_d",
-                    "z_e",
-                ]
-
-                # Make short category
-                make_short = {
-                    "Instruments and Communications Equipment": "Instruments and Communications",
-                    "Office and Residential Equipment": "Office and Residential",
-                    "Other Equipment": "Other",
-                    "Transportation Equipment": "Transportation",
-                    "Other Industrial Equipment": "Other Industrial",
-                    "Nonresidential Buildings": "Nonresidential Bldgs",
-                    "Residential Buildings": "Residential Bldgs",
-                    "Mining and Drilling Structures": "Mining and Drilling",
-                    "Other Structures": "Other",
-                    "Computers and Software": "Computers and Software",
-                    "Industrial Machinery": "Industrial Machinery",
-                }
-
-                equipment_df["short_category"] = equipment_df[
-                    "minor_asset_group"
-                ]
-                equipment_df["short_category"] = equipment_df[
-                    "short_category"
-                ].replace(
-                    make_short,
-                )
-                structure_df["short_category"] = structure_df[
-                    "minor_asset_group"
-                ]
-                structure_df["short_category"] = structure_df[
-                    "short_category"
-                ].replace(
-                    make_short,
-                )
-
-                # Add the Reform and the Baseline to Equipment Asset
-                for f in format_fields:
-                    equipment_copy = equipment_df.copy()
-                    equipment_copy["rate"] = equipment_copy[f]
-                    equipment_copy["hover"] = equipment_copy.apply(
-                        lambda x: "{0:.1f}%".format(x[f] * 100), axis=1
-                    )
-                    simple_equipment_copy = equipment_copy.filter(
-                        items=[
-                            "size",
-                            "rate",
-                            "hover",
-                            "short_category",
-                            "asset_name",
-                        ]
-                    )
-                    data_sources[
-                        list_string[i] + "_equipment_" + f + "_" + t
-                    ] = ColumnDataSource(simple_equipment_copy)
-
-                # Add the Reform and the Baseline to Structures Asset
-                for f in format_fields:
-                    structure_copy = structure_df.copy()
-                    structure_copy["rate"] = structure_copy[f]
-                    structure_copy["hover"] = structure_copy.apply(
-                        lambda x: "{0:.1f}%".format(x[f] * 100), axis=1
-                    )
-                    simple_structure_copy = structure_copy.filter(
-                        items=[
-                            "size",
-                            "rate",
-                            "hover",
-                            "short_category",
-                            "asset_name",
-                        ]
-                    )
-                    data_sources[
-                        list_string[i] + "_structure_" + f + "_" + t
-                    ] = ColumnDataSource(simple_structure_copy)
-
-                # Create initial data sources to plot on load
-                if list_string[i] == "base" and t == "c":
-                    equipment_copy = equipment_df.copy()
-                    equipment_copy["rate"] = equipment_copy["mettr_mix"]
-                    equipment_copy["hover"] = equipment_copy.apply(
-                        lambda x: "{0:.1f}%".format(x["mettr_mix"] * 100),
-                        axis=1,
-                    )
-                    simple_equipment_copy = equipment_copy.filter(
-                        items=[
-                            "size",
-                            "rate",
-                            "hover",
-                            "short_category",
-                            "asset_name",
-                        ]
-                    )
-                    data_sources["equip_source"] = ColumnDataSource(
-                        simple_equipment_copy
-                    )
-
-                    structure_copy = structure_df.copy()
-                    structure_copy["rate"] = structure_copy["mettr_mix"]
-                    structure_copy["hover"] = structure_copy.apply(
-                        lambda x: "{0:.1f}%".format(x["mettr_mix"] * 100),
-                        axis=1,
-                    )
-                    simple_structure_copy = structure_copy.filter(
-                        items=[
-                            "size",
-                            "rate",
-                            "hover",
-                            "short_category",
-                            "asset_name",
-                        ]
-                    )
-                    data_sources["struc_source"] = ColumnDataSource(
-                        simple_structure_copy
-                    )
-
-        # Define categories for Equipments assets
-        equipment_assets = [
-            "Computers and Software",
-            "Instruments and Communications",
-            "Office and Residential",
-            "Transportation",
-            "Industrial Machinery",
-            "Other Industrial",
-            "Other",
-        ]
+        from ccc import plots
 
-        # Define categories for Structures assets
-        structure_assets = [
-            "Residential Bldgs",
-            "Nonresidential Bldgs",
-            "Mining and Drilling",
-            "Other",
-        ]
-
-        # Equipment plot
-        p = figure(
-            height=540,
-            width=990,
-            y_range=list(reversed(equipment_assets)),
-            tools="hover",
-            background_fill_alpha=0,
-            title="Marginal Effective Total Tax Rates on "
-            + "Corporate Investments in Equipment",
-        )
-        p.title.align = "center"
-        p.title.text_color = "#6B6B73"
-
-        hover = p.select(dict(type=HoverTool))
-        hover.tooltips = [("Asset", " @asset_name (@hover)")]
-
-        p.xaxis.axis_label = "Marginal effective total tax rate"
-        p.xaxis[0].formatter = NumeralTickFormatter(format="0.1%")
-
-        p.toolbar_location = None
-        p.min_border_right = 5
-
-        p.outline_line_width = 5
-        p.border_fill_alpha = 0
-        p.xaxis.major_tick_line_color = "firebrick"
-        p.xaxis.major_tick_line_width = 3
-        p.xaxis.minor_tick_line_color = "orange"
-
-        p.outline_line_width = 1
-        p.outline_line_alpha = 1
-        p.outline_line_color = "black"
-
-        p.scatter(
-            x="rate",
-            y="short_category",
-            color=BLUE,
-            size="size",
-            line_color="#333333",
-            fill_alpha=0.4,
-            source=data_sources["equip_source"],
-            alpha=0.4,
-        )
-
-        # Define and add a legend
-        legend_cds = ColumnDataSource(
-            {
-                "size": SIZES,
-                "label": ["<$20B", "", "", "<$1T"],
-                "x": [0, 0.15, 0.35, 0.6],
-            }
-        )
-        p_legend = figure(
-            height=150,
-            width=380,
-            x_range=(-0.075, 75),
-            title="Asset Amount",
-            tools="",
-        )
-        # p_legend.circle(y=None, x='x', size='size', source=legend_cds,
-        #                 color=BLUE, fill_alpha=.4, alpha=.4,
-        #                 line_color="#333333")
-        # l1 = LabelSet(y=None, x='x', text='label', x_offset=-20,
-        #               y_offset=-50, source=legend_cds)
-        # p_legend.add_layout(l1)
-        p_legend.axis.visible = False
-        p_legend.grid.grid_line_color = None
-        # p_legend.toolbar.active_drag = None
-
-        # data_sources['equip_plot'] = p
-
-        # Structures plot
-        p2 = figure(
-            height=540,
-            width=990,
-            y_range=list(reversed(structure_assets)),
-            tools="hover",
-            background_fill_alpha=0,
-            title="Marginal Effective Total Tax Rates on "
-            + "Corporate Investments in Structures",
-        )
-        p2.title.align = "center"
-        p2.title.text_color = "#6B6B73"
-
-        hover = p2.select(dict(type=HoverTool))
-        hover.tooltips = [("Asset", " @asset_name (@hover)")]
-        p2.xaxis.axis_label = "Marginal effective total tax rate"
-        p2.xaxis[0].formatter = NumeralTickFormatter(format="0.1%")
-        p2.toolbar_location = None
-        p2.min_border_right = 5
-        p2.outline_line_width = 0
-        p2.border_fill_alpha = 0
-
-        p2.xaxis.major_tick_line_color = "firebrick"
-        p2.xaxis.major_tick_line_width = 3
-        p2.xaxis.minor_tick_line_color = "orange"
-
-        p2.scatter(
-            x="rate",
-            y="short_category",
-            color=RED,
-            size="size",
-            line_color="#333333",
-            fill_alpha=0.4,
-            source=data_sources["struc_source"],
-            alpha=0.4,
-        )
-
-        p2.outline_line_width = 1
-        p2.outline_line_alpha = 1
-        p2.outline_line_color = "black"
-
-        # Define and add a legend
-        p2_legend = figure(
-            height=150,
-            width=380,
-            x_range=(-0.075, 0.75),
-            title="Asset Amount",
-            tools="",
-        )
-        # p2_legend.circle(y=None, x='x', size='size', source=legend_cds,
-        #                  color=RED, fill_alpha=.4, alpha=.4,
-        #                  line_color="#333333")
-        # l2 = LabelSet(y=None, x='x', text='label', x_offset=-20,
-        #               y_offset=-50, source=legend_cds)
-        # p2_legend.add_layout(l2)
-        p2_legend.axis.visible = False
-        p2_legend.grid.grid_line_color = None
-        # p2_legend.toolbar.active_drag = None
-
-        # add buttons
-        controls_callback = CustomJS(
-            args=data_sources, code=CONTROLS_CALLBACK_SCRIPT
-        )
-        c_pt_buttons = RadioButtonGroup(
-            labels=["Corporate", "Noncorporate"], active=0
-        )
-        c_pt_buttons.js_on_change("value", controls_callback)
-        controls_callback.args["c_pt_buttons"] = c_pt_buttons
-        format_buttons = RadioButtonGroup(
-            labels=["Baseline", "Reform", "Change"], active=0
-        )
-        format_buttons.js_on_change("value", controls_callback)
-        controls_callback.args["format_buttons"] = format_buttons
-        interest_buttons = RadioButtonGroup(
-            labels=["METTR", "METR", "Cost of Capital", "NPV of Depreciation"],
-            active=0,
-            width=700,
-        )
-        interest_buttons.js_on_change("value", controls_callback)
-        controls_callback.args["interest_buttons"] = interest_buttons
-        type_buttons = RadioButtonGroup(
-            labels=["Typically Financed", "Equity Financed", "Debt Financed"],
-            active=0,
-            width=700,
+        return plots.bubble_widget(
+            self,
+            calc,
+            output_variable=output_variable,
+            include_land=include_land,
+            include_inventories=include_inventories,
+            include_IP=include_IP,
         )
-        type_buttons.js_on_change("value", controls_callback)
-        controls_callback.args["type_buttons"] = type_buttons
-
-        # Create Tabs
-        tab = TabPanel(child=column([p, p_legend]), title="Equipment")
-        tab2 = TabPanel(child=column([p2, p2_legend]), title="Structures")
-        tabs = Tabs(tabs=[tab, tab2])
-        layout = gridplot(
-            children=[
-                [tabs],
-                [c_pt_buttons, interest_buttons],
-                [format_buttons, type_buttons],
-            ]
-        )
-        # layout = gridplot([p, p2], ncols=2, width=250, height=250)
-        # doc = curdoc()
-        # doc.add_root(layout)
-
-        # Create components
-        # js, div = components(layout)
-        # cdn_js = CDN.js_files[0]
-        # cdn_css = CDN.css_files[0]
-
-        # Set up an application
-        # from bokeh.application.handlers import FunctionHandler
-        # from bokeh.application import Application
-        # # handler = FunctionHandler(doc)
-        # # app = Application(handler)
-        # app = Application(doc)
-
-        return layout
 
     def asset_bubble(
         self,
@@ -1930,312 +2105,18 @@ class Calculator:
             tabs (Bokeh Tabs object): bubble plots
 
         """
-        # Load data as DataFrame
-        df = self.calc_by_asset()
-        # Keep only corporate
-        df.drop(df[df.tax_treat != "corporate"].index, inplace=True)
-        # Remove data from Intellectual Property, Land, and
-        # Inventories Categories
-        if not include_land:
-            df.drop(df[df.asset_name == "Land"].index, inplace=True)
-        if not include_inventories:
-            df.drop(df[df.asset_name == "Inventories"].index, inplace=True)
-        if not include_IP:
-            df.drop(
-                df[df.major_asset_group == "Intellectual Property"].index,
-                inplace=True,
-            )
-
-        # define the size DataFrame
-        SIZES = list(range(20, 80, 15))
-        df["size"] = pd.qcut(df["assets"].values, len(SIZES), labels=SIZES)
-
-        # Form the two Categories: Equipment and Structures
-        equipment_df = df.drop(
-            df[df.minor_asset_group.str.contains("Structures")].index
-        ).copy()
-        equipment_df.drop(
-            equipment_df[
-                equipment_df.minor_asset_group.str.contains("Buildings")
-            ].index,
-            inplace=True,
-        )
-        # Drop overall category and overall equipment
-        equipment_df.drop(
-            equipment_df[equipment_df.asset_name == "Overall"].index,
-            inplace=True,
-        )
-        equipment_df.drop(
-            equipment_df[equipment_df.asset_name == "Equipment"].index,
-            inplace=True,
-        )
-        structure_df = df.drop(
-            df[
-                ~df.minor_asset_group.str.contains("Structures|Buildings")
-            ].index
-        ).copy()
-
-        # Make short category
-        make_short = {
-            "Instruments and Communications Equipment": "Instruments and Communications",
-            "Office and Residential Equipment": "Office and Residential",
-            "Other Equipment": "Other",
-            "Transportation Equipment": "Transportation",
-            "Other Industrial Equipment": "Other Industrial",
-            "Nonresidential Buildings": "Nonresidential Bldgs",
-            "Residential Buildings": "Residential Bldgs",
-            "Mining and Drilling Structures": "Mining and Drilling",
-            "Other Structures": "Other",
-            "Computers and Software": "Computers and Software",
-            "Industrial Machinery": "Industrial Machinery",
-        }
-
-        equipment_df["short_category"] = equipment_df["minor_asset_group"]
-        equipment_df.replace(
-            {"short_category": make_short}, regex=True, inplace=True
-        )
-        structure_df["short_category"] = structure_df["minor_asset_group"]
-        structure_df.replace(
-            {"short_category": make_short}, regex=True, inplace=True
-        )
-        # Set up datasources
-        data_sources = {}
-        # Add the Reform and the Baseline to Equipment Asset
-        equipment_copy = equipment_df.copy()
-        equipment_copy["baseline"] = equipment_copy[output_variable]
-        equipment_copy["hover"] = (
-            equipment_copy[output_variable]
-            .astype(str)
-            .apply(lambda x: "{:.2}%".format(x))
-        )
-        data_sources["equipment_" + output_variable] = ColumnDataSource(
-            equipment_copy[
-                [
-                    "baseline",
-                    "size",
-                    "hover",
-                    "assets",
-                    "short_category",
-                    "asset_name",
-                ]
-            ]
-        )
-
-        # A spacer for the y-axis label
-        fudge_factor = "                          "
-
-        # Add the Reform and the Baseline to Structures Asset
-        structure_copy = structure_df.copy()
-        structure_copy["baseline"] = structure_copy[output_variable]
-        # structure_copy['hover'] = structure_copy.apply(
-        #     lambda x: "{0:.1f}%".format(x[f] * 100), axis=1)
-        structure_copy["hover"] = structure_copy.astype(str).apply(
-            lambda x: "{0:.1}%".format(x[output_variable]), axis=1
-        )
-        structure_copy["short_category"] = structure_copy[
-            "short_category"
-        ].str.replace("Residential Bldgs", fudge_factor + "Residential Bldgs")
-        data_sources["structure_" + output_variable] = ColumnDataSource(
-            structure_copy[
-                [
-                    "baseline",
-                    "size",
-                    "hover",
-                    "assets",
-                    "short_category",
-                    "asset_name",
-                ]
-            ]
-        )
-
-        # Define categories for Equipments assets
-        equipment_assets = [
-            "Computers and Software",
-            "Instruments and Communications",
-            "Office and Residential",
-            "Transportation",
-            "Industrial Machinery",
-            "Other Industrial",
-            "Other",
-        ]
-
-        # Define categories for Structures assets
-        structure_assets = [
-            "Residential Bldgs",
-            "Nonresidential Bldgs",
-            "Mining and Drilling",
-            "Other",
-        ]
+        from ccc import plots
 
-        # Equipment plot
-        p = figure(
-            height=540,
-            width=990,
-            x_range=(-0.05, 0.51),
-            y_range=list(reversed(equipment_assets)),
-            # x_axis_location="above",
-            # toolbar_location=None,
-            tools="hover",
-            background_fill_alpha=0,
-            # change things on all axes
-            **PLOT_FORMATS,
+        return plots.asset_bubble(
+            self,
+            calc,
+            output_variable=output_variable,
+            include_inventories=include_inventories,
+            include_land=include_land,
+            include_IP=include_IP,
+            include_title=include_title,
+            path=path,
         )
-        if include_title:
-            p.add_layout(
-                Title(
-                    text=(
-                        "Marginal Effective Tax Rates on Corporate Investments"
-                        + " in Equipment"
-                    ),
-                    **TITLE_FORMATS,
-                ),
-                "above",
-            )
-
-        hover = p.select(dict(type=HoverTool))
-        hover.tooltips = [("Asset", " @asset_name (@hover)")]
-
-        # source = data_sources['equipment_' + output_variable]
-
-        # Format axes
-        p.xaxis.axis_label = "Marginal Effective Tax Rate"
-        p.xaxis[0].formatter = NumeralTickFormatter(format="0.1%")
-        # p.yaxis.axis_label = "Equipment"
-        p.toolbar_location = None
-        p.min_border_right = 5
-        # p.min_border_bottom = -10
-        p.outline_line_width = 5
-        p.border_fill_alpha = 0
-        p.xaxis.major_tick_line_color = "firebrick"
-        p.xaxis.major_tick_line_width = 3
-        p.xaxis.minor_tick_line_color = "orange"
-        p.outline_line_width = 1
-        p.outline_line_alpha = 1
-        p.outline_line_color = "black"
-
-        p.scatter(
-            x="baseline",
-            y="short_category",
-            color=BLUE,
-            size="size",
-            line_color="#333333",
-            line_alpha=0.1,
-            fill_alpha=0.4,
-            source=ColumnDataSource(
-                data_sources["equipment_" + output_variable].data
-            ),
-            alpha=0.4,
-        )
-
-        # Define and add a legend
-        legend_cds = ColumnDataSource(
-            {
-                "size": SIZES,
-                "label": ["<$20B", "", "", "<$1T"],
-                "x": [0, 0.15, 0.35, 0.6],
-            }
-        )
-        p_legend = figure(
-            height=150,
-            width=380,
-            x_range=(-0.075, 75),
-            title="Asset Amount",
-            tools="",
-        )
-        # p_legend.circle(y=None, x='x', size='size', source=legend_cds,
-        #                 color=BLUE, fill_alpha=.4, alpha=.4,
-        #                 line_color="#333333")
-        # l1 = LabelSet(y=None, x='x', text='label', x_offset=-20,
-        #               y_offset=-50, source=legend_cds)
-        # p_legend.add_layout(l1)
-        p_legend.axis.visible = False
-        p_legend.grid.grid_line_color = None
-        p_legend.toolbar.active_drag = None
-
-        # Style the tools
-        # p.add_tools(WheelZoomTool(), ResetTool(), SaveTool())
-        # p.toolbar_location = "right"
-        # p.toolbar.logo = None
-
-        # Structures plot
-        p2 = figure(
-            height=540,
-            width=990,
-            x_range=(-0.05, 0.51),
-            y_range=list(reversed(structure_assets)),
-            # toolbar_location=None,
-            tools="hover",
-            background_fill_alpha=0,
-            **PLOT_FORMATS,
-        )
-        p2.add_layout(
-            Title(
-                text=(
-                    "Marginal Effective Tax Rates on Corporate "
-                    + "Investments in Structures"
-                ),
-                **TITLE_FORMATS,
-            ),
-            "above",
-        )
-
-        hover = p2.select(dict(type=HoverTool))
-        hover.tooltips = [("Asset", " @asset_name (@hover)")]
-        # Format axes
-        p2.xaxis.axis_label = "Marginal Effective Tax Rate"
-        p2.xaxis[0].formatter = NumeralTickFormatter(format="0.1%")
-        # p2.yaxis.axis_label = "Structures"
-        p2.toolbar_location = None
-        p2.min_border_right = 5
-        # p2.min_border_top = -13
-        p2.outline_line_width = 0
-        p2.border_fill_alpha = 0
-        p2.xaxis.major_tick_line_color = "firebrick"
-        p2.xaxis.major_tick_line_width = 3
-        p2.xaxis.minor_tick_line_color = "orange"
-
-        p2.scatter(
-            x="baseline",
-            y="short_category",
-            color=RED,
-            size="size",
-            line_color="#333333",
-            # line_alpha=.1,
-            fill_alpha=0.4,
-            source=ColumnDataSource(
-                data_sources["structure_" + output_variable].data
-            ),
-            alpha=0.4,
-        )
-
-        p2.outline_line_width = 1
-        p2.outline_line_alpha = 1
-        p2.outline_line_color = "black"
-
-        # Define and add a legend
-        p2_legend = figure(
-            height=150,
-            width=380,
-            x_range=(-0.075, 0.75),
-            title="Asset Amount",
-            tools="",
-        )
-        # p2_legend.circle(y=None, x='x', size='size', source=legend_cds,
-        #                  color=RED, fill_alpha=.4, alpha=.4,
-        #                  line_color="#333333")
-        # l2 = LabelSet(y=None, x='x', text='label', x_offset=-20,
-        #               y_offset=-50, source=legend_cds)
-        # p2_legend.add_layout(l2)
-        p2_legend.axis.visible = False
-        p2_legend.grid.grid_line_color = None
-        p2_legend.toolbar.active_drag = None
-
-        # Create Tabs
-        tab = TabPanel(child=column([p, p_legend]), title="Equipment")
-        tab2 = TabPanel(child=column([p2, p2_legend]), title="Structures")
-        tabs = Tabs(tabs=[tab, tab2])
-
-        return tabs
 
     def store_assets(self):
         """
@@ -2244,8 +2125,9 @@ class Calculator:
         to the embedded Assets object.
 
         """
-        assert self.__stored_assets is None
-        self.__stored_assets = copy.deepcopy(self.__assets)
+        with self.__lock:
+            assert self.__stored_assets is None
+            self.__stored_assets = self.__share_assets(self.__assets)
 
     def restore_assets(self):
         """
@@ -2253,10 +2135,37 @@ class Calculator:
         that was saved in the last call to the store_assets() method.
 
         """
-        assert isinstance(self.__stored_assets, Assets)
-        self.__assets = copy.deepcopy(self.__stored_assets)
-        del self.__stored_assets
-        self.__stored_assets = None
+        with self.__lock:
+            assert isinstance(self.__stored_assets, Assets)
+            self.__assets = self.__share_assets(self.__stored_assets)
+            self.__results.clear()
+            self.__stages.clear()
+            self.__entity_codes = None
+            del self.__stored_assets
+            self.__stored_assets = None
+
+    def update_specification(self, revision, raise_errors=True):
+        """
+        Updates the embedded Specification object with the values in a
+        revision dictionary.  Only the results that depend on the
+        parameters changed are recomputed, e.g., the NPV of depreciation
+        deductions is not recomputed if the revision only changes the
+        property tax rate.
+
+        Args:
+            revision (dict): dictionary or JSON string with one or more
+                `PARAM: YEAR-VALUE-DICTIONARY` pairs
+            raise_errors (boolean): whether to raise ValueError for
+                parameter errors, see
+                Specification.update_specification()
+
+        Returns:
+            None
+
+        """
+        with self.__lock:
+            self.__p.update_specification(revision, raise_errors=raise_errors)
+            self.__results.clear()
 
     def p_param(self, param_name, param_value=None):
         """
@@ -2275,7 +2184,9 @@ class Calculator:
         """
         if param_value is None:
             return getattr(self.__p, param_name)
-        setattr(self.__p, param_name, param_value)
+        with self.__lock:
+            setattr(self.__p, param_name, param_value)
+            self.__results.clear()
         return None
 
     @property
@@ -2294,40 +2205,349 @@ class Calculator:
         """
         return self.__assets.data_year
 
-    def __f(self, x):
+    def __cached_result(
+        self, method, include_land, include_inventories, compute
+    ):
+        """
+        Private method.  Returns the cached result of a method, calling
+        compute(include_inventories, include_land) to compute it if
+        there is none.  The cache is cleared when the parameters or
+        assets of the Calculator are changed.
+
+        Args:
+            method (string): name of the method
+            include_land (bool): whether land is included
+            include_inventories (bool): whether inventories are included
+            compute (function): function that computes the result
+
+        Returns:
+            result (python object): result of the method
+
+        """
+        key = (method, bool(include_land), bool(include_inventories))
+        with self.__lock:
+            if key not in self.__results:
+                self.__results[key] = compute(
+                    include_inventories=include_inventories,
+                    include_land=include_land,
+                )
+
+            return self.__results[key]
+
+    def __params(self):
+        """
+        Private method.  Returns the compiled snapshot of the
+        Specification that the calc_base() and calc_other() kernels
+        read, see Specification.compile().  It is cached with the
+        results of the other methods.
+
+        """
+        return self.__cached_result(
+            "compile", True, True, lambda **kwargs: self.__p.compile()
+        )
+
+    def __stage(self, key, inputs, compute):
+        """
+        Private method.  Returns the result of a stage of calc_base(),
+        computing it only if the Specification attributes it reads, see
+        CALC_STAGE_PARAMS, or the results of the stages it uses have
+        changed since it was last computed.
+
+        Args:
+            key (tuple): name of the stage, followed by the entity type
+                and financing type for stages done for each
+            inputs (list): fingerprints of the results of the stages
+                used
+            compute (function): function that computes the result
+
+        Returns:
+            tuple: (fingerprint, result) where the fingerprint
+                identifies the result
+
+        """
+        values = [
+            self.__stage_param(name, *key[1:])
+            for name in CALC_STAGE_PARAMS[key[0]]
+        ]
+        fingerprint = hashlib.sha1(
+            pickle.dumps((key, values, inputs))
+        ).hexdigest()
+        with self.__lock:
+            cached = self.__stages.get(key)
+            if cached is None or cached[0] != fingerprint:
+                cached = (fingerprint, compute())
+                self.__stages[key] = cached
+
+            return cached
+
+    def __stage_param(self, name, t=None, f=None):
+        """
+        Private method.  Returns the value of a Specification attribute
+        for entity type t and financing type f.
+
+        """
+        return self.__params().get(name, t, f)
+
+    def __base_sums(self, by, include_land=True, include_inventories=True):
+        """
+        Private method.  Returns the sums by group of the asset data
+        computed by calc_base(), see __group_sums().  The DataFrame
+        returned must not be modified.
+
+        """
+        with self.__lock:
+            base_df = self.__base_df()
+            key = ("sums", tuple(by), include_land, include_inventories)
+            return self.__stage(
+                key,
+                [self.__stages[("base",)][0]],
+                lambda: self.__group_sums(
+                    base_df,
+                    by,
+                    include_land=include_land,
+                    include_inventories=include_inventories,
+                    asset_code=self.__entity_codes[1],
+                ),
+            )[1]
+
+    def __base_df(self):
+        """
+        Private method.  Returns the asset data with z and rho computed
+        by calc_base().  The DataFrame returned must not be modified.
+
+        """
+        with self.__lock:
+            self.calc_base()
+            return self.__assets.df
+
+    @staticmethod
+    def __share_assets(assets):
+        """
+        Private method.  Returns a copy of an Assets object that shares
+        the asset data and its row codes with it.  The row codes are
+        found before copying, so they are stored in `assets` and found
+        only once for all Calculators made from it.  With pandas
+        copy-on-write, a column is only copied if it is modified, so
+        each Calculator only allocates memory for the columns it
+        computes, and modifications are never seen by the other
+        Calculators sharing the data.  Without copy-on-write, see
+        utils.copy_on_write(), the asset data are copied.
+
+        Args:
+            assets (CCC Assets object): asset data
+
+        Returns:
+            assets (CCC Assets object): copy of the asset data
+
+        """
+        assets.row_codes()
+
+        return copy.copy(assets)
+
+    def __entity_data(self):
+        """
+        Private method.  Returns the asset data ordered by
+        __entity_rows(), with the slice of rows for each entity type and
+        the asset code of each row from Assets.row_codes().  The rows
+        are only found once, as the asset data are then kept in this
+        order.
+
+        """
+        df = self.__assets.df[self.__data_columns]
+        if self.__entity_codes is None:
+            codes = self.__assets.row_codes()
+            df, rows, order = self.__entity_rows(df, codes["tax_treat_rows"])
+            asset_code = codes["asset_code"]
+            if order is not None:
+                asset_code = asset_code[order]
+                self.__assets.df = df
+            self.__entity_codes = (rows, asset_code)
+        else:
+            df = df.reset_index(drop=True)
+
+        return (df,) + self.__entity_codes
+
+    @staticmethod
+    def __entity_rows(df, tax_treat_rows=None):
+        """
+        Private method.  Orders rows with the corporate rows first,
+        followed by the non-corporate rows.  Rows are only copied if the
+        data are not already in this order.
+
+        Args:
+            df (Pandas DataFrame): assets by tax treatment
+            tax_treat_rows (dict): positions of the rows of each tax
+                treatment from Assets.row_codes(), which are found
+                from `df` if `None`
+
+        Returns:
+            tuple: (df, rows, order) where df is the ordered DataFrame,
+                rows is a dictionary with the slice of rows for each
+                entity type and order is the position of each row of
+                df in the input, or `None` if they were already in order
+
+        """
+        if tax_treat_rows is None:
+            tax_treat = df["tax_treat"].to_numpy()
+            tax_treat_rows = {
+                name: np.flatnonzero(tax_treat == name)
+                for name in ["corporate", "non-corporate"]
+            }
+        no_rows = np.array([], dtype=np.int64)
+        c_rows = tax_treat_rows.get("corporate", no_rows)
+        pt_rows = tax_treat_rows.get("non-corporate", no_rows)
+        n_c, n_pt = len(c_rows), len(pt_rows)
+        order = None
+        if len(df.index) != n_c + n_pt or not np.array_equal(
+            c_rows, np.arange(n_c)
+        ):
+            order = np.concatenate([c_rows, pt_rows])
+            df = df.iloc[order]
+        df = df.reset_index(drop=True)
+        rows = {"c": slice(0, n_c), "pt": slice(n_c, n_c + n_pt)}
+
+        return df, rows, order
+
+    def __group_sums(
+        self,
+        df,
+        by,
+        include_land=True,
+        include_inventories=True,
+        asset_code=None,
+    ):
+        """
+        Private method.  A function to compute, for each group, the sums
+        needed for the weighted averages of the variables used by
+        calc_other().
+
+        Args:
+            df (Pandas DataFrame): data to aggregate
+            by (list): names of variables to group by
+            include_land (bool): whether to include land
+            include_inventories (bool): whether to include inventories
+            asset_code (Numpy array): asset codes of the rows of `df`,
+                see __include_mask()
+
+        Returns:
+            sums_df (Pandas DataFrame): sums for each group
+
+        """
+        mask = self.__include_mask(
+            df, include_land, include_inventories, asset_code
+        )
+        if not mask.all():
+            df = df[mask]
+
+        return group_sums(df, by, AGG_VAR_LIST, "assets")
+
+    @staticmethod
+    def __include_mask(df, include_land, include_inventories, asset_code=None):
+        """
+        Private method.  Returns a boolean array that is `False` for the
+        rows of land or inventories that are to be excluded.
+
+        Args:
+            df (Pandas DataFrame): assets by type
+            include_land (bool): whether to include land
+            include_inventories (bool): whether to include inventories
+            asset_code (Numpy array): asset codes of the rows of `df`
+                from asset_codes(), which are found from `df` if `None`
+
+        Returns:
+            mask (Numpy array): rows to include
+
+        """
+        mask = np.ones(len(df.index), dtype=bool)
+        if include_land and include_inventories:
+            return mask
+        if asset_code is None:
+            asset_code = asset_codes(df["asset_name"])
+        if not include_land:
+            mask &= asset_code != LAND_CODE
+        if not include_inventories:
+            mask &= asset_code != INVENTORIES_CODE
+
+        return mask
+
+    def __rollup(self, sums_df, *grouping_sets):
         """
         Private method.  A function to compute sums and weighted averages
-        from a groubpy object.
+        of the variables needed by calc_other() for each group of one or
+        more coarser groupings of the sums from __group_sums().  As the
+        coarser groups are summed from the sums of the finer ones rather
+        than from the rows of the asset data, results can differ from
+        aggregating the rows directly in the last bits.
 
         Args:
-            x (Pandas DataFrame): data for the particular grouping
+            sums_df (Pandas DataFrame): sums from __group_sums()
+            grouping_sets (list): one or more lists of names of
+                variables to group by; an empty list aggregates all
+                groups
 
         Returns:
-            d (Pandas Series): computed variables for the group
-
-        """
-        d = {}
-        d["assets"] = x["assets"].sum()
-        d["delta"] = wavg(x, "delta", "assets")
-        d["rho_mix"] = wavg(x, "rho_mix", "assets")
-        d["rho_d"] = wavg(x, "rho_d", "assets")
-        d["rho_e"] = wavg(x, "rho_e", "assets")
-        d["z_mix"] = wavg(x, "z_mix", "assets")
-        d["z_d"] = wavg(x, "z_d", "assets")
-        d["z_e"] = wavg(x, "z_e", "assets")
-        d["Y"] = wavg(x, "Y", "assets")
-
-        return pd.Series(
-            d,
-            index=[
-                "assets",
-                "delta",
-                "rho_mix",
-                "rho_d",
-                "rho_e",
-                "z_mix",
-                "z_d",
-                "z_e",
-                "Y",
-            ],
+            agg_df (Pandas DataFrame or tuple): computed variables for
+                each group, one DataFrame per grouping set
+
+        """
+        agg_dfs = wavg_rollup(
+            sums_df, list(grouping_sets), AGG_VAR_LIST, "assets"
         )
+        if len(agg_dfs) == 1:
+            return agg_dfs[0]
+        return tuple(agg_dfs)
+
+    def __grouping_sets(self, agg_dfs, labels):
+        """
+        Private method.  A function to combine the results for the
+        groups of several grouping sets from __rollup(), from the
+        finest to the coarsest, into one table with the variables
+        computed by calc_other(), like GROUPING SETS in SQL.
+
+        Each group is labelled in all of the columns of `labels`, which
+        name nested groupings from the finest to the coarsest: a
+        grouping set that does not group by one of these is labelled
+        with the nearest coarser one it groups by, or with "Overall".
+        A group is left out if it has the same labels and tax treatment
+        as a group of a finer grouping set, e.g., a minor asset group
+        with a single asset of the same name.
+
+        Args:
+            agg_dfs (list): DataFrames from __rollup(), one per
+                grouping set, from the finest to the coarsest
+            labels (list): names of the label variables, from the
+                finest grouping to the coarsest
+
+        Returns:
+            df (Pandas DataFrame): results for all groups, numbered in
+                the `index` variable by their position among the groups
+                of all grouping sets, counting those left out
+
+        """
+        keys = labels + ["tax_treat"]
+        start = 0
+        seen = None
+        dfs = []
+        for agg_df in agg_dfs:
+            for i, label in enumerate(labels):
+                if label not in agg_df:
+                    coarser = [name for name in labels[i:] if name in agg_df]
+                    if coarser:
+                        agg_df[label] = agg_df[coarser[0]]
+                    else:
+                        agg_df[label] = "Overall"
+            agg_df = self.calc_other(agg_df)
+            agg_df.index = pd.RangeIndex(start, start + len(agg_df.index))
+            start += len(agg_df.index)
+            groups = pd.MultiIndex.from_frame(agg_df[keys])
+            keep = ~groups.duplicated()
+            if seen is not None:
+                keep &= ~groups.isin(seen)
+                seen = seen.append(groups[keep])
+            else:
+                seen = groups[keep]
+            dfs.append(agg_df[keep])
+        df = pd.concat(dfs, sort=True)
+        df.insert(0, "index", df.index)
+
+        return df
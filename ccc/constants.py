@@ -20,6 +20,50 @@ OUTPUT_VAR_LIST = [
 
 OUTPUT_DATA_FORMATS = ["csv", "tex", "excel", "json", "html", None]
 
+# Variables aggregated with asset-weighted means before calc_other()
+AGG_VAR_LIST = [
+    "delta",
+    "rho_mix",
+    "rho_d",
+    "rho_e",
+    "z_mix",
+    "z_d",
+    "z_e",
+    "Y",
+]
+
+# Specification attributes read by each stage of Calculator.calc_base().
+# A stage is only recomputed if one of these or the result of a stage
+# it uses has changed.  Attributes that are dictionaries by entity type
+# or financing type are read for the entity and financing of the stage.
+CALC_STAGE_PARAMS = {
+    # depreciation rules for each asset
+    "depr": ["year", "bonus_deprec"],
+    # integer codes of the depreciation methods, uses "depr"
+    "code": [],
+    # NPV of depreciation deductions, uses "depr"
+    "z": ["r", "inflation_rate", "land_expensing"],
+    # cost of capital, uses "z"
+    "rho": [
+        "property_tax",
+        "u",
+        "u_d",
+        "inv_tax_credit",
+        "psi",
+        "nu",
+        "inflation_rate",
+        "r",
+        "re_credit",
+        "inventory_expensing",
+        "phi",
+        "Y_v",
+    ],
+    # asset data with z and rho, uses "depr", "z" and "rho"
+    "base": [],
+    # sums by group of the asset data, uses "base"
+    "sums": [],
+}
+
 # TODO: perhaps make as a dict so that can vary across years?
 # And if policy variant, maybe move to default params?
 RE_ASSETS = [
@@ -63,6 +107,19 @@ TAX_METHODS = {
     # "Income Forecast": 1.0,
 }
 
+# Integer codes for depreciation methods in compiled kernels, with
+# codes for land and inventories, which override the method
+DEPR_METHOD_CODES = {
+    "DB 200%": 1,
+    "DB 150%": 1,
+    "SL": 2,
+    "Economic": 3,
+    "Income Forecast": 4,
+    "Expensing": 5,
+}
+LAND_CODE = 6
+INVENTORIES_CODE = 7
+
 MINOR_ASSET_GROUPS = dict.fromkeys(
     [
         "Mainframes",
@@ -7,9 +7,22 @@ Cost-of-Capital-Calculator asset data class.
 # pylint --disable=locally-disabled records.py
 
 import os
+import json
+import shutil
+import hashlib
+import warnings
+import numpy as np
 import pandas as pd
 from ccc.utils import read_egg_csv, read_egg_json, json_to_dict
-from ccc.utils import ASSET_DATA_CSV_YEAR
+from ccc.utils import ASSET_DATA_CSV_YEAR, get_cache_dir, copy_on_write
+from ccc.calcfunctions import asset_codes
+
+# subdirectory of the cache directory for typed copies of asset data
+ASSETS_CACHE_SUBDIR = "asset_data"
+
+# version of the layout of the typed copies of asset data in the cache,
+# to be increased when it changes so that older copies are not read
+ASSETS_CACHE_VERSION = 1
 
 
 class Assets:
@@ -22,6 +35,9 @@ class Assets:
             data; default value is the string 'asset_data.csv'
         start_year (integer): specifies calendar year of the input data;
             default value is ASSET_DATA_CSV_YEAR.
+        use_cache (bool): whether to load CSV data from, and store it
+            in, the on-disk cache of typed asset data; default value is
+            `True`.
 
     Returns:
     Assets (class instance)
@@ -41,6 +57,14 @@ class Assets:
 
         which uses all the default parameters of the constructor.
 
+        Variables read from a CSV file are given the types in
+        records_variables.json, with strings stored as categoricals.
+        The typed data are cached on disk (see `get_cache_dir`) under
+        a SHA-256 hash of the contents of the CSV file and of
+        records_variables.json and of ASSETS_CACHE_VERSION, one NumPy
+        file per column, and memory-mapped by later Assets objects
+        rather than parsing the CSV file again.
+
     """
 
     # suppress pylint warnings about unrecognized Records variables:
@@ -59,11 +83,12 @@ class Assets:
         self,
         data=os.path.join(CUR_PATH, "ccc_asset_data.csv"),
         start_year=ASSET_DATA_CSV_YEAR,
+        use_cache=True,
     ):
         # pylint: disable=too-many-arguments,too-many-locals
         self.__data_year = start_year
         # read specified data
-        self._read_data(data)
+        self._read_data(data, use_cache)
         # If have any checks on data, do there here...
         # specify that variable values do not include behavioral responses
         self.behavioral_responses_are_included = False
@@ -82,6 +107,67 @@ class Assets:
         """
         return self.__dim
 
+    @property
+    def df(self):
+        """
+        Asset data.  Assigning new data discards the row codes found
+        for the previous data, see row_codes().
+        """
+        return self.__df
+
+    @df.setter
+    def df(self, df):
+        self.__df = df
+        self.__row_codes = None
+
+    def __copy__(self):
+        """
+        Returns a copy of the Assets object that shares the asset data
+        and its row codes.  With pandas copy-on-write, a column is only
+        copied when it is modified in either object.  Without it, see
+        utils.copy_on_write(), the asset data are copied.
+        """
+        shared = object.__new__(type(self))
+        shared.__dict__.update(self.__dict__)
+        shared.__df = self.__df.copy(deep=not copy_on_write())
+        return shared
+
+    def row_codes(self):
+        """
+        Integer codes and row positions that identify the asset rows
+        treated specially, so that the asset names and tax treatments
+        are only matched once for the asset data rather than in each
+        calculation.  They are found on first use and shared with the
+        copies of the Assets object made afterwards, such as those of
+        the Calculators made from it.
+
+        Returns:
+            codes (dict): with the read-only NumPy arrays
+                * asset_code: code of each row from asset_codes(),
+                    LAND_CODE for land, INVENTORIES_CODE for inventories
+                    and 0 otherwise
+                * tax_treat_rows: dictionary with the positions of the
+                    rows of each tax treatment
+
+        """
+        if self.__row_codes is None:
+            tax_treat = self.df["tax_treat"].astype("category")
+            tax_treat_codes = tax_treat.cat.codes.to_numpy()
+            codes = {
+                "asset_code": asset_codes(self.df["asset_name"]),
+                "tax_treat_rows": {
+                    name: np.flatnonzero(tax_treat_codes == i)
+                    for i, name in enumerate(tax_treat.cat.categories)
+                },
+            }
+            for array in [codes["asset_code"]] + list(
+                codes["tax_treat_rows"].values()
+            ):
+                array.flags.writeable = False
+            self.__row_codes = codes
+
+        return self.__row_codes
+
     @staticmethod
     def read_var_info():
         """
@@ -102,28 +188,37 @@ class Assets:
         Assets.INTEGER_READ_VARS = set(
             k for k, v in vardict["read"].items() if v["type"] == "int"
         )
-        FLOAT_READ_VARS = set(
+        Assets.FLOAT_READ_VARS = set(
             k for k, v in vardict["read"].items() if v["type"] == "float"
         )
+        Assets.STRING_READ_VARS = set(
+            k for k, v in vardict["read"].items() if v["type"] == "string"
+        )
         Assets.MUST_READ_VARS = set(
             k for k, v in vardict["read"].items() if v.get("required")
         )
-        Assets.USABLE_READ_VARS = Assets.INTEGER_READ_VARS | FLOAT_READ_VARS
+        Assets.USABLE_READ_VARS = (
+            Assets.INTEGER_READ_VARS | Assets.FLOAT_READ_VARS
+        )
         Assets.INTEGER_VARS = Assets.INTEGER_READ_VARS
         return vardict
 
     # specify various sets of variable names
     INTEGER_READ_VARS = set()
+    FLOAT_READ_VARS = set()
+    STRING_READ_VARS = set()
     MUST_READ_VARS = set()
     USABLE_READ_VARS = set()
     INTEGER_VARS = set()
 
-    def _read_data(self, data):
+    def _read_data(self, data, use_cache=True):
         """
         Read Records data from file or use specified DataFrame as data.
 
         Args:
             data (string or Pandas DataFrame): data or path to data
+            use_cache (bool): whether to use the on-disk cache of typed
+                asset data for CSV files
 
         Returns:
             None
@@ -137,10 +232,12 @@ class Assets:
             assetdf = data
         elif isinstance(data, str):
             if os.path.isfile(data):
-                assetdf = pd.read_csv(data)  # pragma: no cover
+                assetdf = Assets._read_csv(data, use_cache)
             else:
                 # cannot call read_egg_ function in unit tests
-                assetdf = read_egg_csv(data)  # pragma: no cover
+                assetdf = Assets._set_var_types(
+                    read_egg_csv(data)
+                )  # pragma: no cover
         else:
             msg = "data is neither a string nor a Pandas DataFrame"
             raise ValueError(msg)
@@ -148,3 +245,142 @@ class Assets:
         self.__index = assetdf.index
 
         self.df = assetdf
+
+    @staticmethod
+    def _read_csv(path, use_cache=True):
+        """
+        Read asset data from a CSV file, typed by _set_var_types(), from
+        the on-disk cache if it holds the contents of the file.
+
+        Args:
+            path (string): path to CSV file
+            use_cache (bool): whether to look up and store the data in
+                the on-disk cache
+
+        Returns:
+            assetdf (Pandas DataFrame): asset data
+
+        """
+        if not use_cache:
+            return Assets._set_var_types(pd.read_csv(path))
+        key = Assets._cache_key(path)
+        assetdf = _read_assets_cache(key)
+        if assetdf is None:
+            assetdf = Assets._set_var_types(pd.read_csv(path))
+            _write_assets_cache(key, assetdf)
+
+        return assetdf
+
+    @staticmethod
+    def _cache_key(path):
+        """
+        Key of the asset data read from a CSV file in the on-disk cache:
+        a hash of the contents of the file, of the variable types in
+        records_variables.json, and of the version of the cache layout,
+        so that a change to any of these invalidates the cached data.
+
+        Args:
+            path (string): path to CSV file
+
+        Returns:
+            key (string): hex digest of the hash
+
+        """
+        digest = hashlib.sha256()
+        digest.update("{}\n".format(ASSETS_CACHE_VERSION).encode("utf-8"))
+        var_info_path = os.path.join(Assets.CUR_PATH, Assets.VAR_INFO_FILENAME)
+        for file_path in [var_info_path, path]:
+            with open(file_path, "rb") as f:
+                digest.update(hashlib.file_digest(f, "sha256").digest())
+
+        return digest.hexdigest()
+
+    @staticmethod
+    def _set_var_types(assetdf):
+        """
+        Convert the variables in records_variables.json to their types,
+        with strings as categoricals.
+
+        Args:
+            assetdf (Pandas DataFrame): asset data
+
+        Returns:
+            assetdf (Pandas DataFrame): asset data with typed variables
+
+        """
+        if Assets.INTEGER_VARS == set():
+            Assets.read_var_info()
+        types = {}
+        for name in assetdf.columns:
+            if name in Assets.FLOAT_READ_VARS:
+                types[name] = np.float64
+            elif name in Assets.INTEGER_READ_VARS:
+                types[name] = np.int64
+            elif name in Assets.STRING_READ_VARS:
+                types[name] = "category"
+
+        return assetdf.astype(types)
+
+
+def _read_assets_cache(key):
+    """
+    Return the asset data stored under key, with each column
+    memory-mapped, or None if there are none.
+    """
+    path = os.path.join(get_cache_dir(ASSETS_CACHE_SUBDIR), key)
+    try:
+        with open(os.path.join(path, "columns.json")) as f:
+            columns = json.load(f)
+        data = {}
+        for i, col in enumerate(columns):
+            # a plain array view of the memory-mapped file
+            values = np.asarray(
+                np.load(os.path.join(path, "{}.npy".format(i)), mmap_mode="r")
+            )
+            if col["categories"] is not None:
+                values = pd.Categorical.from_codes(
+                    values, categories=pd.Index(col["categories"])
+                )
+            data[col["name"]] = values
+    except (OSError, ValueError, KeyError):
+        return None
+
+    return pd.DataFrame(data, copy=False)
+
+
+def _write_assets_cache(key, assetdf):
+    """
+    Store asset data under key, with one NumPy file per column and the
+    categories of categorical columns in columns.json.  Failing to
+    write to the cache only raises a warning.
+    """
+    cache_dir = get_cache_dir(ASSETS_CACHE_SUBDIR)
+    path = os.path.join(cache_dir, key)
+    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+    try:
+        os.makedirs(tmp_path, exist_ok=True)
+        columns = []
+        for i, name in enumerate(assetdf.columns):
+            values = assetdf[name]
+            categories = None
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                categories = values.cat.categories.tolist()
+                values = values.cat.codes
+            if (
+                not isinstance(values.dtype, np.dtype)
+                or values.dtype == object
+            ):
+                # only typed data are cached, see Assets._set_var_types()
+                shutil.rmtree(tmp_path, ignore_errors=True)
+                return
+            np.save(
+                os.path.join(tmp_path, "{}.npy".format(i)), values.to_numpy()
+            )
+            columns.append({"name": name, "categories": categories})
+        with open(os.path.join(tmp_path, "columns.json"), "w") as f:
+            json.dump(columns, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        if not os.path.isdir(path):
+            warnings.warn("Could not cache asset data: {}".format(e))
@@ -1,7 +1,26 @@
 # imports
+import os
+import glob
+import json
+import hashlib
+import warnings
+import importlib.metadata
 import numpy as np
-from taxcalc import Policy, Records, Calculator, GrowFactors
+import ccc
 from ccc.utils import DEFAULT_START_YEAR, TC_LAST_YEAR, RECORDS_START_YEAR
+from ccc.utils import get_cache_dir
+
+# Subdirectory of the cache directory for marginal tax rates
+RATES_CACHE_SUBDIR = "taxcalc_rates"
+
+# Maximum number of sets of rates kept in the cache, the least recently
+# used are removed first
+RATES_CACHE_MAX_ENTRIES = 256
+
+# Files get_calculator() reads the PUF and its weights from, relative to
+# the working directory, if none are given
+PUF_DATA_FILE = "puf.csv"
+PUF_WEIGHTS_FILE = "puf_weights.csv.gz"
 
 
 def get_calculator(
@@ -37,6 +56,10 @@ def get_calculator(
         calc1 (Tax Calculator Calculator object): TC Calculator object
             with a current_year equal to calculator_start_year
     """
+    # Tax-Calculator is slow to import, so only import it when rates
+    # are computed
+    from taxcalc import Policy, Records, Calculator, GrowFactors
+
     # create a calculator
     policy1 = Policy()
     if data is not None and "cps" in str(data):
@@ -51,8 +74,7 @@ def get_calculator(
     elif data is None or "puf" in str(data):  # pragma: no cover
         print("Using PUF")
         gf_base = GrowFactors()
-        data = "puf.csv" if data is None else data
-        weights = "puf_weights.csv.gz" if weights is None else weights
+        data, weights = _puf_files(data, weights)
         records1 = Records.puf_constructor(
             data=data,
             gfactors=gf_base,
@@ -101,10 +123,19 @@ def get_rates(
     gfactors=None,
     weights=None,
     records_start_year=RECORDS_START_YEAR,
+    use_cache=True,
+    end_year=None,
 ):
     """
     This function computes weighted average marginal tax rates using
-    micro data from the tax calculator
+    micro data from the tax calculator for each year from start_year
+    through end_year.  A single Tax-Calculator Calculator object is
+    advanced through these years, so the microdata are only read and
+    extrapolated once.
+
+    Results are stored in an on-disk cache (see `get_cache_dir`), so
+    that the rates for the same policy, year and data are only
+    computed once.
 
     Args:
         start_year (integer): start year for the simulations
@@ -116,12 +147,38 @@ def get_rates(
         weights (str): path to weights file for Tax-Calculator
             Records object
         records_start_year (integer): the start year for the microdata
+        use_cache (bool): whether to look up and store the rates in
+            the on-disk cache
+        end_year (integer): last year for which to compute rates,
+            defaults to start_year
 
     Returns:
         individual_rates (dict): individual income (IIT+payroll)
-            marginal tax rates
+            marginal tax rates, arrays with one element per year from
+            start_year through end_year
 
     """
+    if end_year is None:
+        end_year = start_year
+    if end_year < start_year:
+        raise ValueError("end_year must not be before start_year.")
+    if end_year > TC_LAST_YEAR:
+        raise RuntimeError("End year is beyond data extrapolation.")
+    key = None
+    if use_cache:
+        key = rates_cache_key(
+            start_year,
+            baseline_policy,
+            reform,
+            data,
+            gfactors,
+            weights,
+            records_start_year,
+            end_year,
+        )
+        individual_rates = _read_rates_cache(key)
+        if individual_rates is not None:
+            return individual_rates
     calc1 = get_calculator(
         calculator_start_year=start_year,
         baseline_policy=baseline_policy,
@@ -132,11 +189,7 @@ def get_rates(
         records_start_year=records_start_year,
     )
 
-    # running all the functions and calculates taxes
-    calc1.calc_all()
-
     # Loop over years in window of calculations
-    end_year = start_year
     array_size = end_year - start_year + 1
     rates_dict = {
         "tau_div": "e00650",
@@ -157,25 +210,39 @@ def get_rates(
         print("Calculator year = ", calc1.current_year)
         calc1.advance_to_year(year)
         print("year: ", str(calc1.current_year))
+        # running all the functions and calculates taxes once, so that
+        # each mtr() call below only recomputes taxes with its own
+        # variable increased and shares the base case
+        calc1.calc_all()
         # Compute mtrs
         # Sch C
-        [mtr_fica_schC, mtr_iit_schC, mtr_combined_schC] = calc1.mtr("e00900p")
+        [mtr_fica_schC, mtr_iit_schC, mtr_combined_schC] = calc1.mtr(
+            "e00900p", calc_all_already_called=True
+        )
         # Sch E  - includes partnership and s corp income
-        [mtr_fica_schE, mtr_iit_schE, mtr_combined_schE] = calc1.mtr("e02000")
+        [mtr_fica_schE, mtr_iit_schE, mtr_combined_schE] = calc1.mtr(
+            "e02000", calc_all_already_called=True
+        )
         # Partnership and s corp income
-        [mtr_fica_PT, mtr_iit_PT, mtr_combined_PT] = calc1.mtr("e26270")
+        [mtr_fica_PT, mtr_iit_PT, mtr_combined_PT] = calc1.mtr(
+            "e26270", calc_all_already_called=True
+        )
         # pension distributions
         # does PUF have e01500?  Do we want IRA distributions here?
         # Weird - I see e01500 in PUF, but error when try to call it
         [mtr_fica_pension, mtr_iit_pension, mtr_combined_pension] = calc1.mtr(
-            "e01700"
+            "e01700", calc_all_already_called=True
         )
         # mortgage interest and property tax deductions
         # do we also want mtg ins premiums here?
         # mtg interest
-        [mtr_fica_mtg, mtr_iit_mtg, mtr_combined_mtg] = calc1.mtr("e19200")
+        [mtr_fica_mtg, mtr_iit_mtg, mtr_combined_mtg] = calc1.mtr(
+            "e19200", calc_all_already_called=True
+        )
         # prop tax
-        [mtr_fica_prop, mtr_iit_prop, mtr_combined_prop] = calc1.mtr("e18500")
+        [mtr_fica_prop, mtr_iit_prop, mtr_combined_prop] = calc1.mtr(
+            "e18500", calc_all_already_called=True
+        )
         pos_ti = calc1.array("c04800") > 0
         individual_rates["tau_pt"][year - start_year] = (
             (
@@ -217,15 +284,195 @@ def get_rates(
         )
         # Loop over MTRs that have only one income source
         for k, v in rates_dict.items():
-            [mtr_fica, mtr_iit, mtr_combined] = calc1.mtr(v)
+            [mtr_fica, mtr_iit, mtr_combined] = calc1.mtr(
+                v, calc_all_already_called=True
+            )
             individual_rates[k][year - start_year] = (
                 mtr_iit * calc1.array(v) * pos_ti * calc1.array("s006")
             ).sum() / (calc1.array(v) * pos_ti * calc1.array("s006")).sum()
 
     print(individual_rates)
+    _write_rates_cache(key, individual_rates)
     return individual_rates
 
 
+def rates_cache_key(
+    start_year=DEFAULT_START_YEAR,
+    baseline_policy=None,
+    reform={},
+    data="cps",
+    gfactors=None,
+    weights=None,
+    records_start_year=RECORDS_START_YEAR,
+    end_year=None,
+):
+    """
+    Creates the key for the marginal tax rates from get_rates() in
+    the on-disk cache.  The key is a hash of the arguments to
+    get_rates() and the versions of Cost-of-Capital-Calculator and
+    Tax-Calculator.  Files are identified by their path, size and
+    modification time, with the PUF files get_calculator() uses by
+    default in place of None.
+
+    Args:
+        same as get_rates()
+
+    Returns:
+        key (string): hex digest of the hash, or None if the arguments
+            cannot be hashed (e.g., data passed as a DataFrame), in
+            which case the rates are not cached
+
+    """
+    if (data is None or "puf" in str(data)) and "cps" not in str(data):
+        data, weights = _puf_files(data, weights)
+    inputs = {
+        "start_year": start_year,
+        "end_year": start_year if end_year is None else end_year,
+        "baseline_policy": baseline_policy or {},
+        "reform": reform or {},
+        "data": _file_signature(data),
+        "gfactors": _file_signature(gfactors),
+        "weights": _file_signature(weights),
+        "records_start_year": records_start_year,
+        # read from the package metadata, so that cached rates are
+        # found without importing Tax-Calculator
+        "taxcalc_version": importlib.metadata.version("taxcalc"),
+        "ccc_version": ccc.__version__,
+    }
+    try:
+        text = json.dumps(_canonical(inputs), sort_keys=True)
+    except TypeError:
+        return None
+    key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    return key
+
+
+def clear_rates_cache(key=None):
+    """
+    Removes marginal tax rates from the on-disk cache.
+
+    Args:
+        key (string): key of the rates to remove, as returned by
+            rates_cache_key().  If None, all rates are removed.
+
+    Returns:
+        None
+
+    """
+    if key is None:
+        pattern = "*.json"
+    else:
+        pattern = key + ".json"
+    for path in glob.glob(
+        os.path.join(get_cache_dir(RATES_CACHE_SUBDIR), pattern)
+    ):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _canonical(obj):
+    """
+    Convert obj into JSON-serializable types, with string keys so that
+    dictionaries can be sorted.
+    """
+    if isinstance(obj, dict):
+        return {str(k): _canonical(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_canonical(v) for v in obj]
+    if isinstance(obj, np.ndarray):
+        return _canonical(obj.tolist())
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return obj
+
+
+def _puf_files(data, weights):
+    """
+    Return the PUF data and weights get_calculator() uses, in place of
+    None.
+    """
+    data = PUF_DATA_FILE if data is None else data
+    weights = PUF_WEIGHTS_FILE if weights is None else weights
+
+    return data, weights
+
+
+def _file_signature(obj):
+    """
+    Identify a file by its path, size and modification time, so that
+    cached rates are not used after the file changes.
+    """
+    if isinstance(obj, os.PathLike):
+        obj = os.fspath(obj)
+    if isinstance(obj, str) and os.path.isfile(obj):
+        stat = os.stat(obj)
+        return [os.path.abspath(obj), stat.st_size, stat.st_mtime_ns]
+    return obj
+
+
+def _read_rates_cache(key):
+    """
+    Return the rates stored under key, or None if there are none.
+    """
+    if key is None:
+        return None
+    path = os.path.join(get_cache_dir(RATES_CACHE_SUBDIR), key + ".json")
+    try:
+        with open(path) as f:
+            cached = json.load(f)
+        # mark as recently used
+        os.utime(path)
+    except (OSError, ValueError):
+        return None
+    individual_rates = {k: np.array(v) for k, v in cached.items()}
+
+    return individual_rates
+
+
+def _write_rates_cache(key, individual_rates):
+    """
+    Store rates under key, then remove the least recently used rates
+    if there are more than RATES_CACHE_MAX_ENTRIES.  Failing to write
+    to the cache only raises a warning.
+    """
+    if key is None:
+        return
+    cache_dir = get_cache_dir(RATES_CACHE_SUBDIR)
+    path = os.path.join(cache_dir, key + ".json")
+    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(tmp_path, "w") as f:
+            json.dump(_canonical(individual_rates), f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        warnings.warn("Could not cache marginal tax rates: {}".format(e))
+        return
+    _prune_rates_cache(cache_dir)
+
+
+def _prune_rates_cache(cache_dir):
+    """
+    Remove the least recently used rates if there are more than
+    RATES_CACHE_MAX_ENTRIES in the cache.
+    """
+    entries = []
+    for path in glob.glob(os.path.join(cache_dir, "*.json")):
+        try:
+            entries.append((os.path.getmtime(path), path))
+        except OSError:
+            pass
+    entries.sort()
+    for _, path in entries[: max(len(entries) - RATES_CACHE_MAX_ENTRIES, 0)]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
 def update_policy(policy_obj, reform, **kwargs):
     """
     Convenience method that updates the Policy object with the reform
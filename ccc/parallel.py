@@ -0,0 +1,158 @@
+"""
+Run many Cost-of-Capital-Calculator evaluations in parallel.
+"""
+
+# CODING-STYLE CHECKS:
+# pycodestyle parallel.py
+# pylint --disable=locally-disabled parallel.py
+
+import os
+import traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from ccc.parameters import Specification, DepreciationParams
+from ccc.data import Assets
+from ccc.calculator import Calculator
+
+# objects shared by all tasks run in a worker process, set once when
+# the worker starts
+_SHARED = {}
+
+
+class ScenarioError:
+    """
+    Result of a scenario that could not be evaluated.  The exception
+    is kept as text, since not all exceptions can be sent back from a
+    worker process.
+
+    Args:
+        revision (dict): revision to the Specification for the scenario
+        error (string): type and message of the exception raised when
+            evaluating the scenario
+        traceback (string): formatted traceback of the exception
+
+    Returns:
+        ScenarioError: class instance
+
+    """
+
+    def __init__(self, revision, error, traceback):
+        self.revision = revision
+        self.error = error
+        self.traceback = traceback
+
+    def __repr__(self):
+        return "ScenarioError({!r})".format(self.error)
+
+    @classmethod
+    def from_exception(cls, revision, e):
+        """
+        Create a ScenarioError from the exception being handled.
+        """
+        error = "".join(traceback.format_exception_only(type(e), e))
+        return cls(revision, error.strip(), traceback.format_exc())
+
+
+def _init_worker(p, dp, assets):
+    """
+    Store the objects shared by all tasks in a worker process.  With
+    the fork start method these are inherited from the parent process,
+    otherwise they are pickled once per worker rather than per task.
+    """
+    _SHARED["p"] = p
+    _SHARED["dp"] = dp
+    _SHARED["assets"] = assets
+
+
+def _run_scenario(revision, method, kwargs):
+    """
+    Evaluate one scenario in a worker process, returning a
+    ScenarioError rather than raising if the evaluation fails.
+    """
+    try:
+        p = _SHARED["p"].clone()
+        p.update_specification(revision)
+        calc = Calculator(p, _SHARED["dp"], _SHARED["assets"])
+        return getattr(calc, method)(**kwargs)
+    except Exception as e:  # pylint: disable=broad-except
+        return ScenarioError.from_exception(revision, e)
+
+
+def run_many(
+    p,
+    dp,
+    assets,
+    revisions,
+    method="calc_by_asset",
+    max_workers=None,
+    mp_context=None,
+    **kwargs,
+):
+    """
+    Evaluates a Calculator method for many revisions to a
+    Specification, using a pool of processes.
+
+    The Specification, depreciation parameters and asset data are
+    sent to each worker process once, when it starts, and each task
+    only passes its revision.
+
+    Args:
+        p (CCC Specification object): parameters that each revision
+            is applied to
+        dp (CCC DepreciationParams object): depreciation parameters
+        assets (CCC Assets object): asset data
+        revisions (list): list of revision dictionaries, suitable for
+            use with the update_specification method
+        method (string): name of the Calculator method to call for
+            each revision, e.g., 'calc_by_asset' or 'calc_by_industry'
+        max_workers (int): number of worker processes.  Defaults to
+            the number of CPUs.
+        mp_context (multiprocessing context): context used to start
+            the worker processes.  Defaults to the 'fork' context where
+            available, so that the shared objects are inherited rather
+            than pickled.
+        kwargs: keyword arguments passed to `method`
+
+    Returns:
+        results (list): the value returned by `method` for each
+            revision, in the same order as `revisions`.  If a revision
+            cannot be evaluated, its entry is a ScenarioError and the
+            other scenarios are unaffected.
+
+    """
+    if not isinstance(p, Specification):
+        raise ValueError("must specify p as a Specification object")
+    if not isinstance(dp, DepreciationParams):
+        raise ValueError("must specify dp as a DepreciationParams object")
+    if not isinstance(assets, Assets):
+        raise ValueError("must specify assets as an Assets object")
+    if not callable(getattr(Calculator, method, None)):
+        raise ValueError("{} is not a Calculator method".format(method))
+    revisions = list(revisions)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(revisions)))
+    if mp_context is None and (
+        "fork" in multiprocessing.get_all_start_methods()
+    ):
+        mp_context = multiprocessing.get_context("fork")
+    results = []
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=mp_context,
+        initializer=_init_worker,
+        initargs=(p, dp, assets),
+    ) as executor:
+        futures = [
+            executor.submit(_run_scenario, revision, method, kwargs)
+            for revision in revisions
+        ]
+        for revision, future in zip(revisions, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:  # pylint: disable=broad-except
+                # e.g., the worker process died or the result could
+                # not be pickled
+                results.append(ScenarioError.from_exception(revision, e))
+
+    return results
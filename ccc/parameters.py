@@ -1,4 +1,6 @@
 import os
+import copy
+import numpy as np
 import pandas as pd
 import itertools
 import paramtools
@@ -11,6 +13,10 @@ import ccc.paramfunctions as pf
 
 CURRENT_PATH = os.path.abspath(os.path.dirname(__file__))
 
+# Parsed and validated default parameters for each Specification class
+# and defaults file, copied by Specification() rather than parsed again
+_DEFAULT_SPECIFICATIONS = {}
+
 
 class Specification(paramtools.Parameters):
     """
@@ -21,6 +27,15 @@ class Specification(paramtools.Parameters):
     defaults = os.path.join(CURRENT_PATH, "default_parameters.json")
     label_to_extend = "year"
     array_first = True
+    # ParamTools attributes that are not changed after initialization,
+    # which are shared rather than copied by clone()
+    _SHARED_ATTRIBUTES = (
+        "_defaults_schema",
+        "_schema",
+        "label_validators",
+        "keyfuncs",
+        "_stateless_label_grid",
+    )
 
     def __init__(
         self,
@@ -33,8 +48,14 @@ class Specification(paramtools.Parameters):
         gfactors=None,
         weights=None,
         records_start_year=RECORDS_START_YEAR,
+        end_year=None,
     ):
-        super().__init__()
+        key = (type(self), self.defaults)
+        if key in _DEFAULT_SPECIFICATIONS:
+            self._copy_state(_DEFAULT_SPECIFICATIONS[key])
+        else:
+            super().__init__()
+            _DEFAULT_SPECIFICATIONS[key] = self.clone()
         self.set_state(year=year)
         self.test = test
         self.year = year
@@ -47,6 +68,7 @@ class Specification(paramtools.Parameters):
             gfactors=gfactors,
             weights=weights,
             records_start_year=records_start_year,
+            end_year=end_year,
         )
 
     def ccc_initialize(
@@ -55,6 +77,7 @@ class Specification(paramtools.Parameters):
         gfactors=None,
         weights=None,
         records_start_year=RECORDS_START_YEAR,
+        end_year=None,
     ):
         """
         ParametersBase reads JSON file and sets attributes to self
@@ -72,6 +95,9 @@ class Specification(paramtools.Parameters):
             data (str): data source for Tax-Calculator
             gfactors (dict): growth factors for Tax-Calculator
             weights (str): weights for Tax-Calculator
+            records_start_year (int): the start year for the microdata
+            end_year (int): last year for which to find individual
+                income tax rates with Tax-Calculator, defaults to year
 
         Returns:
             None
@@ -87,14 +113,19 @@ class Specification(paramtools.Parameters):
                 gfactors,
                 weights,
                 records_start_year,
+                end_year=end_year,
+            )
+            # set the rates for each year in the window, which also
+            # sets the attributes for the current year
+            self.adjust(
+                {
+                    k: [
+                        {"year": self.year + i, "value": float(v[i])}
+                        for i in range(len(v))
+                    ]
+                    for k, v in indiv_rates.items()
+                }
             )
-            self.tau_pt = indiv_rates["tau_pt"]
-            self.tau_div = indiv_rates["tau_div"]
-            self.tau_int = indiv_rates["tau_int"]
-            self.tau_scg = indiv_rates["tau_scg"]
-            self.tau_lcg = indiv_rates["tau_lcg"]
-            self.tau_td = indiv_rates["tau_td"]
-            self.tau_h = indiv_rates["tau_h"]
         # does cheap calculations to find parameter values
         self.compute_default_params()
 
@@ -112,8 +143,10 @@ class Specification(paramtools.Parameters):
         if self.new_view:
             self.m = 1
 
-        # Get after-tax return to savers
-        self.s, E_pt = pf.calc_s(self)
+        # Get after-tax return to savers, as an array with axes
+        # (..., entity, financing) in the order of entity_list and
+        # financing_list
+        s, E_pt = pf.calc_s(self, as_array=True)
 
         # Set rate of 1st layer of taxation on investment income
         self.u = {"c": self.CIT_rate}
@@ -145,39 +178,51 @@ class Specification(paramtools.Parameters):
             "pt": {"mix": self.f_pt, "d": 1.0, "e": 0.0},
         }
 
-        # Compute firm discount factors
-        self.r = {}
-        for t in self.entity_list:
-            self.r[t] = {}
-            for f in self.financing_list:
-                self.r[t][f] = pf.calc_r(
-                    self.u[t],
-                    self.nominal_interest_rate,
-                    self.inflation_rate,
-                    self.ace_int_rate,
-                    f_dict[t][f],
-                    int_haircut_dict[t],
-                    E_dict[t],
-                    ace_dict[t],
-                )
+        # Compute firm discount factors and after-tax rates of return
+        # for all entity and financing types at once, broadcasting
+        # parameters with leading scenario axes
+        def by_entity(values):
+            rates = pf.stack_rates([values[t] for t in self.entity_list])
+            return rates[..., np.newaxis]
 
-        # Compute firm after-tax rates of return
-        r_prime = {}
-        for t in self.entity_list:
-            r_prime[t] = {}
-            for f in self.financing_list:
-                r_prime[t][f] = pf.calc_r_prime(
-                    self.nominal_interest_rate,
-                    self.inflation_rate,
-                    f_dict[t][f],
-                    E_dict[t],
-                )
+        def by_scenario(value):
+            return np.asarray(value)[..., np.newaxis, np.newaxis]
 
+        f_array = pf.stack_rates(
+            [
+                [f_dict[t][f] for f in self.financing_list]
+                for t in self.entity_list
+            ]
+        )
+        r = pf.calc_r(
+            by_entity(self.u),
+            by_scenario(self.nominal_interest_rate),
+            by_scenario(self.inflation_rate),
+            by_scenario(self.ace_int_rate),
+            f_array,
+            by_entity(int_haircut_dict),
+            by_entity(E_dict),
+            by_entity(ace_dict),
+        )
+        r_prime = pf.calc_r_prime(
+            by_scenario(self.nominal_interest_rate),
+            by_scenario(self.inflation_rate),
+            f_array,
+            by_entity(E_dict),
+        )
+        r, r_prime, s = [
+            np.array(x) for x in np.broadcast_arrays(r, r_prime, s)
+        ]
+
+        c = self.entity_list.index("c")
+        pt = self.entity_list.index("pt")
         # if no entity level taxes on pass-throughs, ensure mettr and metr
         # on non-corp entities the same
         if not self.pt_entity_tax_ind:
-            for f in self.financing_list:
-                r_prime["pt"][f] = self.s["pt"][f] + self.inflation_rate
+            r_prime[..., pt, :] = (
+                s[..., pt, :]
+                + np.asarray(self.inflation_rate)[..., np.newaxis]
+            )
         # if entity level tax, assume distribute earnings at same rate corps
         # distribute dividends and these are taxed at dividends tax rate
         # (which seems likely).  Also implicitly assumed that if entity
@@ -186,11 +231,25 @@ class Specification(paramtools.Parameters):
         else:
             # keep debt and equity financing ratio the same even though now
             # entity level tax that might now favor debt
-            self.s["pt"]["mix"] = (
-                self.f_pt * self.s["pt"]["d"]
-                + (1 - self.f_pt) * self.s["c"]["e"]
+            mix = self.financing_list.index("mix")
+            d = self.financing_list.index("d")
+            e = self.financing_list.index("e")
+            s[..., pt, mix] = (
+                self.f_pt * s[..., pt, d] + (1 - self.f_pt) * s[..., c, e]
             )
-        self.r_prime = r_prime
+
+        def by_entity_financing(rates):
+            return {
+                t: {
+                    f: rates[..., i, j]
+                    for j, f in enumerate(self.financing_list)
+                }
+                for i, t in enumerate(self.entity_list)
+            }
+
+        self.s = by_entity_financing(s)
+        self.r = by_entity_financing(r)
+        self.r_prime = by_entity_financing(r_prime)
 
         # Map string tax methods into multiple of declining balance
         self.tax_methods = {
@@ -229,6 +288,53 @@ class Specification(paramtools.Parameters):
         dps = Specification()
         return dps
 
+    def clone(self):
+        """
+        Return a copy of the Specification with the same parameter
+        values, state and computed parameters, which is much faster
+        than copy.deepcopy() because the parameters are not parsed or
+        validated again and the schemas are shared.
+
+        Returns:
+            spec (CCC Specification object): copy of self
+
+        """
+        spec = object.__new__(type(self))
+        spec._copy_state(self)
+        return spec
+
+    def _copy_state(self, other):
+        """
+        Set the attributes of self to copies of those of another
+        Specification, see clone().
+
+        Args:
+            other (CCC Specification object): Specification to copy
+
+        Returns:
+            None
+
+        """
+        state = {}
+        for name, value in other.__dict__.items():
+            if name in self._SHARED_ATTRIBUTES:
+                state[name] = value
+            elif name == "_data":
+                # value objects are updated in place by adjust()
+                state[name] = {
+                    param: dict(data, value=[dict(vo) for vo in data["value"]])
+                    for param, data in value.items()
+                }
+            elif name not in ["_validator_schema", "sel"]:
+                state[name] = copy.deepcopy(value)
+        # the validator schema looks up the Specification it validates
+        state["_validator_schema"] = copy.copy(other._validator_schema)
+        state["_validator_schema"].pt_context = dict(
+            other._validator_schema.pt_context, spec=self
+        )
+        state["sel"] = type(other.sel)(self)
+        self.__dict__.update(state)
+
     def update_specification(self, revision, raise_errors=True):
         """
         Updates parameter specification with values in revision dictionary.
@@ -269,6 +375,118 @@ class Specification(paramtools.Parameters):
         self.adjust(revision, raise_errors=raise_errors)
         self.compute_default_params()
 
+    def bulk_update_specification(
+        self, revisions, validate=True, raise_errors=True
+    ):
+        """
+        Updates parameter specification with a list of revisions at
+        once, with the same result as calling update_specification()
+        with each revision in turn.  Revisions are written to the
+        parameter values directly rather than through ParamTools
+        adjust(), and parameter values and those computed from them,
+        such as s, r, r_prime and bonus_deprec, are set only once, at
+        the end.
+
+        Args:
+            revisions (list): dictionaries or JSON strings with one or
+                more `PARAM: VALUE-OBJECTS` pairs
+            validate (bool): if True (the default), the values in all
+                revisions are validated together, once for each
+                parameter revised; if False, the revisions are trusted
+                to be valid and are not validated
+            raise_errors (bool): if True (the default), raises
+                ValidationError when `validate` is True and there are
+                errors, otherwise no revision is made and the errors
+                are left in `errors`
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: if a revision is not a dictionary or string, or
+                does not match any value of a parameter
+
+        """
+        value_objects = []
+        for revision in revisions:
+            if not (isinstance(revision, dict) or isinstance(revision, str)):
+                raise ValueError(
+                    "ERROR: revision is not a dictionary or string"
+                )
+            revision = self.read_params(revision)
+            for param, value in revision.items():
+                if param not in self._data:
+                    raise ValueError("Unknown parameter: {}.".format(param))
+                value_objects.append(
+                    (param, paramtools.ensure_value_object(value))
+                )
+        if validate:
+            params = {}
+            for param, vos in value_objects:
+                params.setdefault(param, []).extend(vos)
+            self.validate(params, raise_errors=raise_errors)
+            if self.errors:
+                return
+        for param, vos in value_objects:
+            # as in adjust(), a value for a year replaces those for all
+            # later years
+            for vo in sorted(
+                vos, key=lambda vo: vo.get(self.label_to_extend, -1)
+            ):
+                labels = {k: v for k, v in vo.items() if k != "value"}
+                year = labels.pop(self.label_to_extend, None)
+                matched = False
+                for curr_vo in self._data[param]["value"]:
+                    if (
+                        year is None or curr_vo[self.label_to_extend] >= year
+                    ) and all(curr_vo.get(k) == v for k, v in labels.items()):
+                        curr_vo["value"] = vo["value"]
+                        matched = True
+                if not matched:
+                    raise ValueError(
+                        "{} does not match any value of {}".format(vo, param)
+                    )
+        self.set_state()
+        self.compute_default_params()
+
+    def compile(self):
+        """
+        Returns a read-only snapshot of the parameters used by the
+        Calculator kernels for the current year, see
+        CompiledSpecification.  The snapshot does not change when the
+        Specification is updated.
+
+        Returns:
+            compiled (CCC CompiledSpecification object): snapshot of
+                the parameters
+
+        """
+        values = {
+            "year": self.year,
+            "entity_list": tuple(self.entity_list),
+            "financing_list": tuple(self.financing_list),
+            "bonus_deprec": tuple(self.bonus_deprec.items()),
+            "re_credit": self.re_credit,
+        }
+        for name in CompiledSpecification.SCALAR_PARAMS:
+            values[name] = _compile_value(getattr(self, name))
+        for name in CompiledSpecification.ENTITY_PARAMS:
+            values[name] = _compile_rates(
+                [getattr(self, name)[t] for t in self.entity_list],
+                (len(self.entity_list),),
+            )
+        for name in CompiledSpecification.ENTITY_FINANCING_PARAMS:
+            values[name] = _compile_rates(
+                [
+                    getattr(self, name)[t][f]
+                    for t in self.entity_list
+                    for f in self.financing_list
+                ],
+                (len(self.entity_list), len(self.financing_list)),
+            )
+
+        return CompiledSpecification(**values)
+
     @staticmethod
     def _read_json_revision(obj):
         """
@@ -286,6 +504,177 @@ class Specification(paramtools.Parameters):
 # end of Specification class
 
 
+class CompiledSpecification:
+    """
+    Read-only snapshot of the parameters of a Specification that are
+    used by the Calculator kernels, returned by
+    Specification.compile().  Parameters are floats, or read-only
+    arrays with a leading axis of draws if the Specification holds an
+    array of values of some parameter.  Rates that differ by entity
+    type are arrays with a trailing axis for the entity type, in the
+    order of `entity_list`, and those that also differ by financing
+    have a further axis for the financing type, in the order of
+    `financing_list`; use get() to look them up by name.
+
+    Args:
+        values: value of each attribute in __slots__, with
+            `bonus_deprec` as a tuple of (life, rate) pairs
+
+    Returns:
+        CompiledSpecification: class instance
+
+    """
+
+    SCALAR_PARAMS = (
+        "inflation_rate",
+        "property_tax",
+        "inv_tax_credit",
+        "psi",
+        "nu",
+        "land_expensing",
+        "inventory_expensing",
+        "phi",
+        "Y_v",
+        "profit_rate",
+    )
+    ENTITY_PARAMS = ("u", "u_d")
+    ENTITY_FINANCING_PARAMS = ("r", "r_prime", "s")
+    __slots__ = (
+        ("year", "entity_list", "financing_list", "_bonus_deprec")
+        + ("re_credit",)
+        + SCALAR_PARAMS
+        + ENTITY_PARAMS
+        + ENTITY_FINANCING_PARAMS
+    )
+
+    def __init__(self, **values):
+        values["_bonus_deprec"] = values.pop("bonus_deprec")
+        for name in self.__slots__:
+            object.__setattr__(self, name, values[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompiledSpecification is read-only")
+
+    def __delattr__(self, name):
+        raise AttributeError("CompiledSpecification is read-only")
+
+    def __reduce__(self):
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values["bonus_deprec"] = values.pop("_bonus_deprec")
+        return (_compiled_specification, (values,))
+
+    @property
+    def bonus_deprec(self):
+        """
+        Rate of bonus depreciation by asset life.
+        """
+        return dict(self._bonus_deprec)
+
+    def get(self, name, t=None, f=None):
+        """
+        Returns the value of a parameter, for entity type t and
+        financing type f if it differs by these.
+
+        Args:
+            name (string): name of the parameter
+            t (string): entity type, 'c' or 'pt'
+            f (string): financing type, 'mix', 'd' or 'e'
+
+        Returns:
+            value (scalar or Numpy array): value of the parameter
+
+        """
+        value = getattr(self, name)
+        if name in self.ENTITY_PARAMS:
+            value = value[..., self.entity_list.index(t)]
+        elif name in self.ENTITY_FINANCING_PARAMS:
+            value = value[
+                ...,
+                self.entity_list.index(t),
+                self.financing_list.index(f),
+            ]
+        if isinstance(value, np.ndarray) and value.ndim == 0:
+            value = value.item()
+
+        return value
+
+
+def _compiled_specification(values):
+    """
+    Recreate a CompiledSpecification when it is unpickled.
+    """
+    return CompiledSpecification(**values)
+
+
+def _compile_value(value):
+    """
+    Converts a parameter value to a float, or a bool for boolean
+    parameters, if it has one element, and to a read-only array
+    otherwise.
+    """
+    value = np.asarray(value)
+    if value.dtype != bool:
+        value = value.astype(float)
+    if value.size == 1 and value.ndim <= 1:
+        return value.reshape(()).item()
+    value = np.ascontiguousarray(value)
+    value.flags.writeable = False
+
+    return value
+
+
+def _compile_rates(values, shape):
+    """
+    Stacks the values of a rate for each entity type, or entity and
+    financing type, into a read-only array whose trailing axes have
+    the given shape, broadcasting values with an axis of draws.
+    """
+    values = [
+        (
+            np.asarray(v, dtype=float).reshape(())
+            if np.size(v) == 1
+            else np.asarray(v, dtype=float)
+        )
+        for v in values
+    ]
+    rates = np.stack(np.broadcast_arrays(*values), axis=-1)
+    rates = np.ascontiguousarray(rates.reshape(rates.shape[:-1] + shape))
+    rates.flags.writeable = False
+
+    return rates
+
+
+def revision_grid(grid):
+    """
+    Create the list of revisions for every combination of the values
+    of the parameters in `grid`.
+
+    Args:
+        grid (dict): dictionary with `PARAM: LIST-OF-VALUES` pairs
+
+    Returns:
+        revisions (list): list of revision dictionaries, suitable for
+            use with the update_specification method, with the last
+            parameter in `grid` varying fastest
+
+    Example:
+        >>> revision_grid({'CIT_rate': [0.21, 0.28],
+                           'BonusDeprec_3yr': [0.0, 1.0]})
+        [{'CIT_rate': 0.21, 'BonusDeprec_3yr': 0.0},
+         {'CIT_rate': 0.21, 'BonusDeprec_3yr': 1.0},
+         {'CIT_rate': 0.28, 'BonusDeprec_3yr': 0.0},
+         {'CIT_rate': 0.28, 'BonusDeprec_3yr': 1.0}]
+
+    """
+    names = list(grid.keys())
+    revisions = [
+        dict(zip(names, values))
+        for values in itertools.product(*[grid[name] for name in names])
+    ]
+
+    return revisions
+
+
 class DepreciationRules(ma.Schema):
     # set some field validation ranges that can't set in JSON
     system = ma.fields.String(
@@ -329,10 +718,85 @@ class DepreciationParams(paramtools.Parameters):
 
     defaults = os.path.join(CURRENT_PATH, "tax_depreciation_rules.json")
 
+    def __init__(self, *args, **kwargs):
+        # DataFrames built from the parameter values, which are cleared
+        # whenever the values or state change
+        self._cached_dfs = {}
+        super().__init__(*args, **kwargs)
+
+    def adjust(self, *args, **kwargs):
+        """
+        Adjust the parameter values, see paramtools.Parameters.adjust.
+        """
+        self._cached_dfs.clear()
+        return super().adjust(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        """
+        Delete parameter values, see paramtools.Parameters.delete.
+        """
+        self._cached_dfs.clear()
+        return super().delete(*args, **kwargs)
+
+    def set_state(self, **labels):
+        """
+        Set the state, see paramtools.Parameters.set_state.
+        """
+        self._cached_dfs.clear()
+        return super().set_state(**labels)
+
+    def clear_state(self):
+        """
+        Clear the state, see paramtools.Parameters.clear_state.
+        """
+        self._cached_dfs.clear()
+        return super().clear_state()
+
     def to_df(self):
         """
         Return a DataFrame containing the depreciation parameters.
         """
+        if "to_df" not in self._cached_dfs:
+            self._cached_dfs["to_df"] = self._build_df()
+        return self._cached_dfs["to_df"].copy()
+
+    def expanded_df(self):
+        """
+        Return a DataFrame containing the depreciation parameters for
+        every year and asset, with values carried forward from the last
+        year in which they were set.
+        """
+        if "expanded_df" not in self._cached_dfs:
+            self._cached_dfs["expanded_df"] = self._build_expanded_df()
+        return self._cached_dfs["expanded_df"].copy()
+
+    def year_df(self, year):
+        """
+        Return the rows of expanded_df() for one year.
+
+        Args:
+            year (int): year of the depreciation parameters
+
+        Returns:
+            df (Pandas DataFrame): depreciation parameters for every
+                asset in `year`, empty if `year` is not a known year
+
+        """
+        if "year_dfs" not in self._cached_dfs:
+            df = self.expanded_df()
+            self._cached_dfs["year_dfs"] = {
+                y: year_df for y, year_df in df.groupby("year", sort=False)
+            }
+            self._cached_dfs["no_year_df"] = df.iloc[0:0]
+        year_df = self._cached_dfs["year_dfs"].get(
+            year, self._cached_dfs["no_year_df"]
+        )
+        return year_df.copy()
+
+    def _build_df(self):
+        """
+        Build the DataFrame returned by to_df().
+        """
         nested_dict = self.to_dict()
         # Prepare lists to collect data
         data = []
@@ -356,7 +820,10 @@ class DepreciationParams(paramtools.Parameters):
 
         return df
 
-    def expanded_df(self):
+    def _build_expanded_df(self):
+        """
+        Build the DataFrame returned by expanded_df().
+        """
         df = self.to_df()
         unique_bea_codes = df["BEA_code"].unique()
         years = self.label_grid["year"]
@@ -220,13 +220,16 @@ def calc_s_c_e(
     return s_c_e
 
 
-def calc_s(p):
+def calc_s(p, as_array=False):
     """
     Compute the after-tax rate of return to savers, s. Calls other
-    `calc_s_x_y` functions to compute various rates of return.
+    `calc_s_x_y` functions to compute various rates of return.  The
+    parameters may be arrays with leading scenario axes.
 
     Args:
         p (CCC Specification Object): model parameters
+        as_array (bool): whether to return s as an array rather than a
+            dictionary
 
     Returns:
         (tuple): return to savers and required return to pass-through
@@ -234,7 +237,10 @@ def calc_s(p):
 
             * s_dict (dict): dictionary of s for investments in
                 corporate and pass-through businesses and by type of
-                financing
+                financing, or if `as_array` an array with shape
+                (..., entity, financing), see stack_rates(), for
+                entity types 'c' and 'pt' and financing types 'mix',
+                'd' and 'e'
             * E_pt (scalar): required pre-tax return on pass-through
                 investments
 
@@ -314,6 +320,9 @@ def calc_s(p):
     # equity combined)
     s_pt = p.f_pt * s_pt_d + (1 - p.f_pt) * s_pt_e
     # Return the after-tax rates of return on all types of investments
+    if as_array:
+        s_array = stack_rates([[s_c, s_c_d, s_c_e], [s_pt, s_pt_d, s_pt_e]])
+        return s_array, E_pt
     s_dict = {
         "c": {"mix": s_c, "d": s_c_d, "e": s_c_e},
         "pt": {"mix": s_pt, "d": s_pt_d, "e": s_pt_e},
@@ -326,7 +335,12 @@ def calc_r(
     u, nominal_int_rate, inflation_rate, ace_int_rate, f, int_haircut, E, ace
 ):
     r"""
-    Compute firm nominal discount rates
+    Compute firm nominal discount rates.  The arguments are broadcast
+    together, so rates for all scenarios, entity types and financing
+    types are computed at once from arrays with shapes such as
+    (scenario, 1, 1) for the interest and inflation rates,
+    (scenario, entity, 1) for u, int_haircut, E and ace, and
+    (scenario, entity, financing) for f, see stack_rates().
 
     .. math::
         r_{m,j} = f_{m,j}\[i(1-(1-i_{hc})u_{j})] + (1-f_{m,j})
@@ -355,7 +369,8 @@ def calc_r(
 
 def calc_r_prime(nominal_int_rate, inflation_rate, f, E):
     r"""
-    Compute firm nominal, after-tax rates of return
+    Compute firm nominal, after-tax rates of return.  The arguments are
+    broadcast together, as in calc_r().
 
     .. math::
         r^{'}_{m,j} = f_{m,j}(i-\pi) + (1-f_{m,j})E_{j} + \pi
@@ -372,3 +387,28 @@ def calc_r_prime(nominal_int_rate, inflation_rate, f, E):
     r_prime = f * nominal_int_rate + (1 - f) * (E + inflation_rate)
 
     return r_prime
+
+
+def stack_rates(rates):
+    """
+    Stacks rates that differ by entity type, and possibly by financing
+    type, into one array, broadcasting any leading scenario axes of the
+    rates.
+
+    Args:
+        rates (list): rate for each entity type, or list of the rates
+            for each financing type for each entity type (array_like)
+
+    Returns:
+        rates_array (Numpy array): array with shape (..., entity) or
+            (..., entity, financing)
+    """
+    if isinstance(rates[0], (list, tuple)):
+        rates = [stack_rates(x) for x in rates]
+        return np.stack(np.broadcast_arrays(*rates), axis=-2)
+    rates_array = np.stack(
+        np.broadcast_arrays(*[np.asarray(x, dtype=float) for x in rates]),
+        axis=-1,
+    )
+
+    return rates_array
@@ -0,0 +1,1210 @@
+"""
+Cost-of-Capital-Calculator plots comparing baseline and reform
+Calculators.  Bokeh is only imported when this module is, so that
+importing ccc.calculator stays fast; the Calculator plotting methods
+import it when called.
+"""
+
+# CODING-STYLE CHECKS:
+# pycodestyle plots.py
+# pylint --disable=locally-disabled plots.py
+
+import pandas as pd
+from ccc.constants import VAR_DICT, OUTPUT_VAR_LIST
+from ccc.utils import diff_two_tables
+
+# importing Bokeh libraries
+from bokeh.plotting import figure
+from bokeh.transform import dodge
+from bokeh.models import (
+    ColumnDataSource,
+    CustomJS,
+    Title,
+    CustomJSTickFormatter,
+    BoxAnnotation,
+    HoverTool,
+    NumeralTickFormatter,
+    Span,
+    TabPanel,
+    Tabs,
+)
+from bokeh.models.widgets import RadioButtonGroup
+from bokeh.models.tickers import FixedTicker
+from bokeh.layouts import gridplot, column
+
+# import styles and callback
+from ccc.styles import PLOT_FORMATS, TITLE_FORMATS, RED, BLUE
+from ccc.controls_callback_script import CONTROLS_CALLBACK_SCRIPT
+
+
+def grouped_bar(
+    calc1,
+    calc2,
+    output_variable="mettr",
+    financing="mix",
+    group_by_asset=True,
+    corporate=True,
+    include_land=True,
+    include_inventories=True,
+    include_title=False,
+):
+    """
+    Create a grouped bar plot (grouped by major industry or major
+    asset group).
+
+    Args:
+        calc1 (CCC Calculator object): baseline
+        calc2 (CCC Calculator object): reform
+        other arguments: see Calculator.grouped_bar()
+
+    Returns:
+        p (Bokeh plot object): bar plot
+
+
+    """
+    assert financing in calc1.p_param("financing_list")
+    assert output_variable in OUTPUT_VAR_LIST
+    if group_by_asset:
+        base_df = calc1.calc_by_asset(
+            include_land=include_land,
+            include_inventories=include_inventories,
+        )
+        reform_df = calc2.calc_by_asset(
+            include_land=include_land,
+            include_inventories=include_inventories,
+        )
+        base_df.drop(
+            base_df[base_df.asset_name != base_df.major_asset_group].index,
+            inplace=True,
+        )
+        reform_df.drop(
+            reform_df[
+                reform_df.asset_name != reform_df.major_asset_group
+            ].index,
+            inplace=True,
+        )
+        plot_label = "major_asset_group"
+        plot_title = VAR_DICT[output_variable] + " by Asset Category"
+    else:
+        base_df = calc1.calc_by_industry(
+            include_land=include_land,
+            include_inventories=include_inventories,
+        )
+        reform_df = calc2.calc_by_industry(
+            include_land=include_land,
+            include_inventories=include_inventories,
+        )
+        base_df.drop(
+            base_df[base_df.Industry != base_df.major_industry].index,
+            inplace=True,
+        )
+        reform_df.drop(
+            reform_df[reform_df.Industry != reform_df.major_industry].index,
+            inplace=True,
+        )
+        plot_label = "major_industry"
+        plot_title = VAR_DICT[output_variable] + " by Industry"
+    # Append dfs together so base policies in one
+    base_df["policy"] = "Baseline"
+    reform_df["policy"] = "Reform"
+    df = pd.concat([base_df, reform_df])
+    # Drop corporate or non-corporate per arguments
+    if corporate:
+        df.drop(df[df.tax_treat == "non-corporate"].index, inplace=True)
+        plot_title = plot_title + " for Corporate Investments"
+    else:
+        df.drop(df[df.tax_treat == "corporate"].index, inplace=True)
+        plot_title = plot_title + " for Pass-Through Investments"
+    # Get mean overall for baseline and reform
+    mean_base = df[(df[plot_label] == "Overall") & (df.policy == "Baseline")][
+        output_variable + "_" + financing
+    ].values[0]
+    mean_reform = df[(df[plot_label] == "Overall") & (df.policy == "Reform")][
+        output_variable + "_" + financing
+    ].values[0]
+    # Drop overall means from df
+    df.drop(df[df[plot_label] == "Overall"].index, inplace=True)
+    # Drop extra vars and make wide format
+    df1 = df[[plot_label, output_variable + "_mix", "policy"]]
+    df2 = df1.pivot(
+        index=plot_label,
+        columns="policy",
+        values=output_variable + "_" + financing,
+    )
+    df2.reset_index(inplace=True)
+    # Create grouped barplot
+    source = ColumnDataSource(data=df2)
+
+    if not include_title:
+        plot_title = None
+    p = figure(
+        x_range=df2[plot_label],
+        height=350,
+        title=plot_title,
+        toolbar_location=None,
+        tools="",
+    )
+    p.vbar(
+        x=dodge(plot_label, 0.0, range=p.x_range),
+        top="Baseline",
+        width=0.2,
+        source=source,
+        color=BLUE,
+        legend_label="Baseline",
+    )
+    p.vbar(
+        x=dodge(plot_label, 0.25, range=p.x_range),
+        top="Reform",
+        width=0.2,
+        source=source,
+        color=RED,
+        legend_label="Reform",
+    )
+    p.x_range.range_padding = 0.1
+    p.xgrid.grid_line_color = None
+    p.legend.location = "top_left"
+    p.legend.orientation = "horizontal"
+    if not group_by_asset:
+        p.xaxis.major_label_orientation = 45
+        p.height = 800
+        p.width = 800
+
+    # Add lines for overall mean for baseline and reform
+    bline = Span(
+        location=mean_base,
+        dimension="width",
+        line_color=BLUE,
+        line_alpha=0.2,
+        line_width=2,
+        line_dash="dashed",
+    )
+    rline = Span(
+        location=mean_reform,
+        dimension="width",
+        line_color=RED,
+        line_alpha=0.2,
+        line_width=2,
+        line_dash="dashed",
+    )
+    p.renderers.extend([bline, rline])
+
+    return p
+
+
+def range_plot(
+    calc1,
+    calc2,
+    output_variable="mettr",
+    corporate=True,
+    include_land=True,
+    include_inventories=True,
+    include_title=False,
+):
+    """
+    Create a range plot.
+
+    Args:
+        calc1 (CCC Calculator object): baseline
+        calc2 (CCC Calculator object): reform
+        other arguments: see Calculator.range_plot()
+
+    Returns:
+        p (Bokeh plot object): bar plot
+
+
+    """
+    assert output_variable in OUTPUT_VAR_LIST
+    base_df = calc1.calc_by_asset(
+        include_land=include_land, include_inventories=include_inventories
+    )
+    reform_df = calc2.calc_by_asset(
+        include_land=include_land, include_inventories=include_inventories
+    )
+    base_df.drop(
+        base_df[
+            (base_df.asset_name != base_df.major_asset_group)
+            & (base_df.asset_name != "Overall")
+            & (base_df.asset_name != "Land")
+            & (base_df.asset_name != "Inventories")
+        ].index,
+        inplace=True,
+    )
+    reform_df.drop(
+        reform_df[
+            (reform_df.asset_name != reform_df.major_asset_group)
+            & (reform_df.asset_name != "Overall")
+            & (reform_df.asset_name != "Land")
+            & (reform_df.asset_name != "Inventories")
+        ].index,
+        inplace=True,
+    )
+    # Append dfs together so base policies in one
+    base_df["policy"] = "Baseline"
+    reform_df["policy"] = "Reform"
+    # Drop corporate or non-corporate per arguments
+    if corporate:
+        base_df.drop(
+            base_df[base_df.tax_treat == "non-corporate"].index,
+            inplace=True,
+        )
+        reform_df.drop(
+            reform_df[reform_df.tax_treat == "non-corporate"].index,
+            inplace=True,
+        )
+        plot_subtitle = "Corporate Investments"
+    else:
+        base_df.drop(
+            base_df[base_df.tax_treat == "corporate"].index, inplace=True
+        )
+        reform_df.drop(
+            reform_df[reform_df.tax_treat == "corporate"].index,
+            inplace=True,
+        )
+        plot_subtitle = "Pass-Through Investments"
+    dfs = [base_df, reform_df]
+    policy_list = ["baseline", "reform"]
+    # Create dictionary for source data
+    source_dict = {
+        "baseline": {
+            "mins": [],
+            "maxes": [],
+            "means": [],
+            "min_asset": [],
+            "max_asset": [],
+            "mean_asset": [],
+            "types": [
+                "Typically Financed",
+                "Debt Financed",
+                "Equity Financed",
+            ],
+            "positions": [-0.1, 0.9, 1.9],
+        },
+        "reform": {
+            "mins": [],
+            "maxes": [],
+            "means": [],
+            "min_asset": [],
+            "max_asset": [],
+            "mean_asset": [],
+            "types": [
+                "Typically Financed",
+                "Debt Financed",
+                "Equity Financed",
+            ],
+            "positions": [0.1, 1.1, 2.1],
+        },
+    }
+    for i, df in enumerate(dfs):
+        for fin in ("_mix", "_d", "_e"):
+            max_index = df[output_variable + fin].idxmax()
+            min_index = df[output_variable + fin].idxmin()
+            maxval = df.loc[max_index][output_variable + fin]
+            minval = df.loc[min_index][output_variable + fin]
+            minasset = df.loc[min_index]["asset_name"]
+            maxasset = df.loc[max_index]["asset_name"]
+            meanval = df[df.asset_name == "Overall"][
+                output_variable + fin
+            ].values[0]
+            meanasset = "Overall"
+
+            # put values in dictionary
+            source_dict[policy_list[i]]["mins"].append(minval)
+            source_dict[policy_list[i]]["maxes"].append(maxval)
+            source_dict[policy_list[i]]["means"].append(meanval)
+            source_dict[policy_list[i]]["min_asset"].append(minasset)
+            source_dict[policy_list[i]]["max_asset"].append(maxasset)
+            source_dict[policy_list[i]]["mean_asset"].append(meanasset)
+
+    base_source = ColumnDataSource(data=source_dict["baseline"])
+    reform_source = ColumnDataSource(data=source_dict["reform"])
+
+    # Create figure on which to plot
+    p = figure(
+        width=500,
+        height=500,
+        x_range=(-0.5, 2.5),
+        toolbar_location=None,
+        tools="",
+    )
+
+    # Format graph title and features
+    # Add title
+    if include_title:
+        p.add_layout(
+            Title(text=plot_subtitle, text_font_style="italic"), "above"
+        )
+        p.add_layout(
+            Title(text=VAR_DICT[output_variable], text_font_size="16pt"),
+            "above",
+        )
+    # p.title.text = plot_title
+    # p.title.align = 'center'
+    # p.title.text_font_size = '16pt'
+    p.title.text_font = "Helvetica"
+    p.xgrid.grid_line_color = None
+    p.ygrid.grid_line_color = None
+
+    # Format axis labels
+    p.xaxis.axis_label = "Method of Financing"
+    p.xaxis[0].ticker = FixedTicker(ticks=[0, 1, 2])
+    # Done as a custom function instead of a categorical axis because
+    # categorical axes do not work well with other features
+    p.xaxis.formatter = CustomJSTickFormatter(code="""
+        var types = ["Typically Financed", "Debt Financed", "Equity Financed"]
+        return types[tick]
+        """)
+    p.yaxis.axis_label = VAR_DICT[output_variable]
+    p.yaxis[0].formatter = NumeralTickFormatter(format="0%")
+
+    # Line separating positive and negative values
+    zline = Span(
+        location=0,
+        dimension="width",
+        line_alpha=0.2,
+        line_width=2,
+        line_dash="dashed",
+    )
+    p.renderers.extend([zline])
+
+    # Color different regions
+    standard_region = BoxAnnotation(
+        right=0.5, fill_alpha=0.2, fill_color="white"
+    )
+    debt_region = BoxAnnotation(
+        left=0.5, right=1.5, fill_alpha=0.1, fill_color="white"
+    )
+    equity_region = BoxAnnotation(left=1.5, fill_alpha=0.2, fill_color="white")
+
+    p.add_layout(standard_region)
+    p.add_layout(debt_region)
+    p.add_layout(equity_region)
+
+    # Draw baseline ranges onto graph
+    p.segment(
+        "positions",
+        "mins",
+        "positions",
+        "maxes",
+        color=BLUE,
+        line_width=2,
+        source=base_source,
+    )
+    # Add circles for means
+    p.scatter(
+        "positions",
+        "means",
+        size=12,
+        color=BLUE,
+        source=base_source,
+        legend_label="Baseline",
+    )
+    # Add circles for maxes and mins
+    p.scatter(
+        "positions",
+        "mins",
+        size=12,
+        color=BLUE,
+        source=base_source,
+        legend_label="Baseline",
+    )
+    p.scatter(
+        "positions",
+        "maxes",
+        size=12,
+        color=BLUE,
+        source=base_source,
+        legend_label="Baseline",
+    )
+
+    # Draw reformed ranges onto graph
+    p.segment(
+        "positions",
+        "mins",
+        "positions",
+        "maxes",
+        color=RED,
+        line_width=2,
+        source=reform_source,
+    )
+    # Add circles for means
+    p.scatter(
+        "positions",
+        "means",
+        size=12,
+        color=RED,
+        source=reform_source,
+        legend_label="Reform",
+    )
+    # Add circles for maxes and mins
+    p.scatter(
+        "positions",
+        "mins",
+        size=12,
+        color=RED,
+        source=reform_source,
+        legend_label="Reform",
+    )
+    p.scatter(
+        "positions",
+        "maxes",
+        size=12,
+        color=RED,
+        source=reform_source,
+        legend_label="Reform",
+    )
+
+    # Set legend location
+    p.legend.location = "bottom_right"
+
+    # Display rate and asset type when hovering over a glyph
+    # hover = HoverTool(
+    #         tooltips=[(output_variable, "@mins"),
+    #                     ("Asset",  "@min_asset")])
+    # p.add_tools(hover)
+
+    return p
+
+
+def bubble_widget(
+    calc1,
+    calc2,
+    output_variable="mettr",
+    include_land=False,
+    include_inventories=False,
+    include_IP=False,
+):
+    """
+    Create a bubble plot widget.
+
+    Args:
+        calc1 (CCC Calculator object): baseline
+        calc2 (CCC Calculator object): reform
+        other arguments: see Calculator.bubble_widget()
+
+    Returns:
+        layout (Bokeh Layout object): widget
+
+
+    """
+    assert output_variable in OUTPUT_VAR_LIST
+    base_df = calc1.calc_by_asset()
+    reform_df = calc2.calc_by_asset()
+    change_df = diff_two_tables(reform_df, base_df)
+
+    list_df = [base_df, change_df, reform_df]
+    list_string = ["base", "change", "reform"]
+
+    data_sources = {}
+    for i, df_i in enumerate(list_df):
+        for t in ["c", "pt"]:
+            if t == "c":
+                df = df_i.drop(df_i[df_i.tax_treat != "corporate"].index)
+            else:
+                df = df_i.drop(df_i[df_i.tax_treat != "non-corporate"].index)
+            # Remove data from Intellectual Property, Land, and
+            # Inventories Categories
+            if not include_land:
+                df.drop(df[df.asset_name == "Land"].index, inplace=True)
+            if not include_inventories:
+                df.drop(df[df.asset_name == "Inventories"].index, inplace=True)
+            if not include_IP:
+                df.drop(
+                    df[df.major_asset_group == "Intellectual Property"].index,
+                    inplace=True,
+                )
+            # define the size DataFrame, if change, use base sizes
+            if list_string[i] != "change":
+                SIZES = list(range(20, 80, 15))
+                size = pd.qcut(df["assets"].values, len(SIZES), labels=SIZES)
+                df["size"] = size
+            else:
+                df["size"] = size
+            # Form the two categories: Equipment and Structures
+            equipment_df = df.drop(
+                df[df.major_asset_group.str.contains("Structures")].index
+            ).copy()
+            equipment_df.drop(
+                equipment_df[
+                    equipment_df.major_asset_group.str.contains("Buildings")
+                ].index,
+                inplace=True,
+            )
+            # Drop overall category and overall equipment
+            equipment_df.drop(
+                equipment_df[equipment_df.asset_name == "Overall"].index,
+                inplace=True,
+            )
+            equipment_df.drop(
+                equipment_df[equipment_df.asset_name == "Equipment"].index,
+                inplace=True,
+            )
+            structure_df = df.drop(
+                df[
+                    ~df.major_asset_group.str.contains("Structures|Buildings")
+                ].index
+            ).copy()
+            # Drop value for all structures
+            structure_df.drop(
+                structure_df[structure_df.asset_name == "Structures"].index,
+                inplace=True,
+            )
+
+            # Output variables available in plot
+            format_fields = [
+                "metr_mix",
+                "metr_d",
+                "metr_e",
+                "mettr_mix",
+                "mettr_d",
+                "mettr_e",
+                "rho_mix",
+                "rho_d",
+                "rho_e",
+                "z_mix",
+                "z_d",
+                "z_e",
+            ]
+
+            # Make short category
+            make_short = {
+                "Instruments and Communications Equipment": "Instruments and Communications",
+                "Office and Residential Equipment": "Office and Residential",
+                "Other Equipment": "Other",
+                "Transportation Equipment": "Transportation",
+                "Other Industrial Equipment": "Other Industrial",
+                "Nonresidential Buildings": "Nonresidential Bldgs",
+                "Residential Buildings": "Residential Bldgs",
+                "Mining and Drilling Structures": "Mining and Drilling",
+                "Other Structures": "Other",
+                "Computers and Software": "Computers and Software",
+                "Industrial Machinery": "Industrial Machinery",
+            }
+
+            equipment_df["short_category"] = equipment_df["minor_asset_group"]
+            equipment_df["short_category"] = equipment_df[
+                "short_category"
+            ].replace(
+                make_short,
+            )
+            structure_df["short_category"] = structure_df["minor_asset_group"]
+            structure_df["short_category"] = structure_df[
+                "short_category"
+            ].replace(
+                make_short,
+            )
+
+            # Add the Reform and the Baseline to Equipment Asset
+            for f in format_fields:
+                equipment_copy = equipment_df.copy()
+                equipment_copy["rate"] = equipment_copy[f]
+                equipment_copy["hover"] = equipment_copy.apply(
+                    lambda x: "{0:.1f}%".format(x[f] * 100), axis=1
+                )
+                simple_equipment_copy = equipment_copy.filter(
+                    items=[
+                        "size",
+                        "rate",
+                        "hover",
+                        "short_category",
+                        "asset_name",
+                    ]
+                )
+                data_sources[list_string[i] + "_equipment_" + f + "_" + t] = (
+                    ColumnDataSource(simple_equipment_copy)
+                )
+
+            # Add the Reform and the Baseline to Structures Asset
+            for f in format_fields:
+                structure_copy = structure_df.copy()
+                structure_copy["rate"] = structure_copy[f]
+                structure_copy["hover"] = structure_copy.apply(
+                    lambda x: "{0:.1f}%".format(x[f] * 100), axis=1
+                )
+                simple_structure_copy = structure_copy.filter(
+                    items=[
+                        "size",
+                        "rate",
+                        "hover",
+                        "short_category",
+                        "asset_name",
+                    ]
+                )
+                data_sources[list_string[i] + "_structure_" + f + "_" + t] = (
+                    ColumnDataSource(simple_structure_copy)
+                )
+
+            # Create initial data sources to plot on load
+            if list_string[i] == "base" and t == "c":
+                equipment_copy = equipment_df.copy()
+                equipment_copy["rate"] = equipment_copy["mettr_mix"]
+                equipment_copy["hover"] = equipment_copy.apply(
+                    lambda x: "{0:.1f}%".format(x["mettr_mix"] * 100),
+                    axis=1,
+                )
+                simple_equipment_copy = equipment_copy.filter(
+                    items=[
+                        "size",
+                        "rate",
+                        "hover",
+                        "short_category",
+                        "asset_name",
+                    ]
+                )
+                data_sources["equip_source"] = ColumnDataSource(
+                    simple_equipment_copy
+                )
+
+                structure_copy = structure_df.copy()
+                structure_copy["rate"] = structure_copy["mettr_mix"]
+                structure_copy["hover"] = structure_copy.apply(
+                    lambda x: "{0:.1f}%".format(x["mettr_mix"] * 100),
+                    axis=1,
+                )
+                simple_structure_copy = structure_copy.filter(
+                    items=[
+                        "size",
+                        "rate",
+                        "hover",
+                        "short_category",
+                        "asset_name",
+                    ]
+                )
+                data_sources["struc_source"] = ColumnDataSource(
+                    simple_structure_copy
+                )
+
+    # Define categories for Equipments assets
+    equipment_assets = [
+        "Computers and Software",
+        "Instruments and Communications",
+        "Office and Residential",
+        "Transportation",
+        "Industrial Machinery",
+        "Other Industrial",
+        "Other",
+    ]
+
+    # Define categories for Structures assets
+    structure_assets = [
+        "Residential Bldgs",
+        "Nonresidential Bldgs",
+        "Mining and Drilling",
+        "Other",
+    ]
+
+    # Equipment plot
+    p = figure(
+        height=540,
+        width=990,
+        y_range=list(reversed(equipment_assets)),
+        tools="hover",
+        background_fill_alpha=0,
+        title="Marginal Effective Total Tax Rates on "
+        + "Corporate Investments in Equipment",
+    )
+    p.title.align = "center"
+    p.title.text_color = "#6B6B73"
+
+    hover = p.select(dict(type=HoverTool))
+    hover.tooltips = [("Asset", " @asset_name (@hover)")]
+
+    p.xaxis.axis_label = "Marginal effective total tax rate"
+    p.xaxis[0].formatter = NumeralTickFormatter(format="0.1%")
+
+    p.toolbar_location = None
+    p.min_border_right = 5
+
+    p.outline_line_width = 5
+    p.border_fill_alpha = 0
+    p.xaxis.major_tick_line_color = "firebrick"
+    p.xaxis.major_tick_line_width = 3
+    p.xaxis.minor_tick_line_color = "orange"
+
+    p.outline_line_width = 1
+    p.outline_line_alpha = 1
+    p.outline_line_color = "black"
+
+    p.scatter(
+        x="rate",
+        y="short_category",
+        color=BLUE,
+        size="size",
+        line_color="#333333",
+        fill_alpha=0.4,
+        source=data_sources["equip_source"],
+        alpha=0.4,
+    )
+
+    # Define and add a legend
+    legend_cds = ColumnDataSource(
+        {
+            "size": SIZES,
+            "label": ["<$20B", "", "", "<$1T"],
+            "x": [0, 0.15, 0.35, 0.6],
+        }
+    )
+    p_legend = figure(
+        height=150,
+        width=380,
+        x_range=(-0.075, 75),
+        title="Asset Amount",
+        tools="",
+    )
+    # p_legend.circle(y=None, x='x', size='size', source=legend_cds,
+    #                 color=BLUE, fill_alpha=.4, alpha=.4,
+    #                 line_color="#333333")
+    # l1 = LabelSet(y=None, x='x', text='label', x_offset=-20,
+    #               y_offset=-50, source=legend_cds)
+    # p_legend.add_layout(l1)
+    p_legend.axis.visible = False
+    p_legend.grid.grid_line_color = None
+    # p_legend.toolbar.active_drag = None
+
+    # data_sources['equip_plot'] = p
+
+    # Structures plot
+    p2 = figure(
+        height=540,
+        width=990,
+        y_range=list(reversed(structure_assets)),
+        tools="hover",
+        background_fill_alpha=0,
+        title="Marginal Effective Total Tax Rates on "
+        + "Corporate Investments in Structures",
+    )
+    p2.title.align = "center"
+    p2.title.text_color = "#6B6B73"
+
+    hover = p2.select(dict(type=HoverTool))
+    hover.tooltips = [("Asset", " @asset_name (@hover)")]
+    p2.xaxis.axis_label = "Marginal effective total tax rate"
+    p2.xaxis[0].formatter = NumeralTickFormatter(format="0.1%")
+    p2.toolbar_location = None
+    p2.min_border_right = 5
+    p2.outline_line_width = 0
+    p2.border_fill_alpha = 0
+
+    p2.xaxis.major_tick_line_color = "firebrick"
+    p2.xaxis.major_tick_line_width = 3
+    p2.xaxis.minor_tick_line_color = "orange"
+
+    p2.scatter(
+        x="rate",
+        y="short_category",
+        color=RED,
+        size="size",
+        line_color="#333333",
+        fill_alpha=0.4,
+        source=data_sources["struc_source"],
+        alpha=0.4,
+    )
+
+    p2.outline_line_width = 1
+    p2.outline_line_alpha = 1
+    p2.outline_line_color = "black"
+
+    # Define and add a legend
+    p2_legend = figure(
+        height=150,
+        width=380,
+        x_range=(-0.075, 0.75),
+        title="Asset Amount",
+        tools="",
+    )
+    # p2_legend.circle(y=None, x='x', size='size', source=legend_cds,
+    #                  color=RED, fill_alpha=.4, alpha=.4,
+    #                  line_color="#333333")
+    # l2 = LabelSet(y=None, x='x', text='label', x_offset=-20,
+    #               y_offset=-50, source=legend_cds)
+    # p2_legend.add_layout(l2)
+    p2_legend.axis.visible = False
+    p2_legend.grid.grid_line_color = None
+    # p2_legend.toolbar.active_drag = None
+
+    # add buttons
+    controls_callback = CustomJS(
+        args=data_sources, code=CONTROLS_CALLBACK_SCRIPT
+    )
+    c_pt_buttons = RadioButtonGroup(
+        labels=["Corporate", "Noncorporate"], active=0
+    )
+    c_pt_buttons.js_on_change("value", controls_callback)
+    controls_callback.args["c_pt_buttons"] = c_pt_buttons
+    format_buttons = RadioButtonGroup(
+        labels=["Baseline", "Reform", "Change"], active=0
+    )
+    format_buttons.js_on_change("value", controls_callback)
+    controls_callback.args["format_buttons"] = format_buttons
+    interest_buttons = RadioButtonGroup(
+        labels=["METTR", "METR", "Cost of Capital", "NPV of Depreciation"],
+        active=0,
+        width=700,
+    )
+    interest_buttons.js_on_change("value", controls_callback)
+    controls_callback.args["interest_buttons"] = interest_buttons
+    type_buttons = RadioButtonGroup(
+        labels=["Typically Financed", "Equity Financed", "Debt Financed"],
+        active=0,
+        width=700,
+    )
+    type_buttons.js_on_change("value", controls_callback)
+    controls_callback.args["type_buttons"] = type_buttons
+
+    # Create Tabs
+    tab = TabPanel(child=column([p, p_legend]), title="Equipment")
+    tab2 = TabPanel(child=column([p2, p2_legend]), title="Structures")
+    tabs = Tabs(tabs=[tab, tab2])
+    layout = gridplot(
+        children=[
+            [tabs],
+            [c_pt_buttons, interest_buttons],
+            [format_buttons, type_buttons],
+        ]
+    )
+    # layout = gridplot([p, p2], ncols=2, width=250, height=250)
+    # doc = curdoc()
+    # doc.add_root(layout)
+
+    # Create components
+    # js, div = components(layout)
+    # cdn_js = CDN.js_files[0]
+    # cdn_css = CDN.css_files[0]
+
+    # Set up an application
+    # from bokeh.application.handlers import FunctionHandler
+    # from bokeh.application import Application
+    # # handler = FunctionHandler(doc)
+    # # app = Application(handler)
+    # app = Application(doc)
+
+    return layout
+
+
+def asset_bubble(
+    calc1,
+    calc2,
+    output_variable="mettr_mix",
+    include_inventories=False,
+    include_land=False,
+    include_IP=False,
+    include_title=False,
+    path="",
+):
+    """
+    Create a bubble plot of the value of the output variable by
+    asset type.
+
+    Args:
+        calc1 (CCC Calculator object): baseline
+        calc2 (CCC Calculator object): reform
+        other arguments: see Calculator.asset_bubble()
+
+    Returns:
+        tabs (Bokeh Tabs object): bubble plots
+
+
+    """
+    # Load data as DataFrame
+    df = calc1.calc_by_asset()
+    # Keep only corporate
+    df.drop(df[df.tax_treat != "corporate"].index, inplace=True)
+    # Remove data from Intellectual Property, Land, and
+    # Inventories Categories
+    if not include_land:
+        df.drop(df[df.asset_name == "Land"].index, inplace=True)
+    if not include_inventories:
+        df.drop(df[df.asset_name == "Inventories"].index, inplace=True)
+    if not include_IP:
+        df.drop(
+            df[df.major_asset_group == "Intellectual Property"].index,
+            inplace=True,
+        )
+
+    # define the size DataFrame
+    SIZES = list(range(20, 80, 15))
+    df["size"] = pd.qcut(df["assets"].values, len(SIZES), labels=SIZES)
+
+    # Form the two Categories: Equipment and Structures
+    equipment_df = df.drop(
+        df[df.minor_asset_group.str.contains("Structures")].index
+    ).copy()
+    equipment_df.drop(
+        equipment_df[
+            equipment_df.minor_asset_group.str.contains("Buildings")
+        ].index,
+        inplace=True,
+    )
+    # Drop overall category and overall equipment
+    equipment_df.drop(
+        equipment_df[equipment_df.asset_name == "Overall"].index,
+        inplace=True,
+    )
+    equipment_df.drop(
+        equipment_df[equipment_df.asset_name == "Equipment"].index,
+        inplace=True,
+    )
+    structure_df = df.drop(
+        df[~df.minor_asset_group.str.contains("Structures|Buildings")].index
+    ).copy()
+
+    # Make short category
+    make_short = {
+        "Instruments and Communications Equipment": "Instruments and Communications",
+        "Office and Residential Equipment": "Office and Residential",
+        "Other Equipment": "Other",
+        "Transportation Equipment": "Transportation",
+        "Other Industrial Equipment": "Other Industrial",
+        "Nonresidential Buildings": "Nonresidential Bldgs",
+        "Residential Buildings": "Residential Bldgs",
+        "Mining and Drilling Structures": "Mining and Drilling",
+        "Other Structures": "Other",
+        "Computers and Software": "Computers and Software",
+        "Industrial Machinery": "Industrial Machinery",
+    }
+
+    equipment_df["short_category"] = equipment_df["minor_asset_group"]
+    equipment_df.replace(
+        {"short_category": make_short}, regex=True, inplace=True
+    )
+    structure_df["short_category"] = structure_df["minor_asset_group"]
+    structure_df.replace(
+        {"short_category": make_short}, regex=True, inplace=True
+    )
+    # Set up datasources
+    data_sources = {}
+    # Add the Reform and the Baseline to Equipment Asset
+    equipment_copy = equipment_df.copy()
+    equipment_copy["baseline"] = equipment_copy[output_variable]
+    equipment_copy["hover"] = (
+        equipment_copy[output_variable]
+        .astype(str)
+        .apply(lambda x: "{:.2}%".format(x))
+    )
+    data_sources["equipment_" + output_variable] = ColumnDataSource(
+        equipment_copy[
+            [
+                "baseline",
+                "size",
+                "hover",
+                "assets",
+                "short_category",
+                "asset_name",
+            ]
+        ]
+    )
+
+    # A spacer for the y-axis label
+    fudge_factor = "                          "
+
+    # Add the Reform and the Baseline to Structures Asset
+    structure_copy = structure_df.copy()
+    structure_copy["baseline"] = structure_copy[output_variable]
+    # structure_copy['hover'] = structure_copy.apply(
+    #     lambda x: "{0:.1f}%".format(x[f] * 100), axis=1)
+    structure_copy["hover"] = structure_copy.astype(str).apply(
+        lambda x: "{0:.1}%".format(x[output_variable]), axis=1
+    )
+    structure_copy["short_category"] = structure_copy[
+        "short_category"
+    ].str.replace("Residential Bldgs", fudge_factor + "Residential Bldgs")
+    data_sources["structure_" + output_variable] = ColumnDataSource(
+        structure_copy[
+            [
+                "baseline",
+                "size",
+                "hover",
+                "assets",
+                "short_category",
+                "asset_name",
+            ]
+        ]
+    )
+
+    # Define categories for Equipments assets
+    equipment_assets = [
+        "Computers and Software",
+        "Instruments and Communications",
+        "Office and Residential",
+        "Transportation",
+        "Industrial Machinery",
+        "Other Industrial",
+        "Other",
+    ]
+
+    # Define categories for Structures assets
+    structure_assets = [
+        "Residential Bldgs",
+        "Nonresidential Bldgs",
+        "Mining and Drilling",
+        "Other",
+    ]
+
+    # Equipment plot
+    p = figure(
+        height=540,
+        width=990,
+        x_range=(-0.05, 0.51),
+        y_range=list(reversed(equipment_assets)),
+        # x_axis_location="above",
+        # toolbar_location=None,
+        tools="hover",
+        background_fill_alpha=0,
+        # change things on all axes
+        **PLOT_FORMATS,
+    )
+    if include_title:
+        p.add_layout(
+            Title(
+                text=(
+                    "Marginal Effective Tax Rates on Corporate Investments"
+                    + " in Equipment"
+                ),
+                **TITLE_FORMATS,
+            ),
+            "above",
+        )
+
+    hover = p.select(dict(type=HoverTool))
+    hover.tooltips = [("Asset", " @asset_name (@hover)")]
+
+    # source = data_sources['equipment_' + output_variable]
+
+    # Format axes
+    p.xaxis.axis_label = "Marginal Effective Tax Rate"
+    p.xaxis[0].formatter = NumeralTickFormatter(format="0.1%")
+    # p.yaxis.axis_label = "Equipment"
+    p.toolbar_location = None
+    p.min_border_right = 5
+    # p.min_border_bottom = -10
+    p.outline_line_width = 5
+    p.border_fill_alpha = 0
+    p.xaxis.major_tick_line_color = "firebrick"
+    p.xaxis.major_tick_line_width = 3
+    p.xaxis.minor_tick_line_color = "orange"
+    p.outline_line_width = 1
+    p.outline_line_alpha = 1
+    p.outline_line_color = "black"
+
+    p.scatter(
+        x="baseline",
+        y="short_category",
+        color=BLUE,
+        size="size",
+        line_color="#333333",
+        line_alpha=0.1,
+        fill_alpha=0.4,
+        source=ColumnDataSource(
+            data_sources["equipment_" + output_variable].data
+        ),
+        alpha=0.4,
+    )
+
+    # Define and add a legend
+    legend_cds = ColumnDataSource(
+        {
+            "size": SIZES,
+            "label": ["<$20B", "", "", "<$1T"],
+            "x": [0, 0.15, 0.35, 0.6],
+        }
+    )
+    p_legend = figure(
+        height=150,
+        width=380,
+        x_range=(-0.075, 75),
+        title="Asset Amount",
+        tools="",
+    )
+    # p_legend.circle(y=None, x='x', size='size', source=legend_cds,
+    #                 color=BLUE, fill_alpha=.4, alpha=.4,
+    #                 line_color="#333333")
+    # l1 = LabelSet(y=None, x='x', text='label', x_offset=-20,
+    #               y_offset=-50, source=legend_cds)
+    # p_legend.add_layout(l1)
+    p_legend.axis.visible = False
+    p_legend.grid.grid_line_color = None
+    p_legend.toolbar.active_drag = None
+
+    # Style the tools
+    # p.add_tools(WheelZoomTool(), ResetTool(), SaveTool())
+    # p.toolbar_location = "right"
+    # p.toolbar.logo = None
+
+    # Structures plot
+    p2 = figure(
+        height=540,
+        width=990,
+        x_range=(-0.05, 0.51),
+        y_range=list(reversed(structure_assets)),
+        # toolbar_location=None,
+        tools="hover",
+        background_fill_alpha=0,
+        **PLOT_FORMATS,
+    )
+    p2.add_layout(
+        Title(
+            text=(
+                "Marginal Effective Tax Rates on Corporate "
+                + "Investments in Structures"
+            ),
+            **TITLE_FORMATS,
+        ),
+        "above",
+    )
+
+    hover = p2.select(dict(type=HoverTool))
+    hover.tooltips = [("Asset", " @asset_name (@hover)")]
+    # Format axes
+    p2.xaxis.axis_label = "Marginal Effective Tax Rate"
+    p2.xaxis[0].formatter = NumeralTickFormatter(format="0.1%")
+    # p2.yaxis.axis_label = "Structures"
+    p2.toolbar_location = None
+    p2.min_border_right = 5
+    # p2.min_border_top = -13
+    p2.outline_line_width = 0
+    p2.border_fill_alpha = 0
+    p2.xaxis.major_tick_line_color = "firebrick"
+    p2.xaxis.major_tick_line_width = 3
+    p2.xaxis.minor_tick_line_color = "orange"
+
+    p2.scatter(
+        x="baseline",
+        y="short_category",
+        color=RED,
+        size="size",
+        line_color="#333333",
+        # line_alpha=.1,
+        fill_alpha=0.4,
+        source=ColumnDataSource(
+            data_sources["structure_" + output_variable].data
+        ),
+        alpha=0.4,
+    )
+
+    p2.outline_line_width = 1
+    p2.outline_line_alpha = 1
+    p2.outline_line_color = "black"
+
+    # Define and add a legend
+    p2_legend = figure(
+        height=150,
+        width=380,
+        x_range=(-0.075, 0.75),
+        title="Asset Amount",
+        tools="",
+    )
+    # p2_legend.circle(y=None, x='x', size='size', source=legend_cds,
+    #                  color=RED, fill_alpha=.4, alpha=.4,
+    #                  line_color="#333333")
+    # l2 = LabelSet(y=None, x='x', text='label', x_offset=-20,
+    #               y_offset=-50, source=legend_cds)
+    # p2_legend.add_layout(l2)
+    p2_legend.axis.visible = False
+    p2_legend.grid.grid_line_color = None
+    p2_legend.toolbar.active_drag = None
+
+    # Create Tabs
+    tab = TabPanel(child=column([p, p_legend]), title="Equipment")
+    tab2 = TabPanel(child=column([p2, p2_legend]), title="Structures")
+    tabs = Tabs(tabs=[tab, tab2])
+
+    return tabs
@@ -0,0 +1,14 @@
+import pytest
+from ccc.utils import CACHE_DIR_ENV_VAR
+
+
+@pytest.fixture(scope="session", autouse=True)
+def cache_dir(tmp_path_factory):
+    """
+    Keep the on-disk caches of a test run, see utils.get_cache_dir(),
+    in a temporary directory rather than the user's home directory
+    """
+    with pytest.MonkeyPatch.context() as mp:
+        path = tmp_path_factory.mktemp("ccc_cache")
+        mp.setenv(CACHE_DIR_ENV_VAR, str(path))
+        yield path
@@ -403,6 +403,75 @@ def test_npv_tax_depr(df, r, pi, land_expensing, expected_df):
     assert_series_equal(test_df, expected_df)
 
 
+def test_npv_tax_depr_numpy(monkeypatch):
+    """
+    Test that npv_tax_depr() gives the same results without numba
+    """
+    expected_val = cf.npv_tax_depr(df.copy(), 0.05, 0.02, 0.0)
+    monkeypatch.setattr(cf, "_npv_tax_depr_kernel", lambda: None)
+    test_val = cf.npv_tax_depr(df.copy(), 0.05, 0.02, 0.0)
+    assert_series_equal(test_val, expected_val)
+
+
+@pytest.mark.parametrize(
+    "dtype", [object, "category"], ids=["object", "categorical"]
+)
+def test_depr_method_codes(dtype):
+    """
+    Test of the depr_method_codes() function
+    """
+    method = pd.Series(
+        ["DB 200%", "SL", "Economic", "Expensing", "SL", None, "Bad"],
+        dtype=dtype,
+    )
+    asset_name = pd.Series(
+        ["a", "b", "c", "d", "Land", "Inventories", "e"], dtype=dtype
+    )
+    test_val = cf.depr_method_codes(method, asset_name)
+    assert np.array_equal(test_val, [1, 2, 3, 5, 6, 7, 0])
+    asset_code = cf.asset_codes(asset_name)
+    assert np.array_equal(asset_code, [0, 0, 0, 0, 6, 7, 0])
+    test_val = cf.depr_method_codes(method, asset_code=asset_code)
+    assert np.array_equal(test_val, [1, 2, 3, 5, 6, 7, 0])
+
+
+def test_npv_tax_depr_codes(monkeypatch):
+    """
+    Test that npv_tax_depr() gives the same results with the method
+    codes given, with and without numba
+    """
+    expected_val = cf.npv_tax_depr(df.copy(), 0.05, 0.02, 0.0)
+    code = cf.depr_method_codes(df["method"], df["asset_name"])
+    test_val = cf.npv_tax_depr(df.copy(), 0.05, 0.02, 0.0, code=code)
+    assert_series_equal(test_val, expected_val)
+    monkeypatch.setattr(cf, "_npv_tax_depr_kernel", lambda: None)
+    test_val = cf.npv_tax_depr(df.copy(), 0.05, 0.02, 0.0, code=code)
+    assert_series_equal(test_val, expected_val)
+
+
+def test_npv_tax_depr_array():
+    """
+    Test that npv_tax_depr_array() matches npv_tax_depr() for each row
+    of parameters
+    """
+    r_array = np.array([[0.05], [0.07]])
+    test_val = cf.npv_tax_depr_array(
+        df["method"].values,
+        df["asset_name"].values,
+        df["Y"].values,
+        df["b"].values,
+        df["bonus"].values,
+        df["delta"].values,
+        r_array,
+        0.02,
+        0.0,
+    )
+    assert test_val.shape == (2, len(df.index))
+    for i in range(2):
+        expected_val = cf.npv_tax_depr(df.copy(), r_array[i, 0], 0.02, 0.0)
+        assert np.allclose(test_val[i, :], expected_val)
+
+
 delta = np.array([0.1, 0.1, 0.1, 0.1, 0.1, 0.1])
 z = np.array([0.1, 0, 0.5, 1, 0.55556, 0.8])
 w = np.array([0.01, 0.01, 0.01, 0.01, 0.01, 0.01])
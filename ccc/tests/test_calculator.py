@@ -1,9 +1,15 @@
+import copy
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
 import pytest
 import pandas as pd
 import numpy as np
 from ccc.parameters import Specification, DepreciationParams
 from ccc.data import Assets
 from ccc.calculator import Calculator
+import ccc.calculator
+import ccc.data
 import os
 
 CURRENT_PATH = os.path.abspath(os.path.dirname(__file__))
@@ -44,6 +50,26 @@ def test_Calculator_exception3():
         assert Calculator(p=p, dp=dp)
 
 
+def test_import_is_lazy():
+    """
+    Test that importing ccc.calculator does not import Bokeh or
+    Tax-Calculator, which are only needed for plots and for computing
+    marginal tax rates
+    """
+    code = (
+        "import sys, ccc.calculator; "
+        "print([m for m in ['bokeh', 'taxcalc'] if m in sys.modules])"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=os.path.join(CURRENT_PATH, "..", ".."),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "[]"
+
+
 def test_calc_other():
     """
     Test calc_other method
@@ -75,6 +101,89 @@ def test_calc_base():
     assert "rho_mix" in calc_base_df.keys()
 
 
+def test_calculator_shares_assets():
+    """
+    Test that a Calculator shares the asset data it is given rather
+    than copying it, and never modifies it
+    """
+    assets = Assets()
+    expected_df = assets.df.copy()
+    p = Specification()
+    dp = DepreciationParams()
+    calc = Calculator(p, dp, assets)
+    calc.calc_all()
+    calc_df = calc._Calculator__assets.df
+    assert np.shares_memory(
+        calc_df["assets"].to_numpy(), assets.df["assets"].to_numpy()
+    )
+    pd.testing.assert_frame_equal(assets.df, expected_df)
+
+
+def test_calculator_copies_assets(monkeypatch):
+    """
+    Test that a Calculator copies the asset data it is given when
+    pandas copy-on-write is not in effect
+    """
+    monkeypatch.setattr(ccc.data, "copy_on_write", lambda: False)
+    assets = Assets()
+    p = Specification()
+    dp = DepreciationParams()
+    calc = Calculator(p, dp, assets)
+    calc_df = calc._Calculator__assets.df
+    assert not np.shares_memory(
+        calc_df["assets"].to_numpy(), assets.df["assets"].to_numpy()
+    )
+    pd.testing.assert_frame_equal(calc_df, assets.df)
+
+
+def test_calculator_shares_row_codes(monkeypatch):
+    """
+    Test that the Calculators made from one Assets object share its row
+    codes, which are only found once
+    """
+    calls = []
+    asset_codes = ccc.data.asset_codes
+
+    def count_asset_codes(asset_name):
+        calls.append(1)
+        return asset_codes(asset_name)
+
+    monkeypatch.setattr(ccc.data, "asset_codes", count_asset_codes)
+    assets = Assets()
+    p = Specification()
+    dp = DepreciationParams()
+    calcs = [Calculator(p, dp, assets) for _ in range(3)]
+    codes = assets.row_codes()
+    for calc in calcs[:2]:
+        calc_codes = calc._Calculator__assets.row_codes()
+        assert calc_codes["asset_code"] is codes["asset_code"]
+    for calc in calcs:
+        calc.calc_base()
+    assert len(calls) == 1
+
+
+def test_calculator_row_order():
+    """
+    Test that a Calculator gives the same results when the asset data
+    are not ordered by tax treatment, before and after a revision
+    """
+    assets = Assets()
+    reversed_assets = Assets(data=assets.df.iloc[::-1].reset_index(drop=True))
+    p = Specification()
+    dp = DepreciationParams()
+    calc = Calculator(p, dp, assets)
+    reversed_calc = Calculator(p, dp, reversed_assets)
+    for revision in [{}, {"CIT_rate": 0.3, "inventory_expensing": True}]:
+        calc.update_specification(revision)
+        reversed_calc.update_specification(revision)
+        pd.testing.assert_frame_equal(
+            reversed_calc.calc_by_asset(
+                include_land=False, include_inventories=False
+            ),
+            calc.calc_by_asset(include_land=False, include_inventories=False),
+        )
+
+
 def test_calc_all():
     """
     Test calc_all method
@@ -94,6 +203,236 @@ def test_calc_all():
     assert "eatr_mix" in calc_all_df.keys()
 
 
+def test_calc_batch():
+    """
+    Test that calc_batch method gives the same results as calc_all for
+    each revision
+    """
+    assets = Assets()
+    p = Specification()
+    dp = DepreciationParams()
+    calc = Calculator(p, dp, assets)
+    revisions = [
+        {},
+        {"CIT_rate": 0.35, "BonusDeprec_5yr": 1.0},
+        {"inv_tax_credit": 0.1, "land_expensing": 0.5},
+        {"inventory_expensing": True},
+    ]
+    batch_df = calc.calc_batch(revisions)
+    assert list(batch_df["scenario"].unique()) == [0, 1, 2, 3]
+    for i, revision in enumerate(revisions):
+        p2 = Specification()
+        p2.update_specification(revision)
+        calc2 = Calculator(p2, dp, assets)
+        calc2.calc_all()
+        expected_df = calc2._Calculator__assets.df.drop_duplicates(
+            ["tax_treat", "bea_asset_code"]
+        )
+        test_df = batch_df[batch_df["scenario"] == i].merge(
+            expected_df,
+            on=["tax_treat", "bea_asset_code"],
+            suffixes=("", "_expected"),
+        )
+        assert len(test_df.index) == len(expected_df.index)
+        for var in ["z_mix", "rho_mix", "metr_d", "mettr_e", "eatr_mix"]:
+            assert np.allclose(
+                test_df[var], test_df[var + "_expected"], equal_nan=True
+            )
+
+
+def test_calc_batch_grid():
+    """
+    Test that calc_batch method evaluates all combinations in a grid
+    """
+    assets = Assets()
+    p = Specification()
+    dp = DepreciationParams()
+    calc = Calculator(p, dp, assets)
+    grid = {"CIT_rate": [0.21, 0.28], "BonusDeprec_3yr": [0.0, 0.5, 1.0]}
+    batch_df = calc.calc_batch(grid)
+    assert batch_df["scenario"].nunique() == 6
+    assert np.allclose(
+        batch_df.groupby("scenario")["assets"].sum(),
+        assets.df.loc[
+            assets.df["tax_treat"].isin(["corporate", "non-corporate"]),
+            "assets",
+        ].sum(),
+    )
+
+
+def test_calc_by_year():
+    """
+    Test that calc_by_year method gives the same results as calc_all
+    with a Specification for each year
+    """
+    assets = Assets()
+    p = Specification()
+    dp = DepreciationParams()
+    calc = Calculator(p, dp, assets)
+    years = [2017, 2018, 2025]
+    year_df = calc.calc_by_year(years)
+    assert list(year_df["year"].unique()) == years
+    for year in years:
+        calc2 = Calculator(Specification(year=year), dp, assets)
+        calc2.calc_all()
+        expected_df = calc2._Calculator__assets.df.drop_duplicates(
+            ["tax_treat", "bea_asset_code"]
+        )
+        test_df = year_df[year_df["year"] == year].merge(
+            expected_df,
+            on=["tax_treat", "bea_asset_code"],
+            suffixes=("", "_expected"),
+        )
+        assert len(test_df.index) == len(expected_df.index)
+        for var in ["bonus", "z_mix", "rho_mix", "metr_d", "eatr_e"]:
+            assert np.allclose(
+                test_df[var], test_df[var + "_expected"], equal_nan=True
+            )
+
+
+def test_calc_sensitivity():
+    """
+    Test that calc_sensitivity method gives the derivatives found by
+    evaluating Calculators at two values of a parameter
+    """
+    assets = Assets()
+    p = Specification()
+    dp = DepreciationParams()
+    calc = Calculator(p, dp, assets)
+    sens_df = calc.calc_sensitivity(
+        ["CIT_rate", "BonusDeprec_3yr"], aggregate=True
+    )
+    tax_treats = ["corporate", "non-corporate", "all"]
+    assert list(sens_df["tax_treat"]) == tax_treats * 2
+    h = 0.001
+    overall = []
+    for value in [p.CIT_rate[0] - h, p.CIT_rate[0] + h]:
+        p2 = Specification()
+        p2.update_specification({"CIT_rate": value})
+        df = Calculator(p2, dp, assets).calc_by_asset()
+        overall.append(
+            df[(df["asset_name"] == "Overall")].set_index("tax_treat")
+        )
+    expected = (overall[1]["mettr_mix"] - overall[0]["mettr_mix"]) / (2 * h)
+    test_df = sens_df[sens_df["param"] == "CIT_rate"].set_index("tax_treat")
+    assert np.allclose(
+        test_df.loc[["corporate", "non-corporate"], "mettr_mix"],
+        expected.loc[["corporate", "non-corporate"]],
+        rtol=1e-4,
+    )
+    asset_df = calc.calc_sensitivity("inflation_rate")
+    assert (asset_df["param"] == "inflation_rate").all()
+    assert "eatr_e" in asset_df.keys()
+    with pytest.raises(ValueError):
+        calc.calc_sensitivity("inventory_expensing")
+
+
+def test_solve_for():
+    """
+    Test that solve_for method finds the CIT rate that gives the
+    overall corporate METTR under a known CIT rate
+    """
+    assets = Assets()
+    dp = DepreciationParams()
+    p = Specification()
+    p.update_specification({"CIT_rate": 0.25})
+    df = Calculator(p, dp, assets).calc_by_asset()
+    target = df[
+        (df["asset_name"] == "Overall") & (df["tax_treat"] == "corporate")
+    ]["mettr_mix"].values[0]
+    calc = Calculator(Specification(), dp, assets)
+    value = calc.solve_for(
+        "CIT_rate",
+        "mettr_mix",
+        target,
+        aggregation="corporate",
+        bounds=(0.1, 0.5),
+    )
+    assert np.allclose(value, 0.25)
+    # METTR is not finite at a CIT rate of 100 percent
+    with pytest.raises(ValueError):
+        calc.solve_for("CIT_rate", "mettr_mix", target)
+    with pytest.raises(ValueError):
+        calc.solve_for("CIT_rate", "mettr_mix", 2.0, bounds=(0.1, 0.5))
+
+
+def test_calc_monte_carlo():
+    """
+    Test that calc_monte_carlo method gives the means over draws of the
+    results of calc_batch and calc_by_asset
+    """
+    assets = Assets()
+    p = Specification()
+    dp = DepreciationParams()
+    calc = Calculator(p, dp, assets)
+    draws = np.linspace(0.01, 0.04, 5)
+    mc_df = calc.calc_monte_carlo(
+        {"inflation_rate": draws, "E_c": ("uniform", 0.06, 0.08)},
+        5,
+        chunk_size=2,
+        seed=1,
+    )
+    e_c = np.random.default_rng(1).uniform(0.06, 0.08, 5)
+    batch_df = calc.calc_batch(
+        [{"inflation_rate": x, "E_c": y} for x, y in zip(draws, e_c)]
+    )
+    expected = batch_df.groupby(["bea_asset_code", "tax_treat"])[
+        "metr_mix"
+    ].agg(["mean", "min", "max"])
+    test_df = mc_df[mc_df["variable"] == "metr_mix"].set_index(
+        ["bea_asset_code", "tax_treat"]
+    )
+    assert (test_df["count"] == 5).all()
+    for stat in ["mean", "min", "max"]:
+        assert np.allclose(
+            test_df[stat], expected.loc[test_df.index, stat], equal_nan=True
+        )
+    agg_df = calc.calc_monte_carlo(
+        {"inflation_rate": draws},
+        5,
+        by=["tax_treat"],
+        variables=["mettr_mix"],
+        include_land=False,
+    )
+    overall = []
+    for x in draws:
+        p2 = Specification()
+        p2.update_specification({"inflation_rate": x})
+        df = Calculator(p2, dp, assets).calc_by_asset(include_land=False)
+        overall.append(df[df["asset_name"] == "Overall"])
+    expected = pd.concat(overall).groupby("tax_treat")["mettr_mix"].mean()
+    assert np.allclose(agg_df["mean"], expected.loc[agg_df["tax_treat"]])
+    assert (agg_df["p5"] <= agg_df["p50"]).all()
+    with pytest.raises(ValueError):
+        calc.calc_monte_carlo({"inflation_rate": draws}, 4)
+    with pytest.raises(ValueError):
+        calc.calc_monte_carlo(
+            {"inflation_rate": draws}, 5, variables=["metr_x"]
+        )
+
+
+def test_calc_monte_carlo_chunk_size():
+    """
+    Test that calc_monte_carlo method gives the quantiles of the results
+    of calc_batch when each draw is evaluated in its own chunk
+    """
+    assets = Assets()
+    p = Specification()
+    dp = DepreciationParams()
+    calc = Calculator(p, dp, assets)
+    draws = np.linspace(0.0, 0.04, 41)
+    mc_df = calc.calc_monte_carlo(
+        {"inflation_rate": draws}, 41, variables=["metr_mix"], chunk_size=1
+    )
+    batch_df = calc.calc_batch([{"inflation_rate": x} for x in draws])
+    grouped = batch_df.groupby(["bea_asset_code", "tax_treat"])["metr_mix"]
+    test_df = mc_df.set_index(["bea_asset_code", "tax_treat"])
+    spread = (grouped.max() - grouped.min()).loc[test_df.index]
+    for q, stat in [(0.05, "p5"), (0.5, "p50"), (0.95, "p95")]:
+        expected = grouped.quantile(q).loc[test_df.index]
+        assert np.all(np.abs(test_df[stat] - expected) <= spread / 50 + 1e-12)
+
+
 @pytest.mark.parametrize(
     "include_land,include_inventories",
     [(False, False), (True, True)],
@@ -132,6 +471,24 @@ def test_calc_by_industry(include_land, include_inventories):
     assert "major_industry" in ind_df.keys()
 
 
+def test_tables_not_categorical():
+    """
+    Test that the categorical variables of the asset data are plain
+    columns in the tables returned
+    """
+    calc = Calculator(Specification(), DepreciationParams(), Assets())
+    dfs = [
+        calc.calc_by_asset(),
+        calc.calc_by_industry(),
+        calc.calc_batch([{"CIT_rate": 0.25}]),
+    ]
+    for df in dfs:
+        for name in df.columns:
+            assert not isinstance(df[name].dtype, pd.CategoricalDtype)
+    # new labels can be assigned
+    dfs[0].loc[0, "tax_treat"] = "new label"
+
+
 @pytest.mark.parametrize(
     "include_land,include_inventories",
     [(False, False), (True, True)],
@@ -328,6 +685,38 @@ def test_restore_assets():
     assert isinstance(calc1, Calculator)
 
 
+def test_update_specification_incremental(monkeypatch):
+    """
+    Test that Calculator.update_specification() only recomputes the
+    results that depend on the parameters changed, and gives the same
+    results as a new Calculator
+    """
+    assets = Assets()
+    p = Specification()
+    dp = DepreciationParams()
+    calc1 = Calculator(p, dp, assets)
+    calc1.calc_by_asset()
+    npv_calls = []
+
+    def npv_tax_depr(*args):
+        npv_calls.append(args)
+        return ccc.calculator.npv_tax_depr.__wrapped__(*args)
+
+    npv_tax_depr.__wrapped__ = ccc.calculator.npv_tax_depr
+    monkeypatch.setattr(ccc.calculator, "npv_tax_depr", npv_tax_depr)
+    revision = {"property_tax": 0.01, "profit_rate": 0.25}
+    calc1.update_specification(revision)
+    test_df = calc1.calc_by_asset()
+    assert len(npv_calls) == 0
+    # only the discount rates of corporations depend on CIT_rate
+    calc1.update_specification({"CIT_rate": 0.3})
+    calc1.calc_by_asset()
+    assert 0 < len(npv_calls) <= len(p.financing_list)
+    p.update_specification(revision)
+    calc2 = Calculator(p, dp, assets)
+    pd.testing.assert_frame_equal(test_df, calc2.calc_by_asset())
+
+
 def test_p_param_return_value():
     assets = Assets()
     p = Specification(year=2022)
@@ -347,6 +736,80 @@ def test_p_param_set_value():
     assert np.allclose(calc1._Calculator__p.tau_int, new_tau_int)
 
 
+def test_exclusions_not_persistent():
+    """
+    Test that excluding land and inventories from a table does not
+    change later results
+    """
+    assets = Assets()
+    p = Specification()
+    dp = DepreciationParams()
+    calc1 = Calculator(p, dp, assets)
+    calc2 = Calculator(p, dp, assets)
+    expected_df = calc1.calc_by_industry()
+    calc2.calc_by_industry(include_land=False, include_inventories=False)
+    calc2.summary_table(calc1, include_land=False)
+    test_df = calc2.calc_by_industry()
+    pd.testing.assert_frame_equal(test_df, expected_df)
+    asset_df = calc2._Calculator__assets.df
+    assert (asset_df["asset_name"] == "Land").any()
+    assert (asset_df["asset_name"] == "Inventories").any()
+
+
+def test_calculator_threads():
+    """
+    Test that Calculators give the same results when used from several
+    threads at once, and that they can still be copied
+    """
+    assets = Assets()
+    p = Specification()
+    dp = DepreciationParams()
+    p2 = Specification()
+    p2.update_specification({"CIT_rate": 0.3})
+    calc1 = Calculator(p, dp, assets)
+    calc2 = Calculator(p2, dp, assets)
+    expected_dfs = [
+        Calculator(p, dp, assets).calc_by_asset(),
+        Calculator(p2, dp, assets).calc_by_industry(),
+    ]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [
+            executor.submit(calc.calc_by_asset)
+            for calc in [calc1, calc1, calc1]
+        ] + [
+            executor.submit(calc.calc_by_industry)
+            for calc in [calc2, calc2, calc2]
+        ]
+        test_dfs = [future.result() for future in futures]
+    for test_df in test_dfs[:3]:
+        pd.testing.assert_frame_equal(test_df, expected_dfs[0])
+    for test_df in test_dfs[3:]:
+        pd.testing.assert_frame_equal(test_df, expected_dfs[1])
+    calc3 = copy.deepcopy(calc1)
+    pd.testing.assert_frame_equal(calc3.calc_by_asset(), expected_dfs[0])
+
+
+def test_calc_by_asset_cache():
+    """
+    Test that calc_by_asset() results are cached, are not affected by
+    changes to the DataFrame returned and are recomputed when a
+    parameter is changed
+    """
+    assets = Assets()
+    p = Specification()
+    dp = DepreciationParams()
+    calc1 = Calculator(p, dp, assets)
+    df1 = calc1.calc_by_asset()
+    df1["mettr_mix"] = 0.0
+    df2 = calc1.calc_by_asset()
+    assert not np.allclose(df2["mettr_mix"], 0.0)
+    df3 = calc1.calc_by_asset(include_land=False)
+    assert not df2.equals(df3)
+    calc1.p_param("property_tax", np.array([0.01]))
+    df4 = calc1.calc_by_asset()
+    assert not np.allclose(df4["rho_mix"], df2["rho_mix"])
+
+
 def test_data_year():
     assets = Assets()
     p = Specification()
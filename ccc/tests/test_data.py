@@ -1,6 +1,12 @@
+import os
+import copy
+import shutil
 import pytest
+import numpy as np
 import pandas as pd
+import ccc.data
 from ccc.data import Assets
+from ccc.constants import LAND_CODE, INVENTORIES_CODE
 from ccc.utils import ASSET_DATA_CSV_YEAR, read_egg_csv, read_egg_json
 
 
@@ -43,7 +49,59 @@ def test_read_data():
     df = read_egg_csv("ccc_asset_data.csv")
     assets = Assets(data="ccc_asset_data.csv")
     assets._read_data("ccc_asset_data.csv")
-    pd.testing.assert_frame_equal(df, assets.df)
+    # strings are read as categoricals, other variables keep their type
+    expected_df = df.astype(
+        {
+            name: "category"
+            for name in df.columns
+            if name in Assets.STRING_READ_VARS
+        }
+    )
+    pd.testing.assert_frame_equal(expected_df, assets.df)
+    assert assets.df["minor_code_alt"].dtype == "int64"
+
+
+def test_read_data_cache(tmp_path, monkeypatch):
+    """
+    Test that Assets caches typed data read from a CSV file and reads
+    the file again when its contents change
+    """
+    monkeypatch.setenv("CCC_CACHE_DIR", str(tmp_path / "cache"))
+    df = read_egg_csv("ccc_asset_data.csv").iloc[:100]
+    path = str(tmp_path / "assets.csv")
+    df.to_csv(path, index=False)
+    expected_df = Assets(data=path, use_cache=False).df
+    assert not (tmp_path / "cache").exists()
+    for _ in range(2):
+        assets = Assets(data=path)
+        pd.testing.assert_frame_equal(assets.df, expected_df)
+    assert len(list((tmp_path / "cache" / "asset_data").iterdir())) == 1
+    df.iloc[:50].to_csv(path, index=False)
+    assert Assets(data=path).array_length == 50
+    assert len(list((tmp_path / "cache" / "asset_data").iterdir())) == 2
+
+
+def test_read_data_cache_key(tmp_path, monkeypatch):
+    """
+    Test that the cache key of asset data changes with the variable
+    types in records_variables.json and with the cache layout version
+    """
+    path = str(tmp_path / "assets.csv")
+    read_egg_csv("ccc_asset_data.csv").iloc[:10].to_csv(path, index=False)
+    var_info_path = str(tmp_path / Assets.VAR_INFO_FILENAME)
+    shutil.copy(
+        os.path.join(Assets.CUR_PATH, Assets.VAR_INFO_FILENAME),
+        var_info_path,
+    )
+    monkeypatch.setattr(Assets, "CUR_PATH", str(tmp_path))
+    key = Assets._cache_key(path)
+    assert Assets._cache_key(path) == key
+    with open(var_info_path, "a") as f:
+        f.write("\n")
+    assert Assets._cache_key(path) != key
+    key = Assets._cache_key(path)
+    monkeypatch.setattr(ccc.data, "ASSETS_CACHE_VERSION", 0)
+    assert Assets._cache_key(path) != key
 
 
 def test_read_data_df():
@@ -61,3 +119,40 @@ def test_read_data_exception():
     """
     with pytest.raises(Exception):
         assert Assets(data=3)
+
+
+def test_row_codes():
+    """
+    Test of Assets.row_codes() method
+    """
+    df = pd.DataFrame(
+        {
+            "asset_name": ["Land", "Computers", "Inventories", "Land"],
+            "tax_treat": [
+                "non-corporate",
+                "corporate",
+                "corporate",
+                "corporate",
+            ],
+        }
+    )
+    assets = Assets(data=df)
+    codes = assets.row_codes()
+    assert np.array_equal(
+        codes["asset_code"], [LAND_CODE, 0, INVENTORIES_CODE, LAND_CODE]
+    )
+    assert np.array_equal(codes["tax_treat_rows"]["corporate"], [1, 2, 3])
+    assert np.array_equal(codes["tax_treat_rows"]["non-corporate"], [0])
+    assert not codes["asset_code"].flags.writeable
+    # codes are found once and shared with copies
+    shared = copy.copy(assets)
+    assert assets.row_codes() is codes
+    assert shared.row_codes() is codes
+    assert shared.df is not assets.df
+    # and found again for new data
+    shared.df = df.iloc[::-1].reset_index(drop=True)
+    assert np.array_equal(
+        shared.row_codes()["asset_code"],
+        [LAND_CODE, INVENTORIES_CODE, 0, LAND_CODE],
+    )
+    assert assets.row_codes() is codes
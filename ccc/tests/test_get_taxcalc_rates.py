@@ -100,6 +100,113 @@ def test_get_rates():
         assert np.allclose(v, p.__dict__[k], atol=1e-4)
 
 
+def test_rates_cache_key():
+    """
+    Test that the cache key does not depend on the order of the reform
+    parameters and changes with the policy
+    """
+    key1 = tc.rates_cache_key(
+        2020, None, {"II_rt7": {2020: 0.4}, "II_rt6": {2020: 0.35}}
+    )
+    key2 = tc.rates_cache_key(
+        2020, {}, {"II_rt6": {2020: 0.35}, "II_rt7": {2020: 0.4}}
+    )
+    key3 = tc.rates_cache_key(2020, None, {"II_rt7": {2020: 0.41}})
+    assert key1 == key2
+    assert key1 != key3
+    assert tc.rates_cache_key(2021, None, {}) != tc.rates_cache_key(
+        2020, None, {}
+    )
+
+
+def test_rates_cache_key_files(monkeypatch, tmp_path):
+    """
+    Test that the cache key for the default PUF data changes with the
+    files in the working directory and with the version of CCC
+    """
+    monkeypatch.chdir(tmp_path)
+    Path(tc.PUF_DATA_FILE).write_text("RECID\n1\n")
+    Path(tc.PUF_WEIGHTS_FILE).write_bytes(b"weights")
+    key1 = tc.rates_cache_key(2020, None, {}, None)
+    assert key1 == tc.rates_cache_key(2020, None, {}, tc.PUF_DATA_FILE)
+    Path(tc.PUF_DATA_FILE).write_text("RECID\n1\n2\n")
+    key2 = tc.rates_cache_key(2020, None, {}, None)
+    assert key2 != key1
+    monkeypatch.setattr(tc.ccc, "__version__", "0.0.0")
+    assert tc.rates_cache_key(2020, None, {}, None) != key2
+
+
+def test_get_rates_cache(monkeypatch, tmp_path):
+    """
+    Test that get_rates() returns cached rates without calling
+    Tax-Calculator and that the cache can be cleared
+    """
+    monkeypatch.setenv("CCC_CACHE_DIR", str(tmp_path))
+    key = tc.rates_cache_key(2020, None, {}, "cps")
+    cached_rates = {"tau_pt": np.array([0.3]), "tau_div": np.array([0.2])}
+    tc._write_rates_cache(key, cached_rates)
+    test_dict = tc.get_rates(2020, None, {}, "cps")
+    for k, v in cached_rates.items():
+        assert np.allclose(test_dict[k], v)
+    tc.clear_rates_cache(key)
+    assert tc._read_rates_cache(key) is None
+
+
+def test_specification_multiyear_rates(monkeypatch, tmp_path):
+    """
+    Test that Specification sets the rates from get_rates() for each
+    year from year through end_year
+    """
+    monkeypatch.setenv("CCC_CACHE_DIR", str(tmp_path))
+    key = tc.rates_cache_key(2021, None, None, "cps", end_year=2023)
+    names = [
+        "tau_pt",
+        "tau_div",
+        "tau_int",
+        "tau_scg",
+        "tau_lcg",
+        "tau_td",
+        "tau_h",
+    ]
+    cached_rates = {k: np.array([0.21, 0.22, 0.23]) for k in names}
+    tc._write_rates_cache(key, cached_rates)
+    p = Specification(year=2021, call_tc=True, end_year=2023)
+    assert np.allclose(p.tau_pt, 0.21)
+    assert np.allclose(p.tau_div, 0.21)
+    p.set_state(year=2023)
+    assert np.allclose(p.tau_pt, 0.23)
+
+
+def test_get_rates_end_year_exception():
+    """
+    Raise exception for an end year before the start year
+    """
+    with pytest.raises(ValueError):
+        assert tc.get_rates(2021, end_year=2020)
+
+
+def test_rates_cache_lru(monkeypatch, tmp_path):
+    """
+    Test that the least recently used rates are removed from the cache
+    """
+    monkeypatch.setenv("CCC_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(tc, "RATES_CACHE_MAX_ENTRIES", 2)
+    rates = {"tau_pt": np.array([0.3])}
+    keys = [tc.rates_cache_key(year) for year in [2020, 2021, 2022]]
+    tc._write_rates_cache(keys[0], rates)
+    tc._write_rates_cache(keys[1], rates)
+    # make first entry the most recently used
+    path = os.path.join(tmp_path, tc.RATES_CACHE_SUBDIR, keys[1] + ".json")
+    os.utime(path, (0, 0))
+    assert tc._read_rates_cache(keys[0]) is not None
+    tc._write_rates_cache(keys[2], rates)
+    assert tc._read_rates_cache(keys[0]) is not None
+    assert tc._read_rates_cache(keys[1]) is None
+    assert tc._read_rates_cache(keys[2]) is not None
+    tc.clear_rates_cache()
+    assert tc._read_rates_cache(keys[0]) is None
+
+
 @pytest.mark.parametrize(
     "reform,expected",
     [({"key1": {"key2": 1.0}}, False), ({"key1": "string"}, True)],
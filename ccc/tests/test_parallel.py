@@ -0,0 +1,39 @@
+import pytest
+import pandas as pd
+from ccc.parameters import Specification, DepreciationParams
+from ccc.data import Assets
+from ccc.calculator import Calculator
+from ccc.parallel import run_many, ScenarioError
+
+
+def test_run_many():
+    """
+    Test that run_many returns results in the order of the revisions
+    and that a bad revision does not stop the other scenarios
+    """
+    assets = Assets()
+    p = Specification()
+    dp = DepreciationParams()
+    revisions = [{"CIT_rate": 0.25}, {"CIT_rate": 5.0}, {}]
+    results = run_many(
+        p, dp, assets, revisions, method="calc_by_asset", max_workers=2
+    )
+    assert len(results) == 3
+    assert isinstance(results[1], ScenarioError)
+    assert "CIT_rate" in results[1].error
+    for i in [0, 2]:
+        p2 = Specification()
+        p2.update_specification(revisions[i])
+        expected_df = Calculator(p2, dp, assets).calc_by_asset()
+        pd.testing.assert_frame_equal(results[i], expected_df)
+
+
+def test_run_many_exception():
+    """
+    Raise exception for a method that is not a Calculator method
+    """
+    assets = Assets()
+    p = Specification()
+    dp = DepreciationParams()
+    with pytest.raises(ValueError):
+        assert run_many(p, dp, assets, [{}], method="not_a_method")
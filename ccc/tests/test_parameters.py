@@ -1,6 +1,9 @@
 import pytest
+import pickle
+import pandas as pd
 import os
 from ccc.parameters import Specification, revision_warnings_errors
+from ccc.parameters import revision_grid
 from ccc.parameters import DepreciationParams
 
 CUR_DIR = os.path.abspath(os.path.dirname(__file__))
@@ -162,6 +165,134 @@ def test_revision_warnings_errors():
     assert e_w["errors"] == "ERROR: revision is not a dictionary or string"
 
 
+def test_revision_grid():
+    """
+    Test that revision_grid returns all combinations of values
+    """
+    grid = {"CIT_rate": [0.21, 0.28], "BonusDeprec_3yr": [0.0, 0.5, 1.0]}
+    revisions = revision_grid(grid)
+    assert len(revisions) == 6
+    assert revisions[1] == {"CIT_rate": 0.21, "BonusDeprec_3yr": 0.5}
+    spec = Specification()
+    spec.update_specification(revisions[-1])
+    assert spec.CIT_rate == 0.28
+
+
+@pytest.mark.parametrize("validate", [True, False], ids=["validate", "trust"])
+def test_bulk_update_specification(validate):
+    """
+    Test that bulk_update_specification gives the same parameter values
+    as update_specification with each revision in turn
+    """
+    revisions = [
+        {"CIT_rate": 0.25},
+        {
+            "CIT_rate": [{"year": 2030, "value": 0.3}],
+            "BonusDeprec_3yr": [{"year": 2025, "value": 0.5}],
+        },
+        {
+            "re_credit_asset": [
+                {"year": 2025, "bea_asset_code": "RD70", "value": 0.1}
+            ]
+        },
+        '{"inflation_rate": [{"year": 2025, "value": 0.03}]}',
+    ]
+    spec = Specification(year=2025)
+    for revision in revisions:
+        spec.update_specification(revision)
+    bulk_spec = Specification(year=2025)
+    bulk_spec.bulk_update_specification(revisions, validate=validate)
+    for param in ["CIT_rate", "BonusDeprec_3yr", "re_credit_asset"]:
+        for year in [2025, 2030]:
+            assert sorted(
+                (vo.get("bea_asset_code"), vo["value"])
+                for vo in bulk_spec.select_eq(param, year=year)
+            ) == sorted(
+                (vo.get("bea_asset_code"), vo["value"])
+                for vo in spec.select_eq(param, year=year)
+            )
+    assert bulk_spec.inflation_rate == 0.03
+    assert bulk_spec.u["c"] == spec.u["c"]
+    assert bulk_spec.r["c"]["mix"] == spec.r["c"]["mix"]
+    assert bulk_spec.bonus_deprec == spec.bonus_deprec
+
+
+def test_bulk_update_specification_errors():
+    """
+    Test that bulk_update_specification validates the revisions together
+    unless they are trusted
+    """
+    spec = Specification()
+    with pytest.raises(ValueError):
+        spec.bulk_update_specification([{"CIT_rate": 0.3}, 0.3])
+    with pytest.raises(ValueError):
+        spec.bulk_update_specification([{"not_a_param": 0.3}])
+    with pytest.raises(ValueError):
+        spec.bulk_update_specification(
+            [{"CIT_rate": [{"year": 2090, "value": 0.3}]}], validate=False
+        )
+    spec.bulk_update_specification(
+        [{"CIT_rate": 0.3}, {"CIT_rate": 2.0}], raise_errors=False
+    )
+    assert "CIT_rate" in spec.errors
+    assert spec.CIT_rate == 0.21
+    spec = Specification()
+    spec.bulk_update_specification([{"CIT_rate": 2.0}], validate=False)
+    assert spec.u["c"] == 2.0
+
+
+def test_compile():
+    """
+    Test that compile returns a read-only snapshot of the parameters
+    that can be pickled
+    """
+    spec = Specification()
+    compiled = spec.compile()
+    assert compiled.r.shape == (2, 3)
+    for t in spec.entity_list:
+        assert compiled.get("u", t) == spec.u[t].item()
+        for f in spec.financing_list:
+            assert compiled.get("r", t, f) == spec.r[t][f].item()
+            assert compiled.get("s", t, f) == spec.s[t][f].item()
+    assert compiled.inflation_rate == spec.inflation_rate.item()
+    assert compiled.bonus_deprec == spec.bonus_deprec
+    with pytest.raises(AttributeError):
+        compiled.inflation_rate = 0.05
+    with pytest.raises(ValueError):
+        compiled.r[0, 0] = 0.05
+    unpickled = pickle.loads(pickle.dumps(compiled))
+    assert unpickled.get("r", "pt", "d") == compiled.get("r", "pt", "d")
+    assert unpickled.bonus_deprec == compiled.bonus_deprec
+    spec.update_specification({"CIT_rate": 0.35})
+    assert compiled.get("u", "c") == 0.21
+    assert spec.compile().get("u", "c") == 0.35
+
+
+def test_clone():
+    """
+    Test that clone returns an independent copy of a Specification
+    """
+    spec = Specification(year=2020)
+    spec.update_specification({"CIT_rate": 0.3})
+    clone = spec.clone()
+    assert clone.year == 2020
+    assert clone.CIT_rate == 0.3
+    assert clone.u["c"] == spec.u["c"]
+    assert clone.dump() == spec.dump()
+    clone.update_specification({"CIT_rate": 0.25, "BonusDeprec_3yr": 0.5})
+    assert spec.CIT_rate == 0.3
+    assert spec.u["c"] == 0.3
+    assert spec.bonus_deprec[3] == spec.BonusDeprec_3yr[0]
+    assert clone.u["c"] == 0.25
+    assert clone.bonus_deprec[3] == 0.5
+    # revisions of the clone are validated against the clone
+    clone.update_specification({"CIT_rate": 1.5}, raise_errors=False)
+    assert "CIT_rate" in clone.errors
+    assert not spec.errors
+    # new Specifications do not see the revisions
+    assert Specification(year=2020).CIT_rate == 0.21
+
+
 def test_create_depreciation_parameters_object():
     dp = DepreciationParams()
     assert dp
@@ -274,6 +405,50 @@ def test_update_depreciation_bad_revision2():
         assert dp.adjust(new_dp_dict)
 
 
+def test_depreciation_year_df():
+    """
+    Test that year_df returns the rows of expanded_df for a year
+    """
+    dp = DepreciationParams()
+    expanded_df = dp.expanded_df()
+    test_df = dp.year_df(2020)
+    expected_df = expanded_df[expanded_df["year"] == 2020]
+    pd.testing.assert_frame_equal(test_df, expected_df)
+    assert len(dp.year_df(1900).index) == 0
+
+
+def test_depreciation_df_cache():
+    """
+    Test that cached DataFrames are updated when parameters are adjusted
+    and cannot be changed by callers
+    """
+    dp = DepreciationParams()
+    df = dp.year_df(2020)
+    df["life"] = 0.0
+    assert (dp.year_df(2020)["life"] > 0).all()
+    assert dp.to_df() is not dp.to_df()
+    dp.adjust(
+        {
+            "ENS2": [
+                {
+                    "year": 2020,
+                    "value": {"life": 12.0, "method": "SL", "system": "GDS"},
+                }
+            ]
+        }
+    )
+    test_df = dp.year_df(2020)
+    assert test_df.loc[test_df["BEA_code"] == "ENS2", "life"].item() == 12.0
+    test_df = dp.expanded_df()
+    assert (
+        test_df.loc[
+            (test_df["BEA_code"] == "ENS2") & (test_df["year"] == 2021),
+            "method",
+        ].item()
+        == "SL"
+    )
+
+
 def test_adjust_from_csv():
     """
     Test that can adjust parameters from a csv file
@@ -256,3 +256,44 @@ def test_calc_rprime(p, expected_dict):
     for k, v in test_dict.items():
         for k2, v2 in v.items():
             assert np.allclose(v2, expected_dict[k][k2])
+
+
+def test_stack_rates():
+    """
+    Test of the paramfunctions.stack_rates function
+    """
+    rates = pf.stack_rates([[np.array([0.1, 0.2]), 1.0, 0.0], [0.3, 1.0, 0.0]])
+    assert rates.shape == (2, 2, 3)
+    assert np.array_equal(rates[:, 0, 0], [0.1, 0.2])
+    assert np.array_equal(rates[:, 1, 0], [0.3, 0.3])
+    assert pf.stack_rates([0.21, np.array([0.2])]).shape == (1, 2)
+
+
+def test_scenario_broadcasting():
+    """
+    Test that calc_s, calc_r and calc_r_prime, through
+    compute_default_params, give arrays with shape (scenario, entity,
+    financing) for parameters with a scenario axis, that match those
+    for each scenario on its own
+    """
+    inflation_rates = np.array([0.01, 0.02, 0.03])
+    CIT_rates = np.array([0.35, 0.21, 0.15])
+    p = Specification()
+    p.inflation_rate = inflation_rates
+    p.CIT_rate = CIT_rates
+    p.compute_default_params()
+    s, E_pt = pf.calc_s(p, as_array=True)
+    assert s.shape == (3, 2, 3)
+    assert E_pt.shape == (3,)
+    assert p.compile().r.shape == (3, 2, 3)
+    for i in range(3):
+        p_i = Specification()
+        p_i.update_specification(
+            {"inflation_rate": inflation_rates[i], "CIT_rate": CIT_rates[i]}
+        )
+        for j, t in enumerate(p.entity_list):
+            for k, f in enumerate(p.financing_list):
+                assert np.allclose(p.r[t][f][i], p_i.r[t][f])
+                assert np.allclose(p.r_prime[t][f][i], p_i.r_prime[t][f])
+                assert np.allclose(p.s[t][f][i], p_i.s[t][f])
+                assert np.allclose(s[i, j, k], p_i.s[t][f])
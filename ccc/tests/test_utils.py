@@ -2,6 +2,7 @@ import pytest
 import pandas as pd
 import numpy as np
 import os
+import warnings
 import ccc.utils as utils
 
 
@@ -52,6 +53,16 @@ def test_diff_two_tables():
     pd.testing.assert_frame_equal(test_df, expected_df)
 
 
+def test_uncategorize():
+    """
+    Test of the uncategorize() function
+    """
+    expected_df = pd.DataFrame({"var1": ["b", "a", "b"], "var2": [1, 3, 1]})
+    df = expected_df.astype("category")
+    test_df = utils.uncategorize(df)
+    pd.testing.assert_frame_equal(test_df, expected_df)
+
+
 def test_wavg():
     """
     Test of utils.wavg() function
@@ -69,6 +80,167 @@ def test_wavg():
     assert np.allclose(test_val, expected_val)
 
 
+def test_wavg_zero_weight():
+    """
+    Test that utils.wavg() returns the simple mean if the weights sum
+    to zero, without changing the warning filters
+    """
+    df = pd.DataFrame({"var1": [1.0, 3.0], "wgt_var": [0.0, 0.0]})
+    filters = list(warnings.filters)
+    test_val = utils.wavg(df, "var1", "wgt_var")
+    assert np.allclose(test_val, 2.0)
+    assert warnings.filters == filters
+
+
+def test_streaming_stats():
+    """
+    Test that utils.StreamingStats gives the statistics of all values
+    passed in chunks
+    """
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(5000, 3)) * [1.0, 2.0, 0.0] + [0.0, 5.0, 3.0]
+    values[10, 0] = np.nan
+    stats = utils.StreamingStats(3, num_bins=500)
+    for start in range(0, 5000, 1000):
+        stats.update(values[start : start + 1000])
+    assert np.allclose(stats.count, [4999, 5000, 5000])
+    assert np.allclose(stats.mean, np.nanmean(values, axis=0))
+    assert np.allclose(stats.std(), np.nanstd(values, axis=0, ddof=1))
+    assert np.allclose(stats.min, np.nanmin(values, axis=0))
+    for q in [0.05, 0.5, 0.95]:
+        assert np.allclose(
+            stats.quantile(q),
+            np.nanquantile(values, q, axis=0),
+            atol=np.max(stats.width),
+        )
+
+
+@pytest.mark.parametrize(
+    "chunk_size,drift",
+    [(1, 0.0), (100, 50.0)],
+    ids=["One value per chunk", "Drifting values"],
+)
+def test_streaming_stats_range(chunk_size, drift):
+    """
+    Test that utils.StreamingStats widens its histograms to cover values
+    outside the range of the first chunk
+    """
+    rng = np.random.default_rng(0)
+    trend = np.linspace(0.0, drift, 5000)[:, np.newaxis]
+    values = rng.normal(size=(5000, 2)) + trend * [1.0, -1.0]
+    stats = utils.StreamingStats(2)
+    for start in range(0, 5000, chunk_size):
+        stats.update(values[start : start + chunk_size])
+    assert np.allclose(stats.hist.sum(axis=1), 5000)
+    assert np.all(stats.width < 4 * np.ptp(values, axis=0) / stats.num_bins)
+    for q in [0.05, 0.5, 0.95]:
+        assert np.allclose(
+            stats.quantile(q),
+            np.quantile(values, q, axis=0),
+            atol=np.max(stats.width),
+        )
+    with pytest.raises(ValueError):
+        utils.StreamingStats(2, num_bins=999)
+
+
+dict2 = {
+    "id1": ["b", "a", "b", "a", "c", "c", "b"],
+    "id2": ["x", "y", "x", "x", "y", "y", "y"],
+    "var1": [1.0, 2.0, 3.0, np.nan, 5.0, 6.0, 7.0],
+    "var2": [2.0, 4.0, 6.0, 8.0, 10.0, 12.0, 14.0],
+    "wgt_var": [0.25, 0.5, 0.25, 1.0, 0.0, 0.0, 2.0],
+}
+df2 = pd.DataFrame.from_dict(dict2)
+test_data = [["id1"], ["id1", "id2"], ["id2", "id1"]]
+
+
+@pytest.mark.parametrize(
+    "by", test_data, ids=["One key", "Two keys", "Two keys reversed"]
+)
+def test_wavg_by_group(by):
+    """
+    Test that utils.wavg_by_group() matches utils.wavg() applied to
+    each group
+    """
+    test_df = utils.wavg_by_group(df2, by, ["var1", "var2"], "wgt_var")
+    expected_df = pd.DataFrame(
+        df2.groupby(by).apply(
+            lambda x: pd.Series(
+                {
+                    "wgt_var": x["wgt_var"].sum(),
+                    "var1": utils.wavg(x, "var1", "wgt_var"),
+                    "var2": utils.wavg(x, "var2", "wgt_var"),
+                }
+            ),
+            include_groups=False,
+        )
+    ).reset_index()
+    pd.testing.assert_frame_equal(test_df, expected_df)
+
+
+def test_wavg_by_groups():
+    """
+    Test that utils.wavg_by_groups() returns one table per grouping,
+    including a single row for an empty grouping
+    """
+    test_dfs = utils.wavg_by_groups(
+        df2, [["id1", "id2"], ["id1"], []], ["var2"], "wgt_var"
+    )
+    assert len(test_dfs) == 3
+    assert len(test_dfs[0].index) == 5
+    assert list(test_dfs[1]["id1"]) == ["a", "b", "c"]
+    # zero total weight falls back to the simple mean
+    assert np.allclose(test_dfs[1]["var2"].values, [20.0 / 3.0, 12.0, 11.0])
+    assert np.allclose(test_dfs[2]["wgt_var"].values, [4.0])
+    assert np.allclose(test_dfs[2]["var2"].values, [10.0])
+
+
+def test_wavg_rollup():
+    """
+    Test that utils.wavg_rollup() applied to utils.group_sums() gives
+    the same results as utils.wavg_by_groups()
+    """
+    groupings = [["id1", "id2"], ["id2"], []]
+    sums_df = utils.group_sums(
+        df2, ["id1", "id2"], ["var1", "var2"], "wgt_var"
+    )
+    assert len(sums_df.index) == 5
+    assert np.allclose(sums_df["count_var1"].sum(), 6)
+    test_dfs = utils.wavg_rollup(
+        sums_df, groupings, ["var1", "var2"], "wgt_var"
+    )
+    expected_dfs = utils.wavg_by_groups(
+        df2, groupings, ["var1", "var2"], "wgt_var"
+    )
+    for test_df, expected_df in zip(test_dfs, expected_dfs):
+        pd.testing.assert_frame_equal(test_df, expected_df)
+
+
+def test_get_cache_dir(monkeypatch, tmp_path):
+    """
+    Test that utils.get_cache_dir() uses the CCC_CACHE_DIR environment
+    variable if set
+    """
+    monkeypatch.setenv("CCC_CACHE_DIR", str(tmp_path))
+    assert utils.get_cache_dir("rates") == os.path.join(tmp_path, "rates")
+    monkeypatch.delenv("CCC_CACHE_DIR")
+    assert utils.get_cache_dir().endswith(os.path.join(".cache", "ccc"))
+
+
+def test_copy_on_write(monkeypatch):
+    """
+    Test that utils.copy_on_write() finds whether pandas copy-on-write
+    is in effect
+    """
+    monkeypatch.setattr(pd, "__version__", "3.0.0")
+    assert utils.copy_on_write()
+    monkeypatch.setattr(pd, "__version__", "2.2.3")
+    monkeypatch.setattr(pd, "get_option", lambda name: False)
+    assert not utils.copy_on_write()
+    monkeypatch.setattr(pd, "get_option", lambda name: True)
+    assert utils.copy_on_write()
+
+
 def test_read_egg_csv():
     """
     Test of utils.read_egg_csv() function
@@ -1,8 +1,9 @@
 import importlib.resources as pkg_resources
 from collections import OrderedDict
-import warnings
 import numbers
 import json
+import os
+import numpy as np
 import pandas as pd
 
 PACKAGE_NAME = "ccc"
@@ -20,6 +21,47 @@ RECORDS_START_YEAR = 2011
 # Latest year TaxData extrapolates to
 TC_LAST_YEAR = 2036
 
+# Environment variable that sets the directory for cached results
+CACHE_DIR_ENV_VAR = "CCC_CACHE_DIR"
+
+
+def get_cache_dir(subdir=None):
+    """
+    Function to find the directory in which to cache results.  This is
+    the value of the CCC_CACHE_DIR environment variable if it is set
+    and `~/.cache/ccc` otherwise.
+
+    Args:
+        subdir (string): name of subdirectory of the cache directory
+
+    Returns:
+        cache_dir (string): path to the cache directory, which might not
+            exist yet
+
+    """
+    cache_dir = os.environ.get(CACHE_DIR_ENV_VAR)
+    if not cache_dir:
+        cache_dir = os.path.join(os.path.expanduser("~"), ".cache", "ccc")
+    if subdir is not None:
+        cache_dir = os.path.join(cache_dir, subdir)
+    return cache_dir
+
+
+def copy_on_write():
+    """
+    Function to find whether pandas copy-on-write is in effect, as it
+    always is from pandas 3.0 on.  Without it, a shallow copy of a
+    DataFrame shares its data, so that modifying one in place also
+    modifies the other.
+
+    Returns:
+        copy_on_write (bool): whether copy-on-write is in effect
+
+    """
+    if int(pd.__version__.split(".")[0]) >= 3:
+        return True
+    return pd.get_option("mode.copy_on_write") is True
+
 
 def to_str(x):
     """
@@ -84,6 +126,30 @@ def diff_two_tables(df1, df2):
     return diff_df
 
 
+def uncategorize(df):
+    """
+    Converts the categorical variables of a DataFrame, such as those of
+    the asset data read by Assets, to the type of their categories, so
+    that tables built from them have plain columns.
+
+    Args:
+        df (Pandas DataFrame): data
+
+    Returns:
+        df (Pandas DataFrame): data without categorical variables
+
+    """
+    types = {
+        name: dtype.categories.dtype
+        for name, dtype in df.dtypes.items()
+        if isinstance(dtype, pd.CategoricalDtype)
+    }
+    if types:
+        df = df.astype(types)
+
+    return df
+
+
 def wavg(group, avg_name, weight_name):
     """
     Computes a weighted average.
@@ -97,13 +163,398 @@ def wavg(group, avg_name, weight_name):
         d (scalar): weighted avg for the group
 
     """
-    warnings.filterwarnings("error")
     d = group[avg_name]
     w = group[weight_name]
-    try:
-        return (d * w).sum() / w.sum()
-    except Warning:
+    w_sum = w.sum()
+    if w_sum == 0:
         return d.mean()
+    return (d * w).sum() / w_sum
+
+
+def wavg_by_group(df, by, avg_names, weight_name):
+    """
+    Computes the sum of the weighting variable and weighted averages of
+    several variables for every group in `df.groupby(by)`.
+
+    Args:
+        df (Pandas DataFrame): data to aggregate
+        by (list): names of variables to group by; an empty list puts
+            all rows into a single group
+        avg_names (list): names of variables to compute wgt avgs for
+        weight_name (string): name of weighting variable
+
+    Returns:
+        agg_df (Pandas DataFrame): one row per group, in sorted order
+            of the group keys, with the `by` variables, the sum of the
+            weighting variable, and the weighted averages
+
+    """
+    return wavg_by_groups(df, [by], avg_names, weight_name)[0]
+
+
+def wavg_by_groups(df, groupings, avg_names, weight_name):
+    """
+    Computes the sum of the weighting variable and weighted averages of
+    several variables for several groupings of the same data in one
+    pass.
+
+    Results agree with calling `wavg` for each variable on each group
+    of `df.groupby(by)` for each `by` in `groupings` up to floating
+    point rounding: the weighted average falls back to the simple mean
+    for groups with zero total weight.  Each grouping variable is
+    factorized only once, and all columns are reduced together with
+    `np.add.reduceat` over rows sorted by group, rather than building a
+    Series per group.
+
+    Args:
+        df (Pandas DataFrame): data to aggregate
+        groupings (list): list of lists of names of variables to group
+            by; an empty list puts all rows into a single group
+        avg_names (list): names of variables to compute wgt avgs for
+        weight_name (string): name of weighting variable
+
+    Returns:
+        agg_dfs (list): list of Pandas DataFrames, one for each grouping,
+            see `wavg_by_group`
+
+    """
+    values = _wavg_sum_values(df, avg_names, weight_name)
+    return [
+        _wavg_from_sums(keys, sums, avg_names, weight_name)
+        for keys, sums in _sum_by_groups(df, groupings, values)
+    ]
+
+
+def group_sums(df, by, avg_names, weight_name):
+    """
+    Computes the sums needed to find weighted averages of several
+    variables for every group in `df.groupby(by)`.  These can be
+    rolled up to coarser groupings with `wavg_rollup` without going
+    back to the data.
+
+    Args:
+        df (Pandas DataFrame): data to aggregate
+        by (list): names of variables to group by
+        avg_names (list): names of variables to compute wgt avgs for
+        weight_name (string): name of weighting variable
+
+    Returns:
+        sums_df (Pandas DataFrame): one row per group, in sorted order
+            of the group keys, with the `by` variables, the sum of the
+            weighting variable, and for each variable `v` in
+            `avg_names` the sum of weighted values (`wsum_v`), the sum
+            of values (`sum_v`) and the number of values (`count_v`)
+
+    """
+    values = _wavg_sum_values(df, avg_names, weight_name)
+    keys, sums = _sum_by_groups(df, [by], values)[0]
+    sums_df = keys
+    for name, col in zip(_sum_names(avg_names, weight_name), sums.T):
+        sums_df[name] = col
+
+    return sums_df
+
+
+def wavg_rollup(sums_df, grouping_sets, avg_names, weight_name):
+    """
+    Computes the sum of the weighting variable and weighted averages of
+    several variables for each of several grouping sets from the group
+    sums returned by `group_sums`.
+
+    The data only need to be aggregated once, to the finest level of
+    the hierarchy; each coarser level is then derived from those leaf
+    sums.  Results agree with `wavg_by_groups` up to floating point
+    rounding.
+
+    Args:
+        sums_df (Pandas DataFrame): group sums from `group_sums`
+        grouping_sets (list): list of lists of names of variables to
+            group by, each a subset of the variables `sums_df` was
+            grouped by; an empty list puts all groups into one
+        avg_names (list): names of variables to compute wgt avgs for
+        weight_name (string): name of weighting variable
+
+    Returns:
+        agg_dfs (list): list of Pandas DataFrames, one for each grouping
+            set, see `wavg_by_group`
+
+    """
+    values = np.ascontiguousarray(
+        sums_df[_sum_names(avg_names, weight_name)].to_numpy(dtype=float).T
+    )
+    return [
+        _wavg_from_sums(keys, sums, avg_names, weight_name)
+        for keys, sums in _sum_by_groups(sums_df, grouping_sets, values)
+    ]
+
+
+def _sum_names(avg_names, weight_name):
+    """
+    Names of the sums kept by `group_sums`, in the order used by
+    `_wavg_sum_values`.
+    """
+    return (
+        [weight_name]
+        + ["wsum_" + name for name in avg_names]
+        + ["sum_" + name for name in avg_names]
+        + ["count_" + name for name in avg_names]
+    )
+
+
+def _wavg_sum_values(df, avg_names, weight_name):
+    """
+    Array of the values that are summed to compute weighted averages,
+    one variable per row: weights, weighted values, values, and
+    indicators for non-missing values.  NaNs are skipped in sums and
+    means, as in pandas.
+    """
+    w = df[weight_name].to_numpy(dtype=float)
+    d = df[avg_names].to_numpy(dtype=float).T
+    notna = ~np.isnan(d)
+    values = np.vstack(
+        [
+            np.nan_to_num(w, nan=0.0),
+            np.where(notna & ~np.isnan(w), d * w, 0.0),
+            np.where(notna, d, 0.0),
+            notna.astype(float),
+        ]
+    )
+
+    return values
+
+
+def _sum_by_groups(df, groupings, values):
+    """
+    Sums each row of `values` over the groups of `df.groupby(by)` for
+    each `by` in `groupings`.
+
+    The rows of `df` are sorted by group and each segment of `values`
+    is summed with `np.add.reduceat`.
+
+    Returns:
+        list of (keys, sums) tuples: the group keys as a DataFrame and
+            the sums as an array with one row per group
+    """
+    codes = {}
+    for name in set(name for by in groupings for name in by):
+        codes[name] = pd.factorize(df[name], sort=True)[0]
+    results = []
+    for by in groupings:
+        # sort rows by group, keeping the original order within groups
+        keys = [codes[name] for name in by]
+        rows = np.arange(len(df.index))
+        if len(keys) > 0:
+            rows = rows[np.all(np.vstack(keys) >= 0, axis=0)]
+            rows = rows[np.lexsort([key[rows] for key in keys[::-1]])]
+        if len(rows) == 0:
+            results.append(
+                (
+                    pd.DataFrame(columns=list(by)),
+                    np.zeros((0, values.shape[0])),
+                )
+            )
+            continue
+        new_group = np.zeros(len(rows) - 1, dtype=bool)
+        for key in keys:
+            sorted_key = key[rows]
+            new_group |= sorted_key[1:] != sorted_key[:-1]
+        bounds = np.flatnonzero(np.r_[True, new_group, True])
+        sums = np.add.reduceat(
+            values.take(rows, axis=1), bounds[:-1], axis=1
+        ).T
+        group_keys = uncategorize(df[list(by)].iloc[rows[bounds[:-1]]])
+        results.append((group_keys.reset_index(drop=True), sums))
+
+    return results
+
+
+def _wavg_from_sums(keys, sums, avg_names, weight_name):
+    """
+    Weighted averages from the sums of the values returned by
+    `_wavg_sum_values`, falling back to simple means for groups with
+    zero total weight.
+    """
+    k = len(avg_names)
+    w_sum = sums[:, :1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        avg = sums[:, 1 : k + 1] / w_sum
+        mean = sums[:, k + 1 : 2 * k + 1] / sums[:, 2 * k + 1 :]
+    avg = np.where(w_sum == 0, mean, avg)
+    agg_df = keys
+    agg_df[weight_name] = w_sum[:, 0]
+    for i, name in enumerate(avg_names):
+        agg_df[name] = avg[:, i]
+
+    return agg_df
+
+
+class StreamingStats:
+    """
+    Accumulates the mean, standard deviation, minimum, maximum and
+    quantiles of several series of values that are passed in chunks,
+    without keeping the values.  Means and variances are merged across
+    chunks exactly, with the pairwise update of Chan, Golub and LeVeque.
+    Quantiles are interpolated in a histogram of each series, whose
+    range is set from the first chunk with finite values, widened by
+    half its width on each side.  Whenever later values fall outside
+    it, the width of the bins is doubled, merging pairs of adjacent
+    bins, until the range covers them.  Quantiles are thus accurate to
+    about the width of a bin, which is at most about twice the range of
+    the values over the number of bins, and never outside the minimum
+    and maximum.  Non-finite values are skipped.
+
+    Args:
+        num_series (int): number of series
+        num_bins (int): number of histogram bins for each series, an
+            even number
+
+    Returns:
+        StreamingStats: class instance
+
+    Raises:
+        ValueError: if num_bins is not a positive even number
+
+    """
+
+    def __init__(self, num_series, num_bins=1000):
+        if num_bins < 2 or num_bins % 2 != 0:
+            raise ValueError("num_bins must be a positive even number")
+        self.num_bins = num_bins
+        self.count = np.zeros(num_series)
+        self.mean = np.zeros(num_series)
+        self.m2 = np.zeros(num_series)
+        self.min = np.full(num_series, np.nan)
+        self.max = np.full(num_series, np.nan)
+        self.lower = np.full(num_series, np.nan)
+        self.width = np.full(num_series, np.nan)
+        self.hist = np.zeros((num_series, num_bins), dtype=np.int64)
+
+    def update(self, values):
+        """
+        Adds a chunk of values to the statistics.
+
+        Args:
+            values (Numpy array): one row for each value and one column
+                for each series
+
+        Returns:
+            None
+
+        """
+        values = np.asarray(values, dtype=float)
+        finite = np.isfinite(values)
+        all_finite = finite.all()
+        if all_finite:
+            x = values
+            n = np.full(values.shape[1], float(values.shape[0]))
+        else:
+            x = np.where(finite, values, 0.0)
+            n = finite.sum(axis=0).astype(float)
+        has = n > 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = np.where(has, x.sum(axis=0) / n, 0.0)
+        dev = x - mean
+        if not all_finite:
+            dev[~finite] = 0.0
+        m2 = np.square(dev, out=dev).sum(axis=0)
+        total = self.count + n
+        with np.errstate(divide="ignore", invalid="ignore"):
+            diff = mean - self.mean
+            self.mean = np.where(has, self.mean + diff * n / total, self.mean)
+            self.m2 = np.where(
+                has,
+                self.m2 + m2 + diff**2 * self.count * n / total,
+                self.m2,
+            )
+        self.count = total
+        if all_finite:
+            lo, hi = values.min(axis=0), values.max(axis=0)
+        else:
+            lo = np.where(finite, values, np.inf).min(axis=0)
+            hi = np.where(finite, values, -np.inf).max(axis=0)
+        self.min = np.where(has, np.fmin(self.min, lo), self.min)
+        self.max = np.where(has, np.fmax(self.max, hi), self.max)
+        # set the histogram range of series seen for the first time
+        new = has & np.isnan(self.lower)
+        span = hi - lo
+        span = np.where(span > 0, span, 1e-8 * np.fmax(1.0, np.abs(lo)))
+        self.lower = np.where(new, lo - span / 2, self.lower)
+        self.width = np.where(new, 2 * span / self.num_bins, self.width)
+        # widen the histograms of series with values outside their range
+        while True:
+            below = has & (lo < self.lower)
+            above = has & (hi > self.lower + self.num_bins * self.width)
+            if not (below | above).any():
+                break
+            self._double_width(below | above, below)
+        idx = np.subtract(x, self.lower, out=dev)
+        with np.errstate(invalid="ignore"):
+            idx /= self.width
+            np.floor(idx, out=idx)
+            np.clip(idx, 0, self.num_bins - 1, out=idx)
+            idx = idx.astype(np.int64)
+        idx += self.num_bins * np.arange(values.shape[1])
+        if not all_finite:
+            idx = idx[finite]
+        self.hist += np.bincount(
+            idx.ravel(), minlength=self.hist.size
+        ).reshape(self.hist.shape)
+
+    def _double_width(self, series, below):
+        """
+        Doubles the width of the histogram bins of `series`, merging
+        pairs of adjacent bins.  The range is extended downward for the
+        series that are `below` it and upward for the others.
+        """
+        half = self.num_bins // 2
+        merged = self.hist[series, 0::2] + self.hist[series, 1::2]
+        down = below[series]
+        hist = np.zeros_like(self.hist[series])
+        hist[down, half:] = merged[down]
+        hist[~down, :half] = merged[~down]
+        self.hist[series] = hist
+        self.lower[series] -= np.where(
+            down, self.num_bins * self.width[series], 0.0
+        )
+        self.width[series] *= 2
+
+    def std(self):
+        """
+        Sample standard deviation of each series, which is NaN for
+        series with fewer than two values.
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(
+                self.count > 1, np.sqrt(self.m2 / (self.count - 1)), np.nan
+            )
+
+    def quantile(self, q):
+        """
+        Approximate `q` quantile of each series, which is NaN for
+        series with no values.
+
+        Args:
+            q (scalar): quantile, between 0 and 1
+
+        Returns:
+            values (Numpy array): quantile of each series
+
+        """
+        cum = self.hist.cumsum(axis=1)
+        target = q * self.count
+        j = np.minimum(
+            (cum < target[:, np.newaxis]).sum(axis=1), self.num_bins - 1
+        )
+        rows = np.arange(len(j))
+        before = np.where(j > 0, cum[rows, j - 1], 0)
+        in_bin = self.hist[rows, j]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            frac = np.where(in_bin > 0, (target - before) / in_bin, 0.0)
+        values = self.lower + (j + frac) * self.width
+
+        return np.where(
+            self.count > 0, np.clip(values, self.min, self.max), np.nan
+        )
 
 
 def read_egg_csv(fname, index_col=None):